@@ -11,9 +11,129 @@ class Config:
     DB_NAME = os.getenv("DB_NAME")
     INSTANCE_UNIX_SOCKET = os.getenv("INSTANCE_UNIX_SOCKET")
 
-    SQLALCHEMY_DATABASE_URI = (
-        f"postgresql+pg8000://{DB_USER}:{DB_PASS}@/{DB_NAME}"
-        f"?unix_sock={INSTANCE_UNIX_SOCKET}/.s.PGSQL.5432"
+    # 資料庫驅動：pg8000 或 psycopg（psycopg 3）；DATABASE_URL 可直接指定完整連線字串
+    DB_DRIVER = os.getenv("DB_DRIVER", "pg8000")
+    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
+
+    # 連線池：大小、溢出上限、等待逾時與回收秒數；psycopg 的 prepared statement 門檻
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 5))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_PREPARE_THRESHOLD = (
+        None
+        if os.getenv("DB_PREPARE_THRESHOLD", "5").lower() == "none"
+        else int(os.getenv("DB_PREPARE_THRESHOLD", 5))
     )
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # 增量計分引擎：群組狀態的存活秒數（多 worker 時避免長期不同步）與快取上限
+    SCORE_ENGINE_TTL = int(os.getenv("SCORE_ENGINE_TTL", 300))
+    SCORE_ENGINE_MAX_GROUPS = int(os.getenv("SCORE_ENGINE_MAX_GROUPS", 1024))
+
+    # 排行榜：記憶體中保留的名次數與重新載入間隔（秒）
+    LEADERBOARD_CAPACITY = int(os.getenv("LEADERBOARD_CAPACITY", 200))
+    LEADERBOARD_TTL = int(os.getenv("LEADERBOARD_TTL", 60))
+
+    # 群組名稱搜尋：記憶體中前綴索引的重新載入間隔（秒），0 表示改用資料庫的前綴索引
+    GROUP_SEARCH_INDEX_TTL = int(os.getenv("GROUP_SEARCH_INDEX_TTL", 300))
+
+    # 群組詳細資料快取：存活秒數與最多快取的群組數
+    GROUP_DETAIL_CACHE_TTL = int(os.getenv("GROUP_DETAIL_CACHE_TTL", 30))
+    GROUP_DETAIL_CACHE_SIZE = int(os.getenv("GROUP_DETAIL_CACHE_SIZE", 512))
+
+    # 群組貼文的增量同步：watermark 停在此秒數之前，涵蓋寫入開始到 commit 的時間
+    SYNC_SETTLE_SECONDS = float(os.getenv("SYNC_SETTLE_SECONDS", 5))
+
+    # 分數廣播：同一群組在此秒數內的多次更新合併為一則訊息
+    SCORE_BROADCAST_INTERVAL = float(os.getenv("SCORE_BROADCAST_INTERVAL", 1.0))
+
+    # 打卡後的分數重算：預設在背景 worker 執行，設為 false 則在請求中同步計算
+    SCORE_PIPELINE_ASYNC = os.getenv("SCORE_PIPELINE_ASYNC", "true").lower() == "true"
+    SCORE_PIPELINE_WORKERS = int(os.getenv("SCORE_PIPELINE_WORKERS", 2))
+
+    # 分數歷史的保留天數，超過後由 flask prune-score-history 刪除（0 表示永久保留）
+    SCORE_EVENT_RETENTION_DAYS = int(os.getenv("SCORE_EVENT_RETENTION_DAYS", 7))
+    SCORE_MINUTE_RETENTION_DAYS = int(os.getenv("SCORE_MINUTE_RETENTION_DAYS", 2))
+    SCORE_HOUR_RETENTION_DAYS = int(os.getenv("SCORE_HOUR_RETENTION_DAYS", 90))
+    SCORE_DAY_RETENTION_DAYS = int(os.getenv("SCORE_DAY_RETENTION_DAYS", 0))
+
+    # 貼文依月份分區：flask ensure-post-partitions 預先建立之後幾個月的分區；
+    # flask archive-posts 將超過 POST_ARCHIVE_AFTER_MONTHS 個月、所屬群組
+    # POST_ARCHIVE_INACTIVE_DAYS 天內沒有打卡的貼文壓縮存到 POST_ARCHIVE_DIR
+    POST_PARTITION_MONTHS_AHEAD = int(os.getenv("POST_PARTITION_MONTHS_AHEAD", 3))
+    # 貼文列表與成員最後打卡時間先讀取最近幾個月（含本月）的分區，不足時才讀取更早的分區
+    POST_RECENT_MONTHS = int(os.getenv("POST_RECENT_MONTHS", 2))
+    POST_ARCHIVE_DIR = os.getenv("POST_ARCHIVE_DIR", "archive/posts")
+    POST_ARCHIVE_AFTER_MONTHS = int(os.getenv("POST_ARCHIVE_AFTER_MONTHS", 6))
+    POST_ARCHIVE_INACTIVE_DAYS = int(os.getenv("POST_ARCHIVE_INACTIVE_DAYS", 90))
+
+    # 批次加入與批次打卡每次請求的上限筆數
+    BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 500))
+
+    # /api/batch 每次請求最多合併的子請求數
+    BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", 50))
+
+    # 打卡頻率限制：設為 redis://redis:6379/1 時所有 worker 共用限制表，
+    # 查無紀錄即可打卡；未設定時記錄在 worker 記憶體中，查無紀錄時改查資料庫。
+    # 單一 worker、單一實例的部署可將 AUTHORITATIVE 設為 true 省去查詢
+    CHECKIN_LIMITER_URL = os.getenv("CHECKIN_LIMITER_URL")
+    CHECKIN_LIMITER_MAX_ENTRIES = int(os.getenv("CHECKIN_LIMITER_MAX_ENTRIES", 100000))
+    CHECKIN_LIMITER_AUTHORITATIVE = (
+        os.getenv("CHECKIN_LIMITER_AUTHORITATIVE").lower() == "true"
+        if os.getenv("CHECKIN_LIMITER_AUTHORITATIVE")
+        else None
+    )
+
+    # GET 的 ETag 版本號：設為 redis://redis:6379/2 時所有 worker 與實例共用。
+    # 未設定時記錄在 worker 記憶體中，其他實例的寫入不會遞增，因此只有在
+    # SINGLE_INSTANCE 為 true（確認只有一個實例）時才回應 ETag 與 304；
+    # 多個 worker 而未設定 URL 時啟動時拋出錯誤
+    VERSION_COUNTER_URL = os.getenv("VERSION_COUNTER_URL")
+    VERSION_COUNTER_SINGLE_INSTANCE = (
+        os.getenv("VERSION_COUNTER_SINGLE_INSTANCE", "false").lower() == "true"
+    )
+    # gunicorn 的 worker 數（gunicorn.conf.py 讀取同一個環境變數）
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+
+    # Firebase ID token 驗證：啟用後每個請求需帶 Authorization: Bearer <token>，
+    # 已驗證的 token 在記憶體中保留到過期為止
+    AUTH_ENABLED = os.getenv("AUTH_ENABLED", "false").lower() == "true"
+    FIREBASE_PROJECT_ID = os.getenv(
+        "FIREBASE_PROJECT_ID", os.getenv("GOOGLE_CLOUD_PROJECT")
+    )
+    AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", 10000))
+
+    # 密碼雜湊：werkzeug 的 method（含成本，例如 pbkdf2:sha256:600000、
+    # scrypt:32768:8:1），變更後舊密碼會在下次登入時重新雜湊；
+    # 同時計算的數量與等待佇列上限，超過時回應 503
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:600000")
+    PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", 4))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 64))
+
+    # API 回應：列表筆數達此值時分段送出；大於 COMPRESS_MIN_SIZE 位元組時
+    # 依 Accept-Encoding 壓縮（brotli 需另外安裝 brotli 套件）
+    JSON_STREAM_MIN_ITEMS = int(os.getenv("JSON_STREAM_MIN_ITEMS", 500))
+    JSON_STREAM_CHUNK_ITEMS = int(os.getenv("JSON_STREAM_CHUNK_ITEMS", 200))
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+    BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))
+
+    # 請求日誌：依比例抽樣記錄（INFO），慢請求或 SQL 數過多時一律記錄（WARNING）
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 0.01))
+    LOG_SLOW_REQUEST_SECONDS = float(os.getenv("LOG_SLOW_REQUEST_SECONDS", 1.0))
+    LOG_MAX_QUERIES = int(os.getenv("LOG_MAX_QUERIES", 20))
+
+    # 跨 worker / 跨機器的 Socket.IO 訊息佇列，例如 redis://redis:6379/0；
+    # local:// 為行程內的測試用替身。未設定時只在單一 worker 內廣播。
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+    SOCKETIO_CHANNEL = os.getenv("SOCKETIO_CHANNEL", "flask-socketio")
+    # 多個 worker 共用同一個連接埠且沒有 sticky session 時，設為 websocket
+    # 讓每個連線固定在同一個 worker 上
+    SOCKETIO_TRANSPORTS = [
+        transport
+        for transport in os.getenv("SOCKETIO_TRANSPORTS", "").split(",")
+        if transport
+    ] or None
@@ -0,0 +1,11 @@
+import os
+
+# 多個 worker 時需設定 SOCKETIO_MESSAGE_QUEUE；若負載平衡器沒有 sticky session，
+# 另需設定 SOCKETIO_TRANSPORTS=websocket。
+worker_class = "eventlet"
+workers = int(os.getenv("WEB_CONCURRENCY", 1))
+bind = f"0.0.0.0:{os.getenv('PORT', 8080)}"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 2))
+loglevel = os.getenv("LOG_LEVEL", "info")
+accesslog = "-"
+errorlog = "-"
@@ -0,0 +1,64 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 20:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("user_id", sa.String(length=50), nullable=False),
+        sa.Column("name", sa.String(length=50), nullable=False),
+        sa.Column("account", sa.String(length=100), nullable=False),
+        sa.Column("password", sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+        sa.UniqueConstraint("account"),
+    )
+    op.create_table(
+        "groups",
+        sa.Column("group_id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("group_name", sa.String(length=50), nullable=False),
+        sa.Column("group_score", sa.Integer(), nullable=False),
+        sa.Column("created_time", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("group_id"),
+        sa.UniqueConstraint("group_name"),
+    )
+    op.create_table(
+        "user_groups",
+        sa.Column("user_id", sa.String(length=50), nullable=False),
+        sa.Column("group_id", sa.Integer(), nullable=False),
+        sa.Column("joined_time", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["group_id"], ["groups.group_id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "group_id"),
+    )
+    op.create_table(
+        "posts",
+        sa.Column("post_id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.String(length=50), nullable=False),
+        sa.Column("group_id", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_time", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["group_id"], ["groups.group_id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("post_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("posts")
+    op.drop_table("user_groups")
+    op.drop_table("groups")
+    op.drop_table("users")
@@ -0,0 +1,48 @@
+"""indexes for hot query shapes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 20:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_groups_group_score",
+        "groups",
+        [sa.text("group_score DESC"), "group_id"],
+    )
+    op.create_index("ix_groups_created_time", "groups", ["created_time", "group_id"])
+    op.create_index(
+        "ix_user_groups_group_id_joined_time",
+        "user_groups",
+        ["group_id", "joined_time"],
+    )
+    op.create_index(
+        "ix_posts_group_id_created_time",
+        "posts",
+        ["group_id", "created_time", "post_id"],
+    )
+    op.create_index(
+        "ix_posts_user_id_group_id_created_time",
+        "posts",
+        ["user_id", "group_id", "created_time"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_posts_user_id_group_id_created_time", table_name="posts")
+    op.drop_index("ix_posts_group_id_created_time", table_name="posts")
+    op.drop_index("ix_user_groups_group_id_joined_time", table_name="user_groups")
+    op.drop_index("ix_groups_created_time", table_name="groups")
+    op.drop_index("ix_groups_group_score", table_name="groups")
@@ -0,0 +1,51 @@
+"""denormalized group member counts
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "groups",
+        sa.Column("member_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.execute(
+        """
+        UPDATE groups
+        SET member_count = counts.member_count
+        FROM (
+            SELECT group_id, count(*) AS member_count
+            FROM user_groups
+            GROUP BY group_id
+        ) AS counts
+        WHERE groups.group_id = counts.group_id
+        """
+    )
+    op.create_index("ix_groups_member_count", "groups", ["member_count", "group_id"])
+
+    # 目錄的 keyset 分頁以 (group_score, group_id) 同方向比較
+    op.drop_index("ix_groups_group_score", table_name="groups")
+    op.create_index("ix_groups_group_score", "groups", ["group_score", "group_id"])
+
+
+def downgrade():
+    op.drop_index("ix_groups_group_score", table_name="groups")
+    op.create_index(
+        "ix_groups_group_score",
+        "groups",
+        [sa.text("group_score DESC"), "group_id"],
+    )
+    op.drop_index("ix_groups_member_count", table_name="groups")
+    op.drop_column("groups", "member_count")
@@ -0,0 +1,37 @@
+"""widen users.password for hashed passwords
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # scrypt 的雜湊約 160 字元，超過原本的 100
+    op.alter_column(
+        "users",
+        "password",
+        existing_type=sa.String(length=100),
+        type_=sa.String(length=255),
+        existing_nullable=False,
+    )
+
+
+def downgrade():
+    op.alter_column(
+        "users",
+        "password",
+        existing_type=sa.String(length=255),
+        type_=sa.String(length=100),
+        existing_nullable=False,
+    )
@@ -0,0 +1,53 @@
+"""score history events and rollups
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "score_events",
+        sa.Column("event_id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("group_id", sa.Integer(), nullable=False),
+        sa.Column("previous_score", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Integer(), nullable=False),
+        sa.Column("created_time", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["group_id"], ["groups.group_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("event_id"),
+    )
+    op.create_index(
+        "ix_score_events_group_id_created_time",
+        "score_events",
+        ["group_id", "created_time"],
+    )
+    op.create_table(
+        "score_rollups",
+        sa.Column("group_id", sa.Integer(), nullable=False),
+        sa.Column("resolution", sa.String(length=8), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("open_score", sa.Integer(), nullable=False),
+        sa.Column("close_score", sa.Integer(), nullable=False),
+        sa.Column("min_score", sa.Integer(), nullable=False),
+        sa.Column("max_score", sa.Integer(), nullable=False),
+        sa.Column("changes", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["group_id"], ["groups.group_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("group_id", "resolution", "bucket_start"),
+    )
+
+
+def downgrade():
+    op.drop_table("score_rollups")
+    op.drop_index("ix_score_events_group_id_created_time", table_name="score_events")
+    op.drop_table("score_events")
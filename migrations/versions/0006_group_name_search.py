@@ -0,0 +1,43 @@
+"""group name search indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_groups_group_name_prefix",
+        "groups",
+        [sa.text("lower(group_name) text_pattern_ops")],
+    )
+
+    # 模糊比對需要 pg_trgm；無法安裝時搜尋只使用前綴比對
+    conn = op.get_bind()
+    available = conn.execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).scalar()
+    if available:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            "ix_groups_group_name_trgm",
+            "groups",
+            [sa.text("lower(group_name) gin_trgm_ops")],
+            postgresql_using="gin",
+        )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_groups_group_name_trgm")
+    op.drop_index("ix_groups_group_name_prefix", table_name="groups")
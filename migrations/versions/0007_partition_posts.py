@@ -0,0 +1,135 @@
+"""partition posts by month
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-21 10:00:00.000000
+
+"""
+
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# 與 POST_PARTITION_MONTHS_AHEAD 的預設值相同，之後由 flask ensure-post-partitions 補上
+MONTHS_AHEAD = 3
+COLUMNS = "post_id, user_id, group_id, content, created_time"
+
+
+def _add_months(month, months):
+    years, index = divmod(month.month - 1 + months, 12)
+    return month.replace(year=month.year + years, month=index + 1)
+
+
+def _month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _columns(post_id_default=None):
+    return [
+        sa.Column(
+            "post_id",
+            sa.Integer(),
+            server_default=post_id_default,
+            nullable=False,
+        ),
+        sa.Column("user_id", sa.String(length=50), nullable=False),
+        sa.Column("group_id", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_time", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["group_id"], ["groups.group_id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"], ondelete="CASCADE"),
+    ]
+
+
+def _create_indexes():
+    op.create_index(
+        "ix_posts_group_id_created_time",
+        "posts",
+        ["group_id", "created_time", "post_id"],
+    )
+    op.create_index(
+        "ix_posts_user_id_group_id_created_time",
+        "posts",
+        ["user_id", "group_id", "created_time"],
+    )
+
+
+def _drop_indexes(table_name):
+    op.drop_index("ix_posts_group_id_created_time", table_name=table_name)
+    op.drop_index("ix_posts_user_id_group_id_created_time", table_name=table_name)
+
+
+def upgrade():
+    conn = op.get_bind()
+    sequence = conn.execute(
+        sa.text("SELECT pg_get_serial_sequence('posts', 'post_id')")
+    ).scalar()
+
+    op.rename_table("posts", "posts_unpartitioned")
+    op.execute(
+        "ALTER TABLE posts_unpartitioned "
+        "RENAME CONSTRAINT posts_pkey TO posts_unpartitioned_pkey"
+    )
+    _drop_indexes("posts_unpartitioned")
+
+    op.create_table(
+        "posts",
+        *_columns(sa.text(f"nextval('{sequence}'::regclass)")),
+        sa.PrimaryKeyConstraint("post_id", "created_time"),
+        postgresql_partition_by="RANGE (created_time)",
+    )
+    # 序列改由新表擁有，刪除舊表時才不會一併刪除
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY posts.post_id")
+
+    first = conn.execute(
+        sa.text("SELECT min(created_time) FROM posts_unpartitioned")
+    ).scalar()
+    current = _month_start(datetime.now())
+    month = _month_start(first) if first and first < current else current
+    while month <= _add_months(current, MONTHS_AHEAD):
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE posts_{month:%Y%m} PARTITION OF posts "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        )
+        month = end
+    op.execute("CREATE TABLE posts_default PARTITION OF posts DEFAULT")
+
+    op.execute(
+        f"INSERT INTO posts ({COLUMNS}) SELECT {COLUMNS} FROM posts_unpartitioned"
+    )
+    _create_indexes()
+    op.drop_table("posts_unpartitioned")
+    op.execute("ANALYZE posts")
+
+
+def downgrade():
+    conn = op.get_bind()
+    sequence = conn.execute(
+        sa.text("SELECT pg_get_serial_sequence('posts', 'post_id')")
+    ).scalar()
+
+    op.rename_table("posts", "posts_partitioned")
+    op.execute(
+        "ALTER TABLE posts_partitioned "
+        "RENAME CONSTRAINT posts_pkey TO posts_partitioned_pkey"
+    )
+    _drop_indexes("posts_partitioned")
+
+    op.create_table(
+        "posts",
+        *_columns(sa.text(f"nextval('{sequence}'::regclass)")),
+        sa.PrimaryKeyConstraint("post_id"),
+    )
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY posts.post_id")
+    op.execute(f"INSERT INTO posts ({COLUMNS}) SELECT {COLUMNS} FROM posts_partitioned")
+    _create_indexes()
+    # 刪除分區表時一併刪除所有分區
+    op.drop_table("posts_partitioned")
+    op.execute("ANALYZE posts")
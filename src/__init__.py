@@ -1,67 +1,90 @@
-import os
 import logging
-from flask import Flask, request, jsonify, g
+from flask import Flask
 from flask_cors import CORS
 from flask_restful import Api
 from flask_socketio import SocketIO
-import firebase_admin
-from firebase_admin import credentials, auth
 from config import Config
-from .extensions import db
+from .extensions import db, migrate
+from .database import configure_database, instrument_engines
+from .representation import output_json
+from .instrumentation import request_instrumentation, metrics_view
+from .scoring import score_engine
+from .ranking import leaderboard
+from .search import group_search
+from .group_detail import group_details
+from .realtime import score_broadcaster
+from .pubsub import socketio_options
+from .pipeline import score_pipeline
+from .ratelimit import checkin_limiter
+from .versions import versions
+from .auth import token_verifier
+from .passwords import passwords
+from .cli import register_commands
 from src.resources.user import UserResource, LoginResource
 from src.resources.post import PostResource, PostListResource
-from src.resources.group import GroupResource, GroupListResource
+from src.resources.group import GroupResource, GroupListResource, GroupSearchResource
 from src.resources.userGroup import UserGroupResource
 from src.resources.leaderboard import LeaderboardResource
+from src.resources.bulk import BulkMembershipResource, BulkPostResource
+from src.resources.trend import ScoreTrendResource
+from src.resources.batch import BatchResource
 
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
-    app.logger.setLevel(logging.DEBUG)
-
     gunicorn_error_logger = logging.getLogger("gunicorn.error")
     app.logger.handlers = gunicorn_error_logger.handlers
     app.logger.setLevel(gunicorn_error_logger.level)
 
-    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    CORS(
+        app,
+        resources={r"/api/*": {"origins": "*"}},
+        expose_headers=["X-Next-Cursor", "ETag"],
+    )
 
+    configure_database(app)
     db.init_app(app)
+    instrument_engines(app)
+    migrate.init_app(app, db)
+    score_engine.init_app(app)
+    leaderboard.init_app(app)
+    group_search.init_app(app)
+    group_details.init_app(app)
+    checkin_limiter.init_app(app)
+    versions.init_app(app)
+    passwords.init_app(app)
     socketio = SocketIO(
         app,
         cors_allowed_origins="*",
         async_mode="eventlet",
+        **socketio_options(app.config),
     )
-    socketio.init_app(app)
+    score_broadcaster.init_app(app, socketio)
+    score_pipeline.init_app(app, socketio)
+
+    request_instrumentation.init_app(app)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
 
-    # firebase_admin.initialize_app()
+    token_verifier.init_app(app)
+
+    register_commands(app)
 
     api = Api(app)
+    api.representation("application/json")(output_json)
     api.add_resource(LoginResource, "/api/login")
     api.add_resource(UserResource, "/api/user", "/api/user/<string:user_id>")
     api.add_resource(PostResource, "/api/post/<int:group_id>/<string:user_id>")
     api.add_resource(PostListResource, "/api/posts/<int:group_id>/<string:user_id>")
     api.add_resource(GroupResource, "/api/group/<int:group_id>/<string:user_id>")
     api.add_resource(GroupListResource, "/api/groups/<string:user_id>")
+    api.add_resource(GroupSearchResource, "/api/groups/<string:user_id>/search")
     api.add_resource(UserGroupResource, "/api/usergroup")
     api.add_resource(LeaderboardResource, "/api/leaderboard")
-
-    # @app.before_request
-    # def authenticate_user():
-    #     try:
-    #         if request.method != "OPTIONS":
-    #             auth_header = request.headers.get("Authorization")
-
-    #             if not auth_header:
-    #                 return jsonify({"error": "Unauthorized"}), 401
-    #             else:
-    #                 bearer_token = auth_header.split(" ")[1]
-    #                 decoded_token = auth.verify_id_token(bearer_token)
-
-    #                 g.user_id = decoded_token["uid"]
-    #                 g.user_name = decoded_token["name"]
-    #     except Exception as e:
-    #         return jsonify({"error": str(e)}), 401
+    api.add_resource(BulkMembershipResource, "/api/usergroups/bulk")
+    api.add_resource(BulkPostResource, "/api/posts/bulk")
+    api.add_resource(ScoreTrendResource, "/api/group/<int:group_id>/trend")
+    api.add_resource(BatchResource, "/api/batch")
 
     return app, socketio
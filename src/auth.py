@@ -0,0 +1,174 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from threading import Lock
+import jwt
+import requests
+from cryptography import x509
+from flask import request, jsonify, g
+from .metrics import registry
+
+FIREBASE_CERTS_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/"
+    "securetoken@system.gserviceaccount.com"
+)
+MAX_AGE = re.compile(r"max-age=(\d+)")
+MIN_REFRESH = 60  # 重新下載金鑰的最短間隔（秒），max-age 為 0 或遇到未知 kid 時亦同
+
+token_lookups = registry.counter(
+    "auth_token_cache_total", "Verified-token cache lookups by result", ["result"]
+)
+key_fetches = registry.counter(
+    "auth_key_fetches_total", "Downloads of the Google public signing keys"
+)
+
+
+class AuthError(Exception):
+    pass
+
+
+def fetch_google_certs():
+    """
+    下載 Firebase ID token 的公開憑證，回傳 ({kid: PEM}, 可快取秒數)。
+    """
+    response = requests.get(FIREBASE_CERTS_URL, timeout=5)
+    response.raise_for_status()
+    match = MAX_AGE.search(response.headers.get("Cache-Control", ""))
+    return response.json(), int(match.group(1)) if match else 0
+
+
+class SigningKeys:
+    """
+    Google 公開金鑰的快取，依回應的 Cache-Control max-age 決定何時重新下載，
+    但兩次下載至少間隔 min_refresh 秒，偽造的 kid 無法讓每個請求都觸發下載。
+    fetch 可替換成回傳本機產生之憑證的函式，以便離線測試。
+    """
+
+    def __init__(self, fetch=fetch_google_certs, min_refresh=MIN_REFRESH):
+        self.fetch = fetch
+        self.min_refresh = min_refresh
+        self._keys = {}
+        self._expires_at = 0
+        self._fetched_at = None
+        self._lock = Lock()
+
+    def get(self, kid):
+        with self._lock:
+            if time.monotonic() >= self._expires_at:
+                self._refresh()
+            key = self._keys.get(kid)
+            if key is None and time.monotonic() - self._fetched_at >= self.min_refresh:
+                # 金鑰可能在快取期間輪替，未知的 kid 再下載一次（限制頻率）
+                self._refresh()
+                key = self._keys.get(kid)
+            return key
+
+    def invalidate(self):
+        with self._lock:
+            self._expires_at = 0
+
+    def _refresh(self):
+        certs, max_age = self.fetch()
+        key_fetches.inc()
+        self._keys = {
+            kid: x509.load_pem_x509_certificate(pem.encode()).public_key()
+            for kid, pem in certs.items()
+        }
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + max(max_age, self.min_refresh)
+
+
+class TokenVerifier:
+    """
+    Firebase ID token 驗證：已驗證的 token 以 LRU 保留到 exp 為止，
+    重複的請求不必再驗證簽章。
+    """
+
+    def __init__(self, app=None, keys=None):
+        self.enabled = False
+        self.project_id = None
+        self.max_tokens = 10000
+        self.exempt_endpoints = {"metrics"}  # 不需驗證的 endpoint
+        self.keys = keys or SigningKeys()
+        self._tokens = OrderedDict()  # sha256(token) -> claims
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("AUTH_ENABLED", self.enabled)
+        self.project_id = app.config.get("FIREBASE_PROJECT_ID", self.project_id)
+        self.max_tokens = app.config.get("AUTH_TOKEN_CACHE_SIZE", self.max_tokens)
+        if self.enabled:
+            app.before_request(self.authenticate_user)
+
+    def authenticate_user(self):
+        if request.method == "OPTIONS" or request.endpoint in self.exempt_endpoints:
+            return None
+
+        auth_header = request.headers.get("Authorization")
+        if not auth_header:
+            return jsonify({"error": "Unauthorized"}), 401
+        try:
+            claims = self.verify(auth_header.split(" ")[1])
+        except (AuthError, IndexError) as e:
+            return jsonify({"error": str(e) or "Unauthorized"}), 401
+
+        g.user_id = claims["uid"]
+        g.user_name = claims.get("name")
+        return None
+
+    def verify(self, token):
+        """
+        驗證 ID token 並回傳 claims（含 uid），無效時拋出 AuthError。
+        """
+        digest = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+        with self._lock:
+            claims = self._tokens.get(digest)
+            if claims is not None:
+                if claims["exp"] > now:
+                    self._tokens.move_to_end(digest)
+                    token_lookups.inc(result="hit")
+                    return claims
+                del self._tokens[digest]
+        token_lookups.inc(result="miss")
+
+        claims = self._decode(token)
+        with self._lock:
+            self._tokens[digest] = claims
+            while len(self._tokens) > self.max_tokens:
+                self._tokens.popitem(last=False)
+        return claims
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+    def _decode(self, token):
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = self.keys.get(kid)
+            if key is None:
+                raise AuthError("Unknown signing key.")
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=["RS256"],
+                audience=self.project_id,
+                issuer=f"https://securetoken.google.com/{self.project_id}",
+                options={"require": ["exp", "iat", "sub"]},
+            )
+        except jwt.PyJWTError as e:
+            raise AuthError(str(e)) from e
+        except requests.RequestException as e:
+            raise AuthError("Unable to fetch signing keys.") from e
+
+        if not claims["sub"]:
+            raise AuthError("Token has an empty subject.")
+        claims["uid"] = claims["sub"]
+        return claims
+
+
+token_verifier = TokenVerifier()
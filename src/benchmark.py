@@ -0,0 +1,384 @@
+import random
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import eventlet
+import requests
+from sqlalchemy import select, delete
+from .extensions import db
+from .models import User, Group, UserGroup
+from .pagination import encode_cursor
+from .passwords import passwords
+from .realtime import score_broadcaster
+from .seed import USER_PREFIX, GROUP_PREFIX
+
+TICK = 0.005
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def benchmark_login(concurrency=20, logins=200, offload=True):
+    """
+    以 concurrency 個 green thread 執行 logins 次登入的密碼驗證，
+    同時以另一個 green thread 量測 hub 被阻塞的時間。
+    """
+    stored = passwords.hash("password")
+    previous, passwords.offload = passwords.offload, offload
+    lags = []
+    running = True
+
+    def ticker():
+        while running:
+            start = time.perf_counter()
+            eventlet.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    def login(_):
+        start = time.perf_counter()
+        passwords.verify(stored, "password")
+        return time.perf_counter() - start
+
+    monitor = eventlet.spawn(ticker)
+    start = time.perf_counter()
+    try:
+        latencies = list(eventlet.GreenPool(concurrency).imap(login, range(logins)))
+    finally:
+        elapsed = time.perf_counter() - start
+        running = False
+        monitor.wait()
+        passwords.offload = previous
+
+    return {
+        "logins_per_second": logins / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "max_hub_stall": max(lags, default=0.0),
+    }
+
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+BULK_SIZE = 20
+
+
+class Fixture:
+    """
+    從 seed 資料取出基準測試用的使用者、群組與成員關係。
+    check-in 與 join 各自使用不重複的 pair，避免撞到 5 分鐘限制或重複加入。
+    """
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self.users = db.session.scalars(
+            select(User.user_id)
+            .where(User.user_id.like(f"{USER_PREFIX}%"))
+            .order_by(User.user_id)
+        ).all()
+        self.group_ids = db.session.scalars(
+            select(Group.group_id)
+            .where(Group.group_name.like(f"{GROUP_PREFIX}%"))
+            .order_by(Group.group_id)
+        ).all()
+        if not self.users or not self.group_ids:
+            raise RuntimeError("No seed data found; run with --seed or flask seed.")
+
+        self.memberships = db.session.execute(
+            select(UserGroup.user_id, UserGroup.group_id)
+            .where(UserGroup.user_id.like(f"{USER_PREFIX}%"))
+            .order_by(UserGroup.user_id, UserGroup.group_id)
+        ).all()
+        joined = set(map(tuple, self.memberships))
+        rng = random.Random(0)
+        self.non_members = []
+        for user_id in self.users:
+            for group_id in rng.sample(self.group_ids, min(5, len(self.group_ids))):
+                if (user_id, group_id) not in joined:
+                    self.non_members.append((user_id, group_id))
+                    break
+        db.session.rollback()
+
+    def user(self, i):
+        return self.users[i % len(self.users)]
+
+    def group(self, i):
+        return self.group_ids[i % len(self.group_ids)]
+
+    def membership(self, i):
+        return self.memberships[i % len(self.memberships)]
+
+    def non_member(self, i):
+        return self.non_members[i % len(self.non_members)]
+
+
+def scenarios(fixture, count):
+    """
+    create_app 註冊的每個 API 的請求產生器：名稱 -> f(i) = (method, url, body)。
+    寫入類的場景使用不同區段的資料，同一次執行中不會互相干擾。
+    """
+    f = fixture
+    bulk_offset = count  # check-in 使用 [0, count)，批次打卡接在後面
+    sorts = ("created", "score", "size")
+    # 輪詢的客戶端：上次同步在一小時前
+    since = encode_cursor(datetime.now() - timedelta(hours=1), 0)
+
+    def bulk_posts(i):
+        start = bulk_offset + i * BULK_SIZE
+        return [
+            {"user_id": user_id, "group_id": group_id, "content": "bench"}
+            for user_id, group_id in map(f.membership, range(start, start + BULK_SIZE))
+        ]
+
+    def bulk_memberships(i):
+        start = count + i * BULK_SIZE
+        return [
+            {"user_id": user_id, "group_id": group_id}
+            for user_id, group_id in map(f.non_member, range(start, start + BULK_SIZE))
+        ]
+
+    def app_open(i):
+        # 開啟 app 時的群組列表、五個群組的貼文與排行榜，合併為一次請求
+        user_id = f.user(i)
+        paths = [f"/api/groups/{user_id}"]
+        paths += [f"/api/posts/{f.group(i + n)}/{user_id}?limit=20" for n in range(5)]
+        paths.append("/api/leaderboard?limit=20")
+        return [{"path": path} for path in paths]
+
+    return {
+        "login": lambda i: (
+            "POST",
+            "/api/login",
+            {"account": f"{f.user(i)}@example.com", "password": "password"},
+        ),
+        "register": lambda i: (
+            "POST",
+            "/api/user",
+            {
+                "account": f"bench-{f.run_id}-{i}@example.com",
+                "name": f"bench {i}",
+                "password": "password",
+            },
+        ),
+        "user": lambda i: ("GET", f"/api/user/{f.user(i)}", None),
+        "leaderboard": lambda i: (
+            "GET",
+            f"/api/leaderboard?limit=20&offset={i % 5 * 20}",
+            None,
+        ),
+        "leaderboard deep page": lambda i: (
+            "GET",
+            f"/api/leaderboard?limit=100&offset={1000 + i % 10 * 100}",
+            None,
+        ),
+        "group directory": lambda i: (
+            "GET",
+            f"/api/groups/{f.user(i)}?sort={sorts[i % 3]}",
+            None,
+        ),
+        "group search": lambda i: (
+            "GET",
+            f"/api/groups/{f.user(i)}/search?q={GROUP_PREFIX}{i % 50}",
+            None,
+        ),
+        "group detail": lambda i: ("GET", f"/api/group/{f.group(i)}/{f.user(i)}", None),
+        "group posts": lambda i: (
+            "GET",
+            f"/api/posts/{f.group(i)}/{f.user(i)}?limit=20",
+            None,
+        ),
+        "group posts delta": lambda i: (
+            "GET",
+            f"/api/posts/{f.group(i)}/{f.user(i)}?since={since}",
+            None,
+        ),
+        "score trend": lambda i: ("GET", f"/api/group/{f.group(i)}/trend", None),
+        "app open batch": lambda i: (
+            "POST",
+            "/api/batch",
+            {"requests": app_open(i)},
+        ),
+        "check-in": lambda i: (
+            "POST",
+            "/api/post/{1}/{0}".format(*f.membership(i)),
+            {"content": "bench"},
+        ),
+        "create group": lambda i: (
+            "POST",
+            f"/api/group/0/{f.user(i)}",
+            {"group_name": f"bench-{f.run_id}-{i}"},
+        ),
+        "join group": lambda i: (
+            "POST",
+            "/api/usergroup",
+            dict(zip(("user_id", "group_id"), f.non_member(i))),
+        ),
+        "leave group": lambda i: (
+            "DELETE",
+            "/api/usergroup",
+            dict(zip(("user_id", "group_id"), f.non_member(i))),
+        ),
+        "bulk check-in": lambda i: (
+            "POST",
+            "/api/posts/bulk",
+            {"posts": bulk_posts(i)},
+        ),
+        "bulk join": lambda i: (
+            "POST",
+            "/api/usergroups/bulk",
+            {"memberships": bulk_memberships(i)},
+        ),
+    }
+
+
+def local_sender(app):
+    """
+    以 test client 在同一個行程中送出請求，每個執行緒各自一個 client。
+    """
+    clients = threading.local()
+
+    def send(method, url, body):
+        client = getattr(clients, "client", None)
+        if client is None:
+            client = clients.client = app.test_client()
+        response = client.open(url, method=method, json=body)
+        return response.status_code, response.headers.get("Server-Timing", "")
+
+    return send
+
+
+def http_sender(base_url):
+    """
+    對執行中的伺服器送出請求（例如 gunicorn），每個執行緒各自一個連線。
+    """
+    sessions = threading.local()
+
+    def send(method, url, body):
+        session = getattr(sessions, "session", None)
+        if session is None:
+            session = sessions.session = requests.Session()
+        response = session.request(method, base_url.rstrip("/") + url, json=body)
+        return response.status_code, response.headers.get("Server-Timing", "")
+
+    return send
+
+
+def run_scenario(send, make_request, count, concurrency, warmup=10):
+    """
+    以 concurrency 個執行緒送出 count 個請求。GET 場景先送 warmup 個請求
+    讓快取與連線池就緒；寫入場景不暖機，以免用掉測試資料。
+    """
+    if make_request(0)[0] == "GET":
+        for i in range(warmup):
+            send(*make_request(i))
+
+    def call(i):
+        method, url, body = make_request(i)
+        start = time.perf_counter()
+        status, timing = send(method, url, body)
+        elapsed = time.perf_counter() - start
+        match = SERVER_TIMING_QUERIES.search(timing)
+        return elapsed, status, int(match.group(1)) if match else None
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(call, range(count)))
+
+    latencies = [elapsed for elapsed, _, _ in results]
+    queries = [count for _, _, count in results if count is not None]
+    statuses = Counter(str(status) for _, status, _ in results)
+    return {
+        "requests": count,
+        "errors": sum(1 for _, status, _ in results if status >= 500),
+        "statuses": dict(statuses),
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "queries_per_request": sum(queries) / len(queries) if queries else None,
+    }
+
+
+def run_fanout(app, socketio, fixture, subscribers=50, groups=20, rounds=20):
+    """
+    以 subscribers 個 Socket.IO test client 訂閱群組與排行榜，
+    量測每次送出 groups 個群組分數更新所需的時間與收到的訊息數。
+    """
+    clients = []
+    for i in range(subscribers):
+        client = socketio.test_client(app)
+        client.emit(
+            "subscribe", {"group_id": fixture.group(i), "leaderboard": i % 2 == 0}
+        )
+        clients.append(client)
+
+    durations = []
+    received = 0
+    try:
+        for round_ in range(rounds):
+            for i in range(groups):
+                score_broadcaster.publish(fixture.group(i), f"bench-{i}", round_)
+            start = time.perf_counter()
+            score_broadcaster.flush()
+            durations.append(time.perf_counter() - start)
+            received += sum(
+                1
+                for client in clients
+                for message in client.get_received()
+                if message["name"] == "score_update"
+            )
+    finally:
+        for client in clients:
+            client.disconnect()
+
+    return {
+        "requests": rounds,
+        "errors": 0,
+        "statuses": {},
+        "p50_ms": percentile(durations, 0.5) * 1000,
+        "p95_ms": percentile(durations, 0.95) * 1000,
+        "p99_ms": percentile(durations, 0.99) * 1000,
+        "queries_per_request": None,
+        "messages_per_flush": received / rounds,
+    }
+
+
+def cleanup(run_id):
+    """
+    刪除基準測試建立的帳號與群組（貼文與成員關係由 seed 重建時一併清除）。
+    """
+    db.session.execute(
+        delete(User).where(User.account.like(f"bench-{run_id}-%@example.com"))
+    )
+    db.session.execute(delete(Group).where(Group.group_name.like(f"bench-{run_id}-%")))
+    db.session.commit()
+
+
+def compare(results, baseline, tolerance=0.2, floor_ms=1.0):
+    """
+    與基準比較，回傳 [(場景, 說明)]：p95 變慢超過 tolerance（且超過 floor_ms）
+    或每個請求的 SQL 數增加即視為退步。
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        limit = base["p95_ms"] * (1 + tolerance)
+        if result["p95_ms"] > limit and result["p95_ms"] - base["p95_ms"] > floor_ms:
+            regressions.append(
+                (name, f"p95 {result['p95_ms']:.1f} ms > {base['p95_ms']:.1f} ms")
+            )
+        queries, base_queries = (
+            result["queries_per_request"],
+            base["queries_per_request"],
+        )
+        if queries is not None and base_queries is not None:
+            if queries > base_queries + 0.5:
+                regressions.append(
+                    (name, f"queries {queries:.1f} > {base_queries:.1f} per request")
+                )
+    return regressions
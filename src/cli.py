@@ -0,0 +1,399 @@
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from .benchmark import (
+    Fixture,
+    benchmark_login,
+    cleanup,
+    compare,
+    http_sender,
+    local_sender,
+    run_fanout,
+    run_scenario,
+    scenarios,
+)
+from .history import prune_score_history
+from .months import add_months, month_start
+from .partitions import (
+    DEFAULT_PARTITION,
+    archive_posts,
+    count_stranded_posts,
+    ensure_post_partitions,
+    partition_stranded_posts,
+    restore_posts,
+)
+from .pipeline import score_pipeline
+from .queryplan import (
+    RECENT_PARTITION_ENDPOINTS,
+    capture_endpoint_queries,
+    check_partition_pruning,
+    check_query_plans,
+)
+from .recompute import recompute_all, find_drift, apply_corrections
+from .passwords import passwords
+from .search import group_search
+from .seed import seed_database, clear_seed_data
+from .stress import StressRun
+from .versions import versions
+
+
+@click.command("seed")
+@click.option("--users", default=1000, show_default=True)
+@click.option("--groups", default=100, show_default=True)
+@click.option(
+    "--memberships", default=3, show_default=True, help="每位使用者加入的群組數"
+)
+@click.option("--posts", default=5, show_default=True, help="每個成員關係的貼文數")
+@click.option("--clear", is_flag=True, help="先刪除先前產生的測試資料")
+@with_appcontext
+def seed_command(users, groups, memberships, posts, clear):
+    """產生本機測試資料。"""
+    if clear:
+        clear_seed_data()
+    counts = seed_database(users, groups, memberships, posts)
+    versions.reset()
+    click.echo(", ".join(f"{name}: {count}" for name, count in counts.items()))
+
+
+@click.command("check-query-plans")
+@with_appcontext
+def check_query_plans_command():
+    """
+    呼叫各 API 並檢查其查詢是否有 Seq Scan，以及貼文列表等查詢是否只讀取最近幾個月的
+    分區（需先執行 flask seed）。
+    """
+    failed = False
+    for name, status_code, statements in capture_endpoint_queries():
+        failures = check_query_plans(statements)
+        unpruned = []
+        if name in RECENT_PARTITION_ENDPOINTS:
+            unpruned = check_partition_pruning(statements)
+        mark = "FAIL" if failures or unpruned else "ok"
+        click.echo(f"[{mark}] {name} ({status_code}, {len(statements)} queries)")
+        for statement, tables in failures:
+            failed = True
+            click.echo(
+                f"    Seq Scan on {', '.join(tables)}: {' '.join(statement.split())}"
+            )
+        for statement, partitions in unpruned:
+            failed = True
+            click.echo(
+                f"    Scanned {', '.join(partitions)}: {' '.join(statement.split())}"
+            )
+
+    stranded = count_stranded_posts()
+    if stranded:
+        failed = True
+        click.echo(
+            f"[FAIL] {DEFAULT_PARTITION} holds {stranded} posts; "
+            "run flask ensure-post-partitions"
+        )
+
+    if failed:
+        raise SystemExit(1)
+
+
+@click.command("bench-login")
+@click.option("--concurrency", default=20, show_default=True)
+@click.option("--logins", default=200, show_default=True)
+@with_appcontext
+def bench_login_command(concurrency, logins):
+    """比較密碼驗證在 hub 上執行與交給 tpool 時的登入吞吐量與 hub 阻塞時間。"""
+    click.echo(f"method: {passwords.method}, concurrency: {concurrency}")
+    for label, offload in (("inline", False), ("tpool", True)):
+        result = benchmark_login(concurrency, logins, offload)
+        click.echo(
+            f"{label:>6}: {result['logins_per_second']:.1f} logins/s, "
+            f"p50 {result['p50'] * 1000:.1f} ms, p99 {result['p99'] * 1000:.1f} ms, "
+            f"max hub stall {result['max_hub_stall'] * 1000:.1f} ms"
+        )
+
+
+@click.command("bench")
+@click.option(
+    "--seed/--no-seed", default=True, show_default=True, help="先重建 seed 資料"
+)
+@click.option("--users", default=1000, show_default=True)
+@click.option("--groups", default=100, show_default=True)
+@click.option("--memberships", default=3, show_default=True)
+@click.option("--posts", default=5, show_default=True)
+@click.option(
+    "--requests", "count", default=100, show_default=True, help="每個場景的請求數"
+)
+@click.option("--concurrency", default=10, show_default=True)
+@click.option("--warmup", default=10, show_default=True, help="GET 場景的暖機請求數")
+@click.option("--scenario", "selected", multiple=True, help="只執行指定場景（可重複）")
+@click.option("--url", help="對執行中的伺服器測試，例如 http://localhost:8080")
+@click.option(
+    "--subscribers", default=50, show_default=True, help="score_update 訂閱者數"
+)
+@click.option("--baseline", type=click.Path(), help="基準結果 JSON")
+@click.option("--save-baseline", is_flag=True, help="將本次結果寫入 --baseline")
+@click.option(
+    "--tolerance", default=0.2, show_default=True, help="p95 可容許的變慢比例"
+)
+@with_appcontext
+def bench_command(
+    seed,
+    users,
+    groups,
+    memberships,
+    posts,
+    count,
+    concurrency,
+    warmup,
+    selected,
+    url,
+    subscribers,
+    baseline,
+    save_baseline,
+    tolerance,
+):
+    """以固定併發量測各 API 與 score_update 推播的延遲與 SQL 數，並與基準比較。"""
+    if seed:
+        clear_seed_data()
+        seed_database(users, groups, memberships, posts)
+        versions.reset()
+        group_search.invalidate()
+
+    run_id = int(time.time())
+    fixture = Fixture(run_id)
+    # 基準測試會刻意送出大量請求，關閉逐筆的請求日誌
+    current_app.logger.setLevel(logging.ERROR)
+    if url:
+        send = http_sender(url)
+    else:
+        # 同一行程中沒有 eventlet hub 處理背景工作，分數改在請求中同步重算
+        score_pipeline.asynchronous = False
+        send = local_sender(current_app._get_current_object())
+
+    results = {}
+    for name, make_request in scenarios(fixture, count).items():
+        if selected and name not in selected:
+            continue
+        results[name] = run_scenario(send, make_request, count, concurrency, warmup)
+    if not url and (not selected or "score_update fan-out" in selected):
+        socketio = current_app.extensions["socketio"]
+        results["score_update fan-out"] = run_fanout(
+            current_app._get_current_object(), socketio, fixture, subscribers
+        )
+    cleanup(run_id)
+
+    click.echo(
+        f"{'scenario':<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'q/req':>6}  status"
+    )
+    for name, result in results.items():
+        queries = result["queries_per_request"]
+        click.echo(
+            f"{name:<22} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+            f"{result['p99_ms']:>8.1f} "
+            f"{'-' if queries is None else f'{queries:.1f}':>6}  "
+            + ", ".join(f"{code}x{n}" for code, n in sorted(result["statuses"].items()))
+        )
+
+    if baseline and save_baseline:
+        with open(baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        click.echo(f"Baseline written to {baseline}")
+    elif baseline:
+        with open(baseline) as f:
+            regressions = compare(results, json.load(f), tolerance)
+        for name, reason in regressions:
+            click.echo(f"[REGRESSION] {name}: {reason}")
+        if regressions:
+            raise SystemExit(1)
+        click.echo("No regressions against the baseline.")
+
+
+@click.command("prune-score-history")
+@with_appcontext
+def prune_score_history_command():
+    """依 SCORE_*_RETENTION_DAYS 刪除過期的分數事件與細粒度彙總。"""
+    config = current_app.config
+    retention = {}
+    for name, key in (
+        ("events", "SCORE_EVENT_RETENTION_DAYS"),
+        ("minute", "SCORE_MINUTE_RETENTION_DAYS"),
+        ("hour", "SCORE_HOUR_RETENTION_DAYS"),
+        ("day", "SCORE_DAY_RETENTION_DAYS"),
+    ):
+        days = config.get(key, 0)
+        retention[name] = timedelta(days=days) if days else None
+    deleted = prune_score_history(retention)
+    click.echo(", ".join(f"{name}: {count}" for name, count in deleted.items()))
+
+
+def require_shared_versions(servers_stopped):
+    """
+    寫入資料的指令需經由共用的版本號通知執行中的伺服器捨棄快取；
+    未設定 VERSION_COUNTER_URL 時，只在確認伺服器已停止（之後重新啟動）時執行。
+    """
+    if not versions.shared and not servers_stopped:
+        raise click.ClickException(
+            "VERSION_COUNTER_URL is not set, so running servers would keep their "
+            "caches. Set it, or stop the servers and pass --servers-stopped "
+            "(restart them afterwards)."
+        )
+
+
+@click.command("recompute-scores")
+@click.option("--dry-run", is_flag=True, help="只回報差異，不寫入")
+@click.option("--batch-size", default=1000, show_default=True)
+@click.option("--show", default=10, show_default=True, help="列出差異最大的群組數")
+@click.option(
+    "--servers-stopped",
+    is_flag=True,
+    help="未設定 VERSION_COUNTER_URL 時，確認伺服器已停止並會重新啟動",
+)
+@click.option(
+    "--lower",
+    is_flag=True,
+    help="高於公式的分數也改為計算值（修改計分公式後使用）；預設只提高分數",
+)
+@with_appcontext
+def recompute_scores_command(dry_run, batch_size, show, servers_stopped, lower):
+    """以集合查詢重新計算所有群組的分數，回報低於公式的 group_score 並修正。"""
+    if not dry_run:
+        require_shared_versions(servers_stopped)
+    started = time.perf_counter()
+    results = recompute_all()
+    drifted = find_drift(results, lower)
+    click.echo(
+        f"{len(results)} groups computed in {time.perf_counter() - started:.2f}s, "
+        f"{len(drifted)} drifted"
+    )
+    for group_id, stored, score in sorted(
+        drifted, key=lambda row: abs(row[2] - row[1]), reverse=True
+    )[:show]:
+        click.echo(f"  group {group_id}: {stored} -> {score} ({score - stored:+d})")
+
+    if dry_run:
+        if drifted:
+            raise SystemExit(1)
+        return
+    updated = apply_corrections(drifted, batch_size, lower)
+    skipped = len(drifted) - len(updated)
+    click.echo(
+        f"{len(updated)} groups corrected"
+        + (f", {skipped} skipped (changed during recompute)" if skipped else "")
+    )
+
+
+@click.command("stress-writes")
+@click.option("--users", default=50, show_default=True)
+@click.option("--concurrency", default=16, show_default=True)
+@with_appcontext
+def stress_writes_command(users, concurrency):
+    """同時建立、加入、退出群組與打卡，檢查沒有遺失的更新。"""
+    current_app.logger.setLevel(logging.ERROR)
+    # 同步重算分數，回應中的分數即為每次計算的結果
+    score_pipeline.asynchronous = False
+    run = StressRun(
+        current_app._get_current_object(), int(time.time()), users, concurrency
+    )
+    failed = False
+    for name, ok, detail in run.run():
+        failed = failed or not ok
+        click.echo(f"[{'ok' if ok else 'FAIL'}] {name}: {detail}")
+    if failed:
+        raise SystemExit(1)
+
+
+@click.command("ensure-post-partitions")
+@click.option("--months-ahead", type=int, help="預設為 POST_PARTITION_MONTHS_AHEAD")
+@with_appcontext
+def ensure_post_partitions_command(months_ahead):
+    """
+    建立本月到之後幾個月的貼文分區，並為 posts_default 中的貼文建立所屬月份的分區
+    （每月排程執行）。
+    """
+    if months_ahead is None:
+        months_ahead = current_app.config.get("POST_PARTITION_MONTHS_AHEAD", 3)
+    now = datetime.now()
+    created = ensure_post_partitions(now, add_months(month_start(now), months_ahead))
+    created += partition_stranded_posts()
+    click.echo(f"created: {', '.join(created)}" if created else "up to date")
+
+
+@click.command("archive-posts")
+@click.option("--after-months", type=int, help="預設為 POST_ARCHIVE_AFTER_MONTHS")
+@click.option("--inactive-days", type=int, help="預設為 POST_ARCHIVE_INACTIVE_DAYS")
+@click.option("--batch-size", default=100, show_default=True, help="每個交易的群組數")
+@click.option("--dry-run", is_flag=True, help="只計算筆數，不寫檔也不刪除")
+@click.option(
+    "--servers-stopped",
+    is_flag=True,
+    help="未設定 VERSION_COUNTER_URL 時，確認伺服器已停止並會重新啟動",
+)
+@with_appcontext
+def archive_posts_command(
+    after_months, inactive_days, batch_size, dry_run, servers_stopped
+):
+    """將舊月份分區中不活躍群組的貼文壓縮封存到 POST_ARCHIVE_DIR。"""
+    if not dry_run:
+        require_shared_versions(servers_stopped)
+    config = current_app.config
+    if after_months is None:
+        after_months = config.get("POST_ARCHIVE_AFTER_MONTHS", 6)
+    if inactive_days is None:
+        inactive_days = config.get("POST_ARCHIVE_INACTIVE_DAYS", 90)
+    now = datetime.now()
+    results = archive_posts(
+        config.get("POST_ARCHIVE_DIR", "archive/posts"),
+        add_months(month_start(now), -after_months),
+        now - timedelta(days=inactive_days),
+        batch_size,
+        dry_run,
+    )
+    for name, archived, dropped in results:
+        click.echo(
+            f"{name}: {archived} posts" + (", partition dropped" if dropped else "")
+        )
+    if not results:
+        click.echo("no partitions old enough to archive")
+
+
+@click.command("restore-posts")
+@click.argument("month")
+@click.option(
+    "--group-id", "group_ids", type=int, multiple=True, help="只還原指定群組（可重複）"
+)
+@click.option(
+    "--servers-stopped",
+    is_flag=True,
+    help="未設定 VERSION_COUNTER_URL 時，確認伺服器已停止並會重新啟動",
+)
+@with_appcontext
+def restore_posts_command(month, group_ids, servers_stopped):
+    """將 MONTH（例如 2026-01）的封存貼文寫回資料庫。"""
+    require_shared_versions(servers_stopped)
+    try:
+        month = datetime.strptime(month, "%Y-%m")
+    except ValueError:
+        raise click.BadParameter("expected YYYY-MM", param_hint="MONTH")
+    try:
+        restored = restore_posts(
+            current_app.config.get("POST_ARCHIVE_DIR", "archive/posts"),
+            month,
+            set(group_ids),
+        )
+    except FileNotFoundError as e:
+        raise click.ClickException(f"no archive found: {e.filename}")
+    click.echo(f"{restored} posts restored")
+
+
+def register_commands(app):
+    app.cli.add_command(seed_command)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(bench_login_command)
+    app.cli.add_command(bench_command)
+    app.cli.add_command(prune_score_history_command)
+    app.cli.add_command(recompute_scores_command)
+    app.cli.add_command(stress_writes_command)
+    app.cli.add_command(ensure_post_partitions_command)
+    app.cli.add_command(archive_posts_command)
+    app.cli.add_command(restore_posts_command)
@@ -0,0 +1,138 @@
+import os
+import time
+from eventlet.patcher import is_monkey_patched
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+from .extensions import db
+from .metrics import registry
+
+checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+checkout_timeouts = registry.counter(
+    "db_pool_checkout_timeouts_total", "Connection checkouts that hit pool_timeout"
+)
+pool_checked_out = registry.gauge(
+    "db_pool_checked_out", "Database connections currently checked out"
+)
+pool_utilization = registry.gauge(
+    "db_pool_utilization",
+    "Checked-out connections as a fraction of pool_size + max_overflow",
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    記錄取得連線等待時間與逾時次數的 QueuePool。
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            checkout_timeouts.inc()
+            raise
+        finally:
+            checkout_wait.observe(time.perf_counter() - start)
+
+
+def instrument_engines(app):
+    """
+    在 db.init_app 之後呼叫：以連線池的 checkout / checkin 事件記錄使用率。
+    監聽掛在 engine 上，engine.dispose() 重建連線池後仍然有效。
+    """
+    options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    capacity = options["pool_size"] + max(options["max_overflow"], 0)
+
+    def record_usage(engine, returning):
+        # checkin 事件在連線放回連線池之前觸發，仍計入 checkedout()
+        checked_out = engine.pool.checkedout() - returning
+        pool_checked_out.set(checked_out)
+        pool_utilization.set(checked_out / capacity if capacity else 0.0)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(
+                engine, "checkout", lambda *args, engine=engine: record_usage(engine, 0)
+            )
+            event.listen(
+                engine, "checkin", lambda *args, engine=engine: record_usage(engine, 1)
+            )
+
+
+def use_green_wait(config):
+    """
+    eventlet monkey patch 後使用 psycopg 時，改用 wait_select 等待查詢結果。
+    psycopg 只偵測 gevent，預設的 wait_c 會在 C 中阻塞整個 worker；
+    PSYCOPG_WAIT_FUNC 只在第一次匯入 psycopg 時讀取，需在建立 engine 之前呼叫。
+    """
+    if config.get("DB_DRIVER", "pg8000") != "psycopg" or not is_monkey_patched(
+        "select"
+    ):
+        return
+    os.environ.setdefault("PSYCOPG_WAIT_FUNC", "wait_select")
+    from psycopg import waiting
+
+    if waiting.wait is getattr(waiting, "wait_c", None):
+        raise RuntimeError(
+            "psycopg was imported before eventlet monkey patching and would block "
+            "the worker; set PSYCOPG_WAIT_FUNC=wait_select or use DB_DRIVER=pg8000."
+        )
+
+
+def configure_database(app):
+    """
+    在 db.init_app 之前呼叫：補上連線字串與連線池設定，
+    SQLALCHEMY_ENGINE_OPTIONS 中已指定的項目優先。
+    """
+    use_green_wait(app.config)
+    if not app.config.get("SQLALCHEMY_DATABASE_URI"):
+        app.config["SQLALCHEMY_DATABASE_URI"] = database_uri(app.config)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **engine_options(app.config),
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+    }
+
+
+def database_uri(config):
+    """
+    依 DB_DRIVER 產生連線字串：pg8000（純 Python）或 psycopg（psycopg 3，C 實作）。
+    兩者皆透過 Cloud SQL 的 unix socket 連線。
+    """
+    driver = config.get("DB_DRIVER", "pg8000")
+    credentials = f"{config['DB_USER']}:{config['DB_PASS']}@/{config['DB_NAME']}"
+    socket_dir = config["INSTANCE_UNIX_SOCKET"]
+    if driver == "psycopg":
+        return f"postgresql+psycopg://{credentials}?host={socket_dir}"
+    if driver == "pg8000":
+        return (
+            f"postgresql+pg8000://{credentials}"
+            f"?unix_sock={socket_dir}/.s.PGSQL.5432"
+        )
+    raise ValueError(f"Unsupported DB_DRIVER: {driver}")
+
+
+def engine_options(config):
+    """
+    連線池設定。eventlet 下每個 green thread 各自佔用一條連線，
+    pool_size + max_overflow 需涵蓋同時處理的請求數；等待超過 pool_timeout 即失敗，
+    不讓請求無限期排隊。
+    """
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config.get("DB_POOL_SIZE", 10),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 20),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 5),
+        "pool_recycle": config.get("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": config.get("DB_POOL_PRE_PING", True),
+    }
+    if config.get("DB_DRIVER", "pg8000") == "psycopg":
+        # 同一個 SQL 執行 prepare_threshold 次後改用伺服器端 prepared statement；
+        # 經 pgbouncer transaction 模式連線時需設為 None 關閉
+        options["connect_args"] = {
+            "prepare_threshold": config.get("DB_PREPARE_THRESHOLD", 5)
+        }
+    return options
@@ -0,0 +1,435 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from sqlalchemy import (
+    select,
+    func,
+    exists,
+    union,
+    case,
+    tuple_,
+    literal_column,
+    type_coerce,
+    String,
+)
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
+from .extensions import db
+from .models import User, Group, UserGroup, Post
+from .months import recent_months
+from .pagination import DEFAULT_PAGE_SIZE, encode_cursor
+from .versions import versions, group_key
+
+EMPTY_JSON_ARRAY = literal_column("'[]'::json")
+
+
+def iso_timestamp(column):
+    """
+    在 SQL 中產生與 datetime.isoformat() 相同的字串。json_build_object 會省略小數秒
+    結尾的 0（例如 .12），與 to_dict() 及 new_post 的格式不同，
+    Python 3.9 的 datetime.fromisoformat 也無法解析。
+    """
+    return func.to_char(column, 'YYYY-MM-DD"T"HH24:MI:SS', type_=String) + case(
+        (func.to_char(column, "US") == "000000", ""),
+        else_=func.to_char(column, ".US", type_=String),
+    )
+
+
+def last_post_time(start, end):
+    """
+    成員在群組中最後一篇貼文的時間：先查 [start, end) 的分區，
+    這段期間沒有貼文時才查更早的分區（COALESCE 只在前者為 NULL 時執行後者）。
+    """
+
+    def latest(*conditions):
+        return (
+            select(func.max(Post.created_time))
+            .where(
+                Post.user_id == UserGroup.user_id,
+                Post.group_id == UserGroup.group_id,
+                *conditions,
+            )
+            .correlate(UserGroup)
+            .scalar_subquery()
+        )
+
+    return func.coalesce(
+        latest(Post.created_time >= start, Post.created_time < end),
+        latest(Post.created_time < start),
+    )
+
+
+def members_statement(group_id):
+    """
+    群組成員與其最後打卡時間。
+    """
+    return (
+        select(
+            User.user_id,
+            User.name,
+            last_post_time(*recent_months()).label("last_post_time"),
+        )
+        .join(UserGroup, UserGroup.user_id == User.user_id)
+        .where(UserGroup.group_id == group_id)
+    )
+
+
+def members_json(members):
+    return select(
+        func.coalesce(
+            func.json_agg(
+                func.json_build_object(
+                    "user_id",
+                    members.c.user_id,
+                    "name",
+                    members.c.name,
+                    "last_post_time",
+                    iso_timestamp(members.c.last_post_time),
+                )
+            ),
+            EMPTY_JSON_ARRAY,
+        )
+    ).scalar_subquery()
+
+
+def posts_json(page, *order_by):
+    return select(
+        func.coalesce(
+            func.json_agg(
+                aggregate_order_by(
+                    func.json_build_object(
+                        "post_id",
+                        page.c.post_id,
+                        "user_name",
+                        page.c.user_name,
+                        "content",
+                        page.c.content,
+                        "created_time",
+                        iso_timestamp(page.c.created_time),
+                    ),
+                    *order_by,
+                )
+            ),
+            EMPTY_JSON_ARRAY,
+        )
+    ).scalar_subquery()
+
+
+def posts_statement(group_id):
+    return (
+        select(
+            Post.post_id,
+            Post.content,
+            Post.created_time,
+            User.name.label("user_name"),
+        )
+        .join(User, User.user_id == Post.user_id)
+        .where(Post.group_id == group_id)
+    )
+
+
+def page_statement(group_id, start, end, limit, after=None):
+    """
+    [start, end) 之間的一頁貼文（由新到舊），after 為上一頁最後一筆的排序鍵。
+    """
+    page = posts_statement(group_id).where(
+        Post.created_time >= start, Post.created_time < end
+    )
+    if after:
+        # 另加單獨的 created_time 條件，查詢規劃器才能據此排除較新的分區
+        page = page.where(
+            Post.created_time <= after[0],
+            tuple_(Post.created_time, Post.post_id) < tuple_(*after),
+        )
+    return (
+        page.order_by(Post.created_time.desc(), Post.post_id.desc())
+        .limit(limit)
+        .cte("page")
+    )
+
+
+def older_posts_statement(group_id, since, before, limit):
+    """
+    [since, before) 之間的一頁貼文，最近幾個月的貼文不足一頁時用來補上。
+    since 為群組建立的時間，查詢規劃器據此排除群組建立前的分區。
+    """
+    page = (
+        posts_statement(group_id)
+        .where(Post.created_time >= since, Post.created_time < before)
+        .order_by(Post.created_time.desc(), Post.post_id.desc())
+        .limit(limit)
+        .cte("page")
+    )
+    return select(
+        type_coerce(
+            posts_json(page, page.c.created_time.desc(), page.c.post_id.desc()), JSON
+        )
+    )
+
+
+def group_detail_statement(
+    group_id, user_id, limit=DEFAULT_PAGE_SIZE, after=None, window=None
+):
+    """
+    以單一查詢（CTE + JSON 聚合）取得群組資訊、成員最後打卡時間、
+    一頁貼文以及使用者是否已有貼文。群組不存在時查無資料列。
+    貼文只讀取 window（預設為 cursor 或現在所在的最近幾個月）內的分區。
+    """
+    if window is None:
+        window = recent_months(after[0] if after else None)
+    # iso_timestamp 會引用 last_post_time 三次，MATERIALIZED 避免子查詢被重複執行
+    members = members_statement(group_id).cte("members").prefix_with("MATERIALIZED")
+    page = page_statement(group_id, *window, limit + 1, after)
+
+    user_has_posts = exists().where(Post.group_id == group_id, Post.user_id == user_id)
+
+    return select(
+        Group.group_name,
+        Group.group_score,
+        Group.created_time,
+        type_coerce(members_json(members), JSON).label("members"),
+        type_coerce(
+            posts_json(page, page.c.created_time.desc(), page.c.post_id.desc()), JSON
+        ).label("posts"),
+        user_has_posts.label("has_user_posts"),
+    ).where(Group.group_id == group_id)
+
+
+def group_delta_statement(group_id, user_id, since, limit=DEFAULT_PAGE_SIZE):
+    """
+    以單一查詢取得 since（created_time, post_id）之後的貼文（由舊到新）、
+    since 之後加入或打卡的成員與群組目前的分數及成員數。群組不存在時查無資料列。
+    """
+    since_time = since[0]
+    # since 之後的貼文只在 since 到本月底之間的分區中
+    end = recent_months()[1]
+    changed = union(
+        select(UserGroup.user_id).where(
+            UserGroup.group_id == group_id, UserGroup.joined_time > since_time
+        ),
+        select(Post.user_id).where(
+            Post.group_id == group_id,
+            Post.created_time > since_time,
+            Post.created_time < end,
+        ),
+    ).subquery()
+    members = (
+        members_statement(group_id)
+        .where(UserGroup.user_id.in_(select(changed.c.user_id)))
+        .cte("members")
+        .prefix_with("MATERIALIZED")
+    )
+
+    page = (
+        posts_statement(group_id)
+        .where(
+            Post.created_time >= since_time,
+            Post.created_time < end,
+            tuple_(Post.created_time, Post.post_id) > tuple_(*since),
+        )
+        .order_by(Post.created_time, Post.post_id)
+        .limit(limit + 1)
+        .cte("page")
+    )
+
+    user_has_posts = exists().where(Post.group_id == group_id, Post.user_id == user_id)
+
+    return select(
+        Group.group_name,
+        Group.group_score,
+        Group.member_count,
+        type_coerce(members_json(members), JSON).label("members"),
+        type_coerce(posts_json(page, page.c.created_time, page.c.post_id), JSON).label(
+            "posts"
+        ),
+        user_has_posts.label("has_user_posts"),
+    ).where(Group.group_id == group_id)
+
+
+def _fill_last_post_time(members):
+    for member in members:
+        if member["last_post_time"] is None:
+            member["last_post_time"] = ""
+    return members
+
+
+def load_group_detail(
+    group_id, user_id, limit=DEFAULT_PAGE_SIZE, after=None, watermark=None
+):
+    """
+    回傳群組詳細資料 dict，群組不存在時回傳 None。
+    watermark 為讀取前已確定寫入的時間點，可作為之後 delta 的 since。
+    """
+    window = recent_months(after[0] if after else None)
+    row = db.session.execute(
+        group_detail_statement(group_id, user_id, limit, after, window)
+    ).one_or_none()
+    if row is None:
+        return None
+
+    posts = row.posts
+    # 最近幾個月的貼文不足一頁，再從更早的分區補上。打卡需先加入群組，
+    # 群組建立前不會有貼文：群組在這段期間內建立時（新群組）不必再查詢
+    if len(posts) <= limit and row.created_time < window[0]:
+        posts += db.session.scalar(
+            older_posts_statement(
+                group_id, row.created_time, window[0], limit + 1 - len(posts)
+            )
+        )
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1]["created_time"], posts[-1]["post_id"])
+
+    detail = {
+        "group_id": group_id,
+        "group_name": row.group_name,
+        "group_score": row.group_score,
+        "posts": posts,
+        "next_cursor": next_cursor,
+        "members": _fill_last_post_time(row.members),
+        "has_user_posts": row.has_user_posts,
+    }
+    if watermark is not None:
+        detail["watermark"] = encode_cursor(*watermark)
+    return detail
+
+
+def load_group_delta(group_id, user_id, since, settled, limit=DEFAULT_PAGE_SIZE):
+    """
+    回傳 since 之後的變動，群組不存在時回傳 None。settled 之前開始的寫入都已 commit：
+    還有下一頁時 watermark 為最後一筆貼文，否則推進到 settled（不早於 since），
+    因此可能重複回傳 settled 之後的貼文，客戶端以 post_id 去重。
+    """
+    row = db.session.execute(
+        group_delta_statement(group_id, user_id, since, limit)
+    ).one_or_none()
+    if row is None:
+        return None
+
+    posts = row.posts
+    has_more = len(posts) > limit
+    if has_more:
+        posts = posts[:limit]
+        last = posts[-1]
+        # created_time 已是 isoformat() 的格式，直接放進 cursor，不必先解析
+        watermark = (last["created_time"], last["post_id"])
+    else:
+        watermark = max(since, settled)
+
+    return {
+        "group_id": group_id,
+        "group_name": row.group_name,
+        "group_score": row.group_score,
+        "member_count": row.member_count,
+        "posts": posts,
+        "members": _fill_last_post_time(row.members),
+        "has_user_posts": row.has_user_posts,
+        "has_more": has_more,
+        "watermark": encode_cursor(*watermark),
+    }
+
+
+class GroupDetailCache:
+    """
+    群組第一頁詳細資料的快取。群組只在有人打卡或加入時改變，
+    由寫入路徑呼叫 invalidate(group_id) 精確清除；其他 worker 或行程的寫入
+    由 group:<id> 的版本號判斷，版本號與載入時不同的資料視為過期。
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 30
+        self.max_groups = 512
+        self.settle = timedelta(seconds=5)
+        # group_id -> (loaded_at, 版本號, {limit: (detail, {user_id: 是否已打卡})})
+        self._entries = OrderedDict()
+        self._generation = 0  # 每次 invalidate 遞增，避免載入期間被清除的資料寫回快取
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get("GROUP_DETAIL_CACHE_TTL", self.ttl)
+        self.max_groups = app.config.get("GROUP_DETAIL_CACHE_SIZE", self.max_groups)
+        self.settle = timedelta(
+            seconds=app.config.get("SYNC_SETTLE_SECONDS", self.settle.total_seconds())
+        )
+
+    def get(self, group_id, user_id, limit=DEFAULT_PAGE_SIZE, after=None):
+        """
+        取得群組詳細資料；只有第一頁會被快取，has_user_posts 依使用者另行判斷。
+        """
+        if after:
+            return load_group_detail(group_id, user_id, limit, after)
+
+        version = versions.current(group_key(group_id))
+        cached = self._lookup(group_id, limit, version)
+        if cached is None:
+            generation = self._generation
+            detail = load_group_detail(
+                group_id, user_id, limit, watermark=self.settled()
+            )
+            if detail is not None:
+                self._store(group_id, limit, detail, generation, version)
+            return detail
+
+        detail, posted = cached
+        has_user_posts = posted.get(user_id)
+        if has_user_posts is None:
+            # 打卡必須是成員，只有非成員需要另外查詢
+            has_user_posts = db.session.query(
+                exists().where(Post.group_id == group_id).where(Post.user_id == user_id)
+            ).scalar()
+        return {**detail, "has_user_posts": has_user_posts}
+
+    def delta(self, group_id, user_id, since, limit=DEFAULT_PAGE_SIZE):
+        """
+        取得 since 之後的變動（不經過快取）。
+        """
+        return load_group_delta(group_id, user_id, since, self.settled(), limit)
+
+    def settled(self):
+        """
+        在此之前開始的打卡與加入都已 commit：寫入在請求開始時決定時間，
+        settle 涵蓋請求處理與 commit 所需的時間。
+        """
+        return (datetime.now() - self.settle, 0)
+
+    def invalidate(self, group_id=None):
+        with self._lock:
+            self._generation += 1
+            if group_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(group_id, None)
+
+    def _lookup(self, group_id, limit, version):
+        with self._lock:
+            entry = self._entries.get(group_id)
+            if entry is None:
+                return None
+            loaded_at, loaded_version, pages = entry
+            if time.monotonic() - loaded_at >= self.ttl or loaded_version != version:
+                del self._entries[group_id]
+                return None
+            self._entries.move_to_end(group_id)
+            return pages.get(limit)
+
+    def _store(self, group_id, limit, detail, generation, version):
+        posted = {
+            member["user_id"]: member["last_post_time"] != ""
+            for member in detail["members"]
+        }
+        with self._lock:
+            if generation != self._generation:
+                return
+            entry = self._entries.get(group_id)
+            if entry is None or entry[1] != version:
+                entry = (time.monotonic(), version, {})
+                self._entries[group_id] = entry
+            entry[2][limit] = (detail, posted)
+            while len(self._entries) > self.max_groups:
+                self._entries.popitem(last=False)
+
+
+group_details = GroupDetailCache()
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from .extensions import db
+from .models import ScoreEvent, ScoreRollup
+
+RESOLUTIONS = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+MAX_BUCKETS = 1000
+
+
+def bucket_start(moment, resolution):
+    if resolution == "minute":
+        return moment.replace(second=0, microsecond=0)
+    if resolution == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def default_resolution(start, end):
+    """
+    依查詢區間選擇最細但不超過 MAX_BUCKETS 個區間的解析度。
+    """
+    for resolution, width in RESOLUTIONS.items():
+        if (end - start) / width <= MAX_BUCKETS:
+            return resolution
+    return "day"
+
+
+def record_score_change(group_id, previous_score, score, changed_at=None):
+    """
+    在目前的交易中記錄一次分數變動，並以 INSERT ... ON CONFLICT 更新三種解析度的彙總。
+    """
+    record_score_changes([(group_id, previous_score, score)], changed_at)
+
+
+def record_score_changes(changes, changed_at=None):
+    """
+    批次記錄 [(group_id, 舊分數, 新分數)]，每個群組只能出現一次；
+    事件與彙總各以一個多列 INSERT 寫入。
+    """
+    if not changes:
+        return
+    changed_at = changed_at or datetime.now()
+    db.session.execute(
+        insert(ScoreEvent).values(
+            [
+                {
+                    "group_id": group_id,
+                    "previous_score": previous_score,
+                    "score": score,
+                    "created_time": changed_at,
+                }
+                for group_id, previous_score, score in changes
+            ]
+        )
+    )
+
+    statement = insert(ScoreRollup).values(
+        [
+            {
+                "group_id": group_id,
+                "resolution": resolution,
+                "bucket_start": bucket_start(changed_at, resolution),
+                "open_score": previous_score,
+                "close_score": score,
+                "min_score": min(previous_score, score),
+                "max_score": max(previous_score, score),
+                "changes": 1,
+            }
+            for group_id, previous_score, score in changes
+            for resolution in RESOLUTIONS
+        ]
+    )
+    excluded = statement.excluded
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[
+                ScoreRollup.group_id,
+                ScoreRollup.resolution,
+                ScoreRollup.bucket_start,
+            ],
+            set_={
+                "close_score": excluded.close_score,
+                "min_score": func.least(ScoreRollup.min_score, excluded.min_score),
+                "max_score": func.greatest(ScoreRollup.max_score, excluded.max_score),
+                "changes": ScoreRollup.changes + 1,
+            },
+        )
+    )
+
+
+def score_trend(group_id, start, end, resolution):
+    """
+    回傳 [start, end) 區間內有變動的彙總區間，只讀取 O(區間數) 列。
+    """
+    rollups = db.session.scalars(
+        select(ScoreRollup)
+        .where(
+            ScoreRollup.group_id == group_id,
+            ScoreRollup.resolution == resolution,
+            ScoreRollup.bucket_start >= bucket_start(start, resolution),
+            ScoreRollup.bucket_start < end,
+        )
+        .order_by(ScoreRollup.bucket_start)
+    )
+    return [rollup.to_dict() for rollup in rollups]
+
+
+def prune_score_history(retention, now=None):
+    """
+    依 retention（{"events" 或解析度: timedelta 或 None}）刪除過期資料。
+    較粗的彙總在寫入時已同步維護，刪除細的資料即完成降採樣。
+    回傳各類刪除的列數。
+    """
+    now = now or datetime.now()
+    deleted = {}
+    keep = retention.get("events")
+    if keep is not None:
+        deleted["events"] = db.session.execute(
+            delete(ScoreEvent).where(ScoreEvent.created_time < now - keep)
+        ).rowcount
+    for resolution in RESOLUTIONS:
+        keep = retention.get(resolution)
+        if keep is None:
+            continue
+        deleted[resolution] = db.session.execute(
+            delete(ScoreRollup).where(
+                ScoreRollup.resolution == resolution,
+                ScoreRollup.bucket_start < now - keep,
+            )
+        ).rowcount
+    db.session.commit()
+    return deleted
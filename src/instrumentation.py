@@ -0,0 +1,130 @@
+import json
+import logging
+import random
+import time
+from flask import Response, g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .metrics import registry
+
+request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by endpoint",
+    ["method", "endpoint", "status"],
+)
+request_queries = registry.histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+request_query_seconds = registry.histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements per HTTP request",
+    ["endpoint"],
+)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        context._query_started = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None or not has_request_context():
+        return
+    g.query_count = g.get("query_count", 0) + 1
+    g.query_seconds = g.get("query_seconds", 0.0) + time.perf_counter() - started
+
+
+class RequestInstrumentation:
+    """
+    每個請求的延遲、SQL 數量與時間：記錄到 metrics，並依 LOG_SAMPLE_RATE 抽樣
+    輸出一行 JSON 日誌；慢請求與 SQL 過多（多半是 N+1）的請求一律以 WARNING 記錄。
+    """
+
+    def __init__(self, app=None):
+        self.sample_rate = 0.01
+        self.slow_seconds = 1.0
+        self.max_queries = 20
+        self.logger = logging.getLogger(__name__)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.sample_rate = app.config.get("LOG_SAMPLE_RATE", self.sample_rate)
+        self.slow_seconds = app.config.get(
+            "LOG_SLOW_REQUEST_SECONDS", self.slow_seconds
+        )
+        self.max_queries = app.config.get("LOG_MAX_QUERIES", self.max_queries)
+        self.logger = app.logger
+
+        if not event.contains(Engine, "before_cursor_execute", before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+        app.before_request(self.start)
+        app.after_request(self.finish)
+
+    @staticmethod
+    def start():
+        g.request_started = time.perf_counter()
+        g.query_count = 0
+        g.query_seconds = 0.0
+
+    def finish(self, response):
+        started = g.get("request_started")
+        if started is None:
+            return response
+
+        duration = time.perf_counter() - started
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        queries = g.get("query_count", 0)
+        query_seconds = g.get("query_seconds", 0.0)
+
+        request_duration.observe(
+            duration,
+            method=request.method,
+            endpoint=endpoint,
+            status=response.status_code,
+        )
+        request_queries.observe(queries, endpoint=endpoint)
+        request_query_seconds.observe(query_seconds, endpoint=endpoint)
+        response.headers["Server-Timing"] = (
+            f"app;dur={duration * 1000:.1f}, "
+            f'db;dur={query_seconds * 1000:.1f};desc="{queries} queries"'
+        )
+
+        if duration >= self.slow_seconds or queries > self.max_queries:
+            level = logging.WARNING
+        elif random.random() < self.sample_rate:
+            level = logging.INFO
+        else:
+            return response
+
+        if self.logger.isEnabledFor(level):
+            self.logger.log(
+                level,
+                json.dumps(
+                    {
+                        "method": request.method,
+                        "path": request.path,
+                        "endpoint": endpoint,
+                        "status": response.status_code,
+                        "duration_ms": round(duration * 1000, 2),
+                        "queries": queries,
+                        "query_ms": round(query_seconds * 1000, 2),
+                    }
+                ),
+            )
+        return response
+
+
+def metrics_view():
+    """
+    Prometheus 抓取用的 /metrics。
+    """
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+request_instrumentation = RequestInstrumentation()
@@ -0,0 +1,100 @@
+from sqlalchemy import (
+    select,
+    update,
+    delete,
+    exists,
+    literal,
+    DateTime,
+    Integer,
+    String,
+)
+from sqlalchemy.dialects.postgresql import insert
+from .extensions import db
+from .models import User, Group, UserGroup
+
+
+def user_exists(user_id):
+    return exists().where(User.user_id == user_id)
+
+
+def join_group(user_id, group_id, joined_time):
+    """
+    以單一語句加入群組並調整成員數（INSERT ... ON CONFLICT DO NOTHING 與 UPDATE
+    寫在同一個 WITH 中）。回傳 (group_name, member_count)；已是成員、使用者或群組
+    不存在時回傳 None，由呼叫端在失敗時再查詢原因。
+    """
+    inserted = (
+        insert(UserGroup)
+        .from_select(
+            ["user_id", "group_id", "joined_time"],
+            select(
+                literal(user_id, String),
+                Group.group_id,
+                literal(joined_time, DateTime),
+            ).where(Group.group_id == group_id, user_exists(user_id)),
+        )
+        .on_conflict_do_nothing()
+        .returning(UserGroup.group_id)
+        .cte("inserted")
+    )
+    return db.session.execute(
+        update(Group)
+        .where(Group.group_id == inserted.c.group_id)
+        .values(member_count=Group.member_count + 1)
+        .returning(Group.group_name, Group.member_count)
+        # 條件來自 CTE，ORM 無法據此同步 session 中的物件
+        .execution_options(synchronize_session=False)
+    ).one_or_none()
+
+
+def leave_group(user_id, group_id):
+    """
+    以單一語句退出群組並調整成員數，回傳調整後的人數；不是成員時回傳 None。
+    """
+    deleted = (
+        delete(UserGroup)
+        .where(UserGroup.user_id == user_id, UserGroup.group_id == group_id)
+        .returning(UserGroup.group_id)
+        .cte("deleted")
+    )
+    return db.session.execute(
+        update(Group)
+        .where(Group.group_id == deleted.c.group_id)
+        .values(member_count=Group.member_count - 1)
+        .returning(Group.member_count)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
+def create_group(group_name, user_id, created_time):
+    """
+    以單一語句建立群組並將建立者加入（成員數為 1）。回傳新群組的 group_id；
+    名稱已存在或使用者不存在時回傳 None，群組不會被建立。
+    """
+    new_group = (
+        insert(Group)
+        .from_select(
+            ["group_name", "group_score", "created_time", "member_count"],
+            select(
+                literal(group_name, String),
+                literal(0, Integer),
+                literal(created_time, DateTime),
+                literal(1, Integer),
+            ).where(user_exists(user_id)),
+        )
+        .on_conflict_do_nothing(index_elements=[Group.group_name])
+        .returning(Group.group_id)
+        .cte("new_group")
+    )
+    return db.session.execute(
+        insert(UserGroup)
+        .from_select(
+            ["user_id", "group_id", "joined_time"],
+            select(
+                literal(user_id, String),
+                new_group.c.group_id,
+                literal(created_time, DateTime),
+            ),
+        )
+        .returning(UserGroup.group_id)
+    ).scalar()
@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy import DDL, event
 from .extensions import db
 
 
@@ -8,7 +9,7 @@ class User(db.Model):
     user_id = db.Column(db.String(50), primary_key=True)
     name = db.Column(db.String(50), nullable=False)
     account = db.Column(db.String(100), nullable=False, unique=True)
-    password = db.Column(db.String(100), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
 
     def to_dict(self):
         return {"name": self.name, "account": self.account, "user_id": self.user_id}
@@ -16,11 +17,22 @@ class User(db.Model):
 
 class Group(db.Model):
     __tablename__ = "groups"
+    __table_args__ = (
+        db.Index("ix_groups_group_score", "group_score", "group_id"),
+        db.Index("ix_groups_created_time", "created_time", "group_id"),
+        db.Index("ix_groups_member_count", "member_count", "group_id"),
+        # 名稱搜尋的前綴比對；模糊比對的 pg_trgm GIN 索引只在 migration 0006 建立
+        db.Index(
+            "ix_groups_group_name_prefix", db.text("lower(group_name) text_pattern_ops")
+        ),
+    )
 
     group_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     group_name = db.Column(db.String(50), nullable=False, unique=True)
     group_score = db.Column(db.Integer, default=0, nullable=False)
     created_time = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    # 成員數，於加入與退出群組的同一個交易中更新
+    member_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
 
     def to_dict(self):
         return {
@@ -33,6 +45,10 @@ class Group(db.Model):
 
 class UserGroup(db.Model):
     __tablename__ = "user_groups"
+    # 主鍵 (user_id, group_id) 已涵蓋以 user_id 查詢的情況
+    __table_args__ = (
+        db.Index("ix_user_groups_group_id_joined_time", "group_id", "joined_time"),
+    )
 
     user_id = db.Column(
         db.String(50),
@@ -49,6 +65,17 @@ class UserGroup(db.Model):
 
 class Post(db.Model):
     __tablename__ = "posts"
+    # 依 created_time 每月一個分區（見 src/partitions.py），主鍵因此須包含 created_time
+    __table_args__ = (
+        db.Index("ix_posts_group_id_created_time", "group_id", "created_time", "post_id"),
+        db.Index(
+            "ix_posts_user_id_group_id_created_time",
+            "user_id",
+            "group_id",
+            "created_time",
+        ),
+        {"postgresql_partition_by": "RANGE (created_time)"},
+    )
 
     post_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(
@@ -62,7 +89,7 @@ class Post(db.Model):
         nullable=False,
     )
     content = db.Column(db.Text, nullable=False)
-    created_time = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    created_time = db.Column(db.DateTime, default=datetime.now, primary_key=True)
 
     def to_dict(self):
         return {
@@ -72,3 +99,63 @@ class Post(db.Model):
             "content": self.content,
             "created_time": self.created_time.isoformat(),
         }
+
+
+# create_all 建立的分區表先附上 DEFAULT 分區，沒有對應月份分區的貼文仍可寫入
+event.listen(
+    Post.__table__,
+    "after_create",
+    DDL("CREATE TABLE posts_default PARTITION OF posts DEFAULT"),
+)
+
+
+class ScoreEvent(db.Model):
+    """
+    群組分數的每一次變動。
+    """
+
+    __tablename__ = "score_events"
+    __table_args__ = (
+        db.Index("ix_score_events_group_id_created_time", "group_id", "created_time"),
+    )
+
+    event_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    group_id = db.Column(
+        db.Integer,
+        db.ForeignKey("groups.group_id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    previous_score = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+    created_time = db.Column(db.DateTime, default=datetime.now, nullable=False)
+
+
+class ScoreRollup(db.Model):
+    """
+    分數變動以分鐘、小時、天彙總：open 為區間開始時的分數，close 為區間結束時的分數。
+    """
+
+    __tablename__ = "score_rollups"
+
+    group_id = db.Column(
+        db.Integer,
+        db.ForeignKey("groups.group_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    resolution = db.Column(db.String(8), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    open_score = db.Column(db.Integer, nullable=False)
+    close_score = db.Column(db.Integer, nullable=False)
+    min_score = db.Column(db.Integer, nullable=False)
+    max_score = db.Column(db.Integer, nullable=False)
+    changes = db.Column(db.Integer, nullable=False)
+
+    def to_dict(self):
+        return {
+            "bucket_start": self.bucket_start.isoformat(),
+            "open": self.open_score,
+            "close": self.close_score,
+            "min": self.min_score,
+            "max": self.max_score,
+            "changes": self.changes,
+        }
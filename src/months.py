@@ -0,0 +1,22 @@
+from datetime import datetime
+from flask import current_app
+
+
+def month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month, months):
+    years, index = divmod(month.month - 1 + months, 12)
+    return month.replace(year=month.year + years, month=index + 1)
+
+
+def recent_months(before=None):
+    """
+    常用查詢先讀取的貼文時間範圍 (start, end)：before（預設為現在）所在月份
+    與之前 POST_RECENT_MONTHS - 1 個月。範圍落在每月分區內時，查詢規劃器只掃描
+    這幾個分區，不必讀取舊分區與 posts_default；範圍外的貼文另以較慢的查詢補上。
+    """
+    months = current_app.config.get("POST_RECENT_MONTHS", 2)
+    month = month_start(before or datetime.now())
+    return add_months(month, 1 - months), add_months(month, 1)
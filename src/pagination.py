@@ -0,0 +1,63 @@
+import base64
+import json
+from datetime import datetime
+from flask_restful import reqparse
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+page_parser = reqparse.RequestParser()
+page_parser.add_argument("limit", type=int, default=DEFAULT_PAGE_SIZE, location="args")
+page_parser.add_argument("cursor", type=str, location="args")
+
+
+def encode_cursor(*values):
+    """
+    將排序鍵編碼為不透明的 cursor 字串。
+    """
+    payload = [
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, *types):
+    """
+    解析 cursor，types 為各排序鍵的型別；格式不符時拋出 ValueError。
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError("Invalid cursor.") from e
+
+    if not isinstance(payload, list) or len(payload) != len(types):
+        raise ValueError("Invalid cursor.")
+
+    try:
+        values = tuple(
+            datetime.fromisoformat(value) if type_ is datetime else type_(value)
+            for value, type_ in zip(payload, types)
+        )
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor.") from e
+    # 資料庫的時間沒有時區，帶時區的值無法與之比較
+    if any(isinstance(value, datetime) and value.tzinfo for value in values):
+        raise ValueError("Invalid cursor.")
+    return values
+
+
+def parse_page_args(*types):
+    """
+    讀取 limit 與 cursor 參數，回傳 (limit, after)；after 為解碼後的排序鍵，
+    未帶 cursor 時為 None。參數不合法時拋出 ValueError。
+    """
+    args = page_parser.parse_args()
+    limit = args["limit"]
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+    cursor = args["cursor"]
+    return limit, decode_cursor(cursor, *types) if cursor else None
+
@@ -0,0 +1,271 @@
+import gzip
+import os
+import re
+from datetime import datetime
+import orjson
+from sqlalchemy import select, delete, exists, func, text, and_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import aliased
+from .extensions import db
+from .group_detail import group_details
+from .models import User, Group, Post
+from .months import month_start, add_months
+from .versions import versions, group_key
+
+DEFAULT_PARTITION = "posts_default"
+PARTITION_PATTERN = re.compile(r"posts_(\d{6})$")
+COLUMNS = ("post_id", "user_id", "group_id", "content", "created_time")
+
+
+def partition_name(month):
+    return f"posts_{month:%Y%m}"
+
+
+def post_partitions():
+    """
+    回傳目前的每月分區 {月份開始時間: 分區名稱}，依月份排序（不含 DEFAULT 分區）。
+    """
+    names = db.session.scalars(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = 'posts'::regclass"
+        )
+    )
+    partitions = {}
+    for name in names:
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            partitions[datetime.strptime(match.group(1), "%Y%m")] = name
+    return dict(sorted(partitions.items()))
+
+
+def create_partition(month):
+    """
+    建立 month 的分區。DEFAULT 分區中已有這個月的貼文時，
+    先卸下 DEFAULT 分區、把貼文搬到新分區後再掛回。
+    """
+    name = partition_name(month)
+    start, end = month, add_months(month, 1)
+    bounds = f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    in_range = "created_time >= :start AND created_time < :end"
+    params = {"start": start, "end": end}
+
+    stranded = db.session.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})"),
+        params,
+    ).scalar()
+    if not stranded:
+        db.session.execute(text(f"CREATE TABLE {name} PARTITION OF posts {bounds}"))
+        return name
+
+    db.session.execute(text(f"ALTER TABLE posts DETACH PARTITION {DEFAULT_PARTITION}"))
+    db.session.execute(text(f"CREATE TABLE {name} PARTITION OF posts {bounds}"))
+    db.session.execute(
+        text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}"),
+        params,
+    )
+    db.session.execute(
+        text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), params
+    )
+    db.session.execute(
+        text(f"ALTER TABLE posts ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    )
+    return name
+
+
+def ensure_post_partitions(first, last):
+    """
+    建立 first 到 last 所在月份之間缺少的分區，回傳新建立的分區名稱。
+    """
+    existing = post_partitions()
+    created = []
+    month = month_start(first)
+    while month <= last:
+        if month not in existing:
+            created.append(create_partition(month))
+        month = add_months(month, 1)
+    db.session.commit()
+    return created
+
+
+def count_stranded_posts():
+    """
+    posts_default 中的貼文數。這些貼文不在任何每月分區中，
+    查詢最近幾個月的貼文時無法排除 posts_default。
+    """
+    return db.session.execute(
+        text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")
+    ).scalar()
+
+
+def partition_stranded_posts():
+    """
+    為 posts_default 中貼文所屬的月份建立分區並搬入貼文，回傳新建立的分區名稱。
+    """
+    months = db.session.scalars(
+        text(
+            f"SELECT DISTINCT date_trunc('month', created_time) "
+            f"FROM {DEFAULT_PARTITION} ORDER BY 1"
+        )
+    ).all()
+    created = [create_partition(month) for month in months]
+    db.session.commit()
+    return created
+
+
+def archivable_posts(start, end, inactive_since):
+    """
+    [start, end) 之間可以封存的貼文：群組在 inactive_since 之後沒有任何打卡，
+    且不是群組的第一篇貼文，也不是成員在群組中的最後一篇貼文。
+    保留這些貼文，分數（第一篇與最後一篇的時間差）、成員的最後打卡時間
+    與「是否打卡過」在封存前後都不變。
+    """
+    later = aliased(Post)
+    return and_(
+        Post.created_time >= start,
+        Post.created_time < end,
+        ~exists().where(
+            later.group_id == Post.group_id,
+            later.created_time >= inactive_since,
+        ),
+        exists().where(
+            later.group_id == Post.group_id,
+            later.created_time < Post.created_time,
+        ),
+        exists().where(
+            later.user_id == Post.user_id,
+            later.group_id == Post.group_id,
+            later.created_time > Post.created_time,
+        ),
+    )
+
+
+def archive_path(directory, month):
+    return os.path.join(directory, f"{partition_name(month)}.jsonl.gz")
+
+
+def _write_archive(path, rows):
+    # 每次封存附加一個 gzip member；寫入並 fsync 後才 commit 刪除
+    with open(path, "ab") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+            for row in rows:
+                archive.write(orjson.dumps(dict(zip(COLUMNS, row))) + b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def archive_posts(directory, before, inactive_since, batch_size=100, dry_run=False):
+    """
+    將 before 之前的月份分區中，不活躍群組的貼文寫入 directory/posts_YYYYMM.jsonl.gz
+    並從資料庫刪除，每批 batch_size 個群組一個交易。封存後沒有任何貼文的分區會被刪除，
+    之後的查詢不必再掃描。回傳 [(分區名稱, 封存筆數, 是否已刪除分區)]。
+    dry_run 只計算筆數，不建立目錄也不寫入。
+    """
+    if not dry_run:
+        os.makedirs(directory, exist_ok=True)
+    results = []
+    touched = set()
+    for month, name in post_partitions().items():
+        end = add_months(month, 1)
+        if end > before:
+            break
+
+        condition = archivable_posts(month, end, inactive_since)
+        group_ids = db.session.scalars(
+            select(Post.group_id).where(condition).distinct().order_by(Post.group_id)
+        ).all()
+        archived = 0
+        for start in range(0, len(group_ids), batch_size):
+            batch = group_ids[start : start + batch_size]
+            if dry_run:
+                archived += db.session.scalar(
+                    select(func.count()).where(condition, Post.group_id.in_(batch))
+                )
+                continue
+            rows = db.session.execute(
+                delete(Post)
+                .where(condition, Post.group_id.in_(batch))
+                .returning(*(getattr(Post, column) for column in COLUMNS))
+                .execution_options(synchronize_session=False)
+            ).all()
+            _write_archive(archive_path(directory, month), rows)
+            db.session.commit()
+            archived += len(rows)
+            touched.update(batch)
+
+        dropped = False
+        if (
+            not dry_run
+            and not db.session.execute(
+                text(f"SELECT EXISTS (SELECT 1 FROM {name})")
+            ).scalar()
+        ):
+            db.session.execute(text(f"ALTER TABLE posts DETACH PARTITION {name}"))
+            db.session.execute(text(f"DROP TABLE {name}"))
+            db.session.commit()
+            dropped = True
+        db.session.rollback()
+        results.append((name, archived, dropped))
+
+    _after_change(touched)
+    return results
+
+
+def restore_posts(directory, month, group_ids=None, chunk_size=5000):
+    """
+    將 posts_YYYYMM.jsonl.gz 中的貼文寫回資料庫（可只還原指定群組），
+    必要時先重建該月份的分區。已存在的貼文、使用者或群組已刪除的貼文會略過；
+    封存檔保留不刪除，重複還原不會產生重複的貼文。回傳還原的筆數。
+    """
+    path = archive_path(directory, month)
+    with gzip.open(path, "rb") as archive:
+        rows = [orjson.loads(line) for line in archive]
+    if group_ids:
+        rows = [row for row in rows if row["group_id"] in group_ids]
+    if not rows:
+        return 0
+
+    users = set(
+        db.session.scalars(
+            select(User.user_id).where(
+                User.user_id.in_({row["user_id"] for row in rows})
+            )
+        )
+    )
+    groups = set(
+        db.session.scalars(
+            select(Group.group_id).where(
+                Group.group_id.in_({row["group_id"] for row in rows})
+            )
+        )
+    )
+    rows = [
+        {**row, "created_time": datetime.fromisoformat(row["created_time"])}
+        for row in rows
+        if row["user_id"] in users and row["group_id"] in groups
+    ]
+
+    if month not in post_partitions():
+        create_partition(month)
+    restored = 0
+    for start in range(0, len(rows), chunk_size):
+        restored += len(
+            db.session.execute(
+                insert(Post)
+                .values(rows[start : start + chunk_size])
+                .on_conflict_do_nothing()
+                .returning(Post.post_id)
+            ).all()
+        )
+    db.session.commit()
+
+    _after_change({row["group_id"] for row in rows})
+    return restored
+
+
+def _after_change(group_ids):
+    # 分數不受影響；貼文列表與成員資料的快取需清除
+    for group_id in group_ids:
+        group_details.invalidate(group_id)
+    versions.bump(*map(group_key, group_ids))
@@ -0,0 +1,97 @@
+import hmac
+import time
+from threading import Lock
+from eventlet import tpool
+from eventlet.patcher import is_monkey_patched
+from eventlet.semaphore import Semaphore
+from werkzeug.security import check_password_hash, generate_password_hash
+from .metrics import registry
+
+HASH_PREFIXES = ("pbkdf2:", "scrypt:")
+
+hash_seconds = registry.histogram(
+    "password_hash_seconds", "Time spent hashing or checking passwords", ["operation"]
+)
+rejected = registry.counter(
+    "password_hash_rejected_total", "Password operations rejected by a full queue"
+)
+rehashes = registry.counter(
+    "password_rehashes_total", "Stored passwords upgraded on login", ["reason"]
+)
+
+
+class HasherBusy(Exception):
+    pass
+
+
+def is_hashed(stored):
+    return stored.startswith(HASH_PREFIXES) and stored.count("$") == 2
+
+
+class PasswordHasher:
+    """
+    密碼雜湊：PBKDF2 / scrypt 會佔用 CPU，在 eventlet 下交給 tpool 的原生執行緒，
+    避免卡住 hub 上的其他請求與 socket。同時執行的數量與等待佇列皆有上限。
+    """
+
+    def __init__(self, app=None):
+        self.method = "pbkdf2:sha256:600000"
+        self.concurrency = 4
+        self.queue_size = 64
+        self.offload = None  # None 表示在 eventlet monkey patch 時才交給 tpool
+        self._pending = 0
+        self._slots = Semaphore(self.concurrency)
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get("PASSWORD_HASH_METHOD", self.method)
+        self.concurrency = app.config.get("PASSWORD_HASH_CONCURRENCY", self.concurrency)
+        self.queue_size = app.config.get("PASSWORD_HASH_QUEUE_SIZE", self.queue_size)
+        self._slots = Semaphore(self.concurrency)
+
+    def hash(self, password):
+        return self._run("hash", generate_password_hash, password, self.method)
+
+    def verify(self, stored, password):
+        """
+        檢查密碼，回傳 (是否正確, 需要寫回的新雜湊或 None)。
+        舊資料的明文密碼與雜湊成本不同的密碼會在驗證成功時重新雜湊。
+        """
+        if not is_hashed(stored):
+            if not hmac.compare_digest(stored.encode(), password.encode()):
+                return False, None
+            rehashes.inc(reason="plaintext")
+            return True, self.hash(password)
+
+        if not self._run("check", check_password_hash, stored, password):
+            return False, None
+        if stored.split("$", 1)[0] != self.method:
+            rehashes.inc(reason="method")
+            return True, self.hash(password)
+        return True, None
+
+    def _run(self, operation, fn, *args):
+        with self._lock:
+            if self._pending >= self.concurrency + self.queue_size:
+                rejected.inc()
+                raise HasherBusy()
+            self._pending += 1
+
+        start = time.perf_counter()
+        try:
+            offload = self.offload
+            if offload is None:
+                offload = is_monkey_patched("thread")
+            if not offload:
+                return fn(*args)
+            with self._slots:
+                return tpool.execute(fn, *args)
+        finally:
+            hash_seconds.observe(time.perf_counter() - start, operation=operation)
+            with self._lock:
+                self._pending -= 1
+
+
+passwords = PasswordHasher()
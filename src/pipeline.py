@@ -0,0 +1,124 @@
+from threading import Lock
+from sqlalchemy import update
+from sqlalchemy.orm import aliased
+from .extensions import db
+from .group_detail import group_details
+from .history import record_score_change
+from .metrics import registry
+from .models import Group
+from .ranking import leaderboard
+from .realtime import score_broadcaster
+from .scoring import score_engine
+from .versions import versions, group_key, LEADERBOARD, DIRECTORY
+
+recomputes = registry.counter(
+    "score_recomputes_total", "Group score recomputes by outcome", ["outcome"]
+)
+deduplicated = registry.counter(
+    "score_recomputes_deduplicated_total",
+    "Recompute requests merged into one already pending for the same group",
+)
+
+
+def apply_score(group_id, score):
+    """
+    只在新分數較高時寫入（可重複套用），並在同一個交易中記錄分數歷史；
+    成功時更新快取、排行榜並推播。回傳是否有更新。
+    """
+    # 自我 join 的 previous 看到的是更新前的資料列，用來取得舊分數
+    previous = aliased(Group)
+    row = db.session.execute(
+        update(Group)
+        .where(
+            Group.group_id == group_id,
+            previous.group_id == Group.group_id,
+            Group.group_score < score,
+        )
+        .values(group_score=score)
+        .returning(Group.group_name, Group.created_time, previous.group_score)
+    ).one_or_none()
+    if row is not None:
+        record_score_change(group_id, row.group_score, score)
+    db.session.commit()
+    if row is None:
+        return False
+
+    group_details.invalidate(group_id)
+    leaderboard.update(group_id, row.group_name, score, row.created_time)
+    bumped = versions.bump(group_key(group_id), LEADERBOARD, DIRECTORY)
+    leaderboard.advance(bumped[LEADERBOARD])
+    score_broadcaster.publish(group_id, row.group_name, score)
+    return True
+
+
+class ScorePipeline:
+    """
+    打卡後的分數重算佇列：由背景 worker 處理，同一群組尚未處理的請求只保留一個。
+    """
+
+    def __init__(self):
+        self.asynchronous = True
+        self.workers = 2
+        self._app = None
+        self._socketio = None
+        self._queue = None
+        self._pending = set()
+        self._started = False
+        self._lock = Lock()
+
+    def init_app(self, app, socketio):
+        self.asynchronous = app.config.get("SCORE_PIPELINE_ASYNC", self.asynchronous)
+        self.workers = app.config.get("SCORE_PIPELINE_WORKERS", self.workers)
+        self._app = app
+        self._socketio = socketio
+
+    def submit(self, group_id):
+        """
+        排入群組的分數重算。同步模式下立即計算並回傳新分數（未提高時為 None）；
+        非同步模式一律回傳 None，新分數透過 score_update 推播。
+        """
+        if not self.asynchronous:
+            return self.recompute(group_id)
+
+        with self._lock:
+            if group_id in self._pending:
+                deduplicated.inc()
+                return None
+            self._pending.add(group_id)
+            if not self._started:
+                self._start()
+        self._queue.put(group_id)
+        return None
+
+    def recompute(self, group_id):
+        score = score_engine.score(group_id)
+        if apply_score(group_id, score):
+            recomputes.inc(outcome="raised")
+            return score
+        recomputes.inc(outcome="unchanged")
+        return None
+
+    def _start(self):
+        self._queue = self._socketio.server.eio.create_queue()
+        for _ in range(self.workers):
+            self._socketio.start_background_task(self._work)
+        self._started = True
+
+    def _work(self):
+        while True:
+            group_id = self._queue.get()
+            # 先移出 pending，處理期間新進的打卡會再排入一次
+            with self._lock:
+                self._pending.discard(group_id)
+            with self._app.app_context():
+                try:
+                    self.recompute(group_id)
+                except Exception:
+                    recomputes.inc(outcome="error")
+                    db.session.rollback()
+                    self._app.logger.exception(
+                        "Score recompute failed for group %s", group_id
+                    )
+
+
+score_pipeline = ScorePipeline()
@@ -0,0 +1,74 @@
+from threading import Lock
+import socketio
+
+LOCAL_SCHEME = "local://"
+
+
+class LocalBroker:
+    """
+    行程內的訊息佇列替身：同一行程中以 local:// 設定的多個 Socket.IO server
+    會共用這個 broker，用來在測試中模擬多個 worker。
+    """
+
+    def __init__(self):
+        self._subscribers = {}  # channel -> [queue, ...]
+        self._lock = Lock()
+
+    def subscribe(self, channel, queue):
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(queue)
+
+    def publish(self, channel, message):
+        with self._lock:
+            queues = list(self._subscribers.get(channel, ()))
+        for queue in queues:
+            queue.put(message)
+
+    def reset(self):
+        with self._lock:
+            self._subscribers.clear()
+
+
+local_broker = LocalBroker()
+
+
+class LocalPubSubManager(socketio.PubSubManager):
+    name = "local"
+
+    def __init__(self, channel="socketio", write_only=False, logger=None, json=None):
+        super().__init__(
+            channel=channel, write_only=write_only, logger=logger, json=json
+        )
+        self._queue = None
+
+    def initialize(self):
+        self._queue = self.server.eio.create_queue()
+        local_broker.subscribe(self.channel, self._queue)
+        super().initialize()
+
+    def _publish(self, data):
+        local_broker.publish(self.channel, data)
+
+    def _listen(self):
+        while True:
+            yield self._queue.get()
+
+
+def socketio_options(config):
+    """
+    依設定產生 SocketIO 的訊息佇列參數：
+    redis://、amqp://、kafka:// 等交給 Flask-SocketIO，local:// 使用行程內 broker。
+    """
+    options = {}
+    url = config.get("SOCKETIO_MESSAGE_QUEUE")
+    channel = config.get("SOCKETIO_CHANNEL", "flask-socketio")
+    if url and url.startswith(LOCAL_SCHEME):
+        options["client_manager"] = LocalPubSubManager(channel=channel)
+    elif url:
+        options["message_queue"] = url
+        options["channel"] = channel
+
+    transports = config.get("SOCKETIO_TRANSPORTS")
+    if transports:
+        options["transports"] = transports
+    return options
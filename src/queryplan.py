@@ -0,0 +1,191 @@
+import json
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, select
+from .extensions import db
+from .models import UserGroup
+from .months import recent_months, add_months
+from .partitions import partition_name
+from .pagination import encode_cursor
+from .ranking import leaderboard
+from .ratelimit import checkin_limiter
+from .scoring import score_engine
+from .search import group_search
+from .seed import USER_PREFIX
+
+
+def endpoint_requests(user_id, group_id, other_group_id):
+    """
+    每個 API 的代表性請求：(名稱, method, url, json body)。
+    """
+    return [
+        (
+            "login",
+            "POST",
+            "/api/login",
+            {"account": f"{user_id}@example.com", "password": "password"},
+        ),
+        ("leaderboard", "GET", "/api/leaderboard", None),
+        (
+            "leaderboard deep page",
+            "GET",
+            "/api/leaderboard?limit=100&offset=100000",
+            None,
+        ),
+        ("group list", "GET", f"/api/groups/{user_id}", None),
+        ("group search", "GET", f"/api/groups/{user_id}/search?q=seed-group-1", None),
+        ("group detail", "GET", f"/api/group/{group_id}/{user_id}", None),
+        ("group posts", "GET", f"/api/posts/{group_id}/{user_id}?limit=10", None),
+        (
+            "group posts delta",
+            "GET",
+            f"/api/posts/{group_id}/{user_id}?since="
+            + encode_cursor(datetime.now() - timedelta(hours=1), 0),
+            None,
+        ),
+        (
+            "check-in",
+            "POST",
+            f"/api/post/{group_id}/{user_id}",
+            {"content": "plan check"},
+        ),
+        (
+            "join group",
+            "POST",
+            "/api/usergroup",
+            {"user_id": user_id, "group_id": other_group_id},
+        ),
+    ]
+
+
+# 只應讀取最近幾個月分區的 API（見 src/months.py 的 recent_months）
+RECENT_PARTITION_ENDPOINTS = ("group detail", "group posts", "group posts delta")
+
+
+def capture_endpoint_queries():
+    """
+    以 test client 依序呼叫各 API，記錄每個請求實際送出的 SELECT。
+    回傳 [(名稱, status_code, [(statement, parameters), ...]), ...]。
+    """
+    user_id, group_id = db.session.execute(
+        select(UserGroup.user_id, UserGroup.group_id)
+        .where(UserGroup.user_id.like(f"{USER_PREFIX}%"))
+        .limit(1)
+    ).one()
+    other_group_id = db.session.scalar(
+        select(UserGroup.group_id)
+        .where(UserGroup.user_id != user_id, UserGroup.group_id != group_id)
+        .where(
+            ~UserGroup.group_id.in_(
+                select(UserGroup.group_id).where(UserGroup.user_id == user_id)
+            )
+        )
+        .limit(1)
+    )
+    db.session.rollback()
+
+    # 清空記憶體快取，確保載入用的查詢也被檢查
+    score_engine.invalidate()
+    leaderboard.invalidate()
+    checkin_limiter.reset()
+    # 搜尋用的前綴索引本來就一次讀取所有群組名稱，先載入以免被列為 Seq Scan
+    group_search.invalidate()
+    group_search.prefix("", 1)
+
+    captured = []
+
+    def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        if not executemany and statement.lstrip().upper().startswith(
+            ("SELECT", "WITH")
+        ):
+            captured.append((statement, parameters))
+
+    results = []
+    client = current_app.test_client()
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        for name, method, url, body in endpoint_requests(
+            user_id, group_id, other_group_id
+        ):
+            captured = []
+            response = client.open(url, method=method, json=body)
+            results.append((name, response.status_code, captured))
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+    return results
+
+
+def seq_scans(plan):
+    """
+    遞迴找出執行計畫中的 Seq Scan 節點，回傳其資料表名稱。
+    """
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def check_query_plans(statements):
+    """
+    以 enable_seqscan = off 對每個查詢執行 EXPLAIN；
+    若仍出現 Seq Scan，代表沒有可用的索引。回傳 [(statement, [資料表])]。
+    """
+    failures = []
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql(
+                "EXPLAIN (FORMAT JSON) " + statement, parameters
+            ).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            tables = seq_scans(plan[0]["Plan"])
+            if tables:
+                failures.append((statement, tables))
+        conn.rollback()
+    return failures
+
+
+def scanned_partitions(plan):
+    """
+    遞迴找出 EXPLAIN ANALYZE 結果中實際執行過的 posts 分區掃描。
+    """
+    found = set()
+    name = plan.get("Relation Name") or ""
+    if name.startswith("posts_") and plan.get("Actual Loops"):
+        found.add(name)
+    for child in plan.get("Plans", []):
+        found |= scanned_partitions(child)
+    return found
+
+
+def check_partition_pruning(statements):
+    """
+    以 EXPLAIN ANALYZE 執行每個查詢，檢查只讀取了最近幾個月的分區
+    （較舊的分區與 posts_default 應被排除或不被執行）。回傳 [(statement, [分區])]。
+    """
+    start, end = recent_months()
+    allowed = set()
+    month = start
+    while month < end:
+        allowed.add(partition_name(month))
+        month = add_months(month, 1)
+
+    failures = []
+    with db.engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql(
+                "EXPLAIN (ANALYZE, FORMAT JSON) " + statement, parameters
+            ).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            extra = scanned_partitions(plan[0]["Plan"]) - allowed
+            if extra:
+                failures.append((statement, sorted(extra)))
+        conn.rollback()
+    return failures
@@ -0,0 +1,119 @@
+import time
+from bisect import bisect_left, insort
+from threading import Lock
+from .models import Group
+from .versions import versions, LEADERBOARD
+
+
+class Leaderboard:
+    """
+    排行榜：在記憶體中維護分數最高的 capacity 個群組，
+    以 (-group_score, -group_id) 排序，讀取成本只與回傳筆數有關。
+    載入時記下 leaderboard 的版本號，版本號改變（其他 worker 或行程的寫入）即重新載入。
+    """
+
+    def __init__(self, app=None):
+        self.capacity = 200
+        self.ttl = 60
+        self._keys = []  # 已排序的 (-group_score, -group_id)
+        self._entries = {}  # group_id -> group.to_dict()
+        self._complete = False  # 是否已涵蓋所有群組
+        self._loaded_at = None
+        self._version = None
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.capacity = app.config.get("LEADERBOARD_CAPACITY", self.capacity)
+        self.ttl = app.config.get("LEADERBOARD_TTL", self.ttl)
+
+    def top(self, limit=20, offset=0):
+        """
+        回傳排名第 offset 起的 limit 個群組。
+        """
+        if offset + limit > self.capacity:
+            groups = (
+                self._ranked_query().offset(offset).limit(limit).all()
+            )
+            return [group.to_dict() for group in groups]
+
+        self._ensure_loaded()
+        with self._lock:
+            return [
+                self._entries[-negated_id]
+                for _, negated_id in self._keys[offset : offset + limit]
+            ]
+
+    def update(self, group_id, group_name, group_score, created_time):
+        """
+        群組分數變動或新建群組時呼叫，就地調整排名。
+        """
+        with self._lock:
+            if self._loaded_at is None:
+                return
+
+            entry = self._entries.get(group_id)
+            if entry is not None:
+                old_key = (-entry["group_score"], -group_id)
+                del self._keys[bisect_left(self._keys, old_key)]
+
+            key = (-group_score, -group_id)
+            if not self._complete and self._keys and key > self._keys[-1]:
+                if entry is not None:
+                    # 分數下降後可能被未載入的群組超越，下次讀取時重新載入
+                    del self._entries[group_id]
+                    self._loaded_at = None
+                return
+
+            insort(self._keys, key)
+            self._entries[group_id] = {
+                "group_id": group_id,
+                "group_name": group_name,
+                "group_score": group_score,
+                "created_time": created_time.isoformat(),
+            }
+            while len(self._keys) > self.capacity:
+                _, negated_id = self._keys.pop()
+                del self._entries[-negated_id]
+                self._complete = False
+
+    def advance(self, version):
+        """
+        以 update() 就地套用本 worker 的寫入並遞增版本號後呼叫：
+        期間沒有其他寫入（版本號恰好加一）時，快取與新版本一致，不必重新載入。
+        """
+        epoch, number = version
+        with self._lock:
+            if self._version == (epoch, number - 1):
+                self._version = version
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self):
+        version = versions.current(LEADERBOARD)
+        loaded_at = self._loaded_at
+        if (
+            loaded_at is not None
+            and time.monotonic() - loaded_at < self.ttl
+            and self._version == version
+        ):
+            return
+
+        groups = self._ranked_query().limit(self.capacity).all()
+
+        with self._lock:
+            self._entries = {group.group_id: group.to_dict() for group in groups}
+            self._keys = [(-group.group_score, -group.group_id) for group in groups]
+            self._complete = len(groups) < self.capacity
+            self._loaded_at = time.monotonic()
+            self._version = version
+
+    @staticmethod
+    def _ranked_query():
+        return Group.query.order_by(Group.group_score.desc(), Group.group_id.desc())
+
+
+leaderboard = Leaderboard()
@@ -0,0 +1,223 @@
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from threading import Lock
+from sqlalchemy import select, func, tuple_
+from .extensions import db
+from .metrics import registry
+from .models import Post
+
+# 設定 5 分鐘內不能重複打卡
+CHECKIN_INTERVAL = timedelta(minutes=5)
+
+decisions = registry.counter(
+    "checkin_limiter_decisions_total",
+    "Check-in limiter decisions by outcome and the source that decided",
+    ["outcome", "source"],
+)
+fallback_queries = registry.counter(
+    "checkin_limiter_fallback_queries_total",
+    "Last-post lookups made because the limiter could not decide from its backend",
+)
+
+
+class MemoryBackend:
+    """
+    單一 worker 內的限制表：key -> 可再次打卡的時間（epoch 秒）。
+    過期項目依插入順序清除，超過 max_entries 時提早淘汰最舊的項目。
+    """
+
+    def __init__(self, window, max_entries):
+        self.window = window
+        self.max_entries = max_entries
+        self._until = OrderedDict()
+        # 在此時間之前，查無項目不代表可以打卡（剛啟動或有項目被提早淘汰）
+        self._trusted_after = time.time() + window
+        self._lock = Lock()
+
+    def reserve(self, key, until, now):
+        """
+        若 key 不在限制中則記錄 until 並回傳 None，否則回傳既有的 until。
+        """
+        with self._lock:
+            self._expire(now)
+            held = self._until.get(key)
+            if held is not None and held > now:
+                return held
+            self._until[key] = until
+            self._until.move_to_end(key)
+            while len(self._until) > self.max_entries:
+                _, evicted = self._until.popitem(last=False)
+                self._trusted_after = max(self._trusted_after, evicted)
+            return None
+
+    def hold(self, key, until):
+        with self._lock:
+            self._until[key] = until
+
+    def release(self, key):
+        with self._lock:
+            self._until.pop(key, None)
+
+    def trusted(self, now):
+        return now >= self._trusted_after
+
+    def clear(self):
+        with self._lock:
+            self._until.clear()
+            self._trusted_after = time.time() + self.window
+
+    def __len__(self):
+        return len(self._until)
+
+    def _expire(self, now):
+        while self._until:
+            key, until = next(iter(self._until.items()))
+            if until > now:
+                break
+            del self._until[key]
+
+
+class RedisBackend:
+    """
+    多個 worker 共用的限制表：以 SET NX 原子地保留 key，由 Redis 的 TTL 負責清除。
+    """
+
+    def __init__(self, url, window, prefix="checkin"):
+        import redis
+
+        self.window = window
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+        self._since = None
+
+    def reserve(self, key, until, now):
+        name = self._name(key)
+        if self._redis.set(name, until, nx=True, px=self._ttl(until, now)):
+            return None
+        held = self._redis.get(name)
+        if held is None:
+            # 剛好在兩次呼叫之間過期
+            return self.reserve(key, until, now)
+        return float(held)
+
+    def hold(self, key, until):
+        now = time.time()
+        if until > now:
+            self._redis.set(self._name(key), until, px=self._ttl(until, now))
+
+    def release(self, key):
+        self._redis.delete(self._name(key))
+
+    def trusted(self, now):
+        if self._since is None:
+            # 記錄共用限制表開始運作的時間，所有 worker 以同一個時間判斷是否已暖機
+            name = f"{self.prefix}:since"
+            self._redis.set(name, now, nx=True)
+            self._since = float(self._redis.get(name))
+        return now >= self._since + self.window
+
+    def clear(self):
+        for name in self._redis.scan_iter(f"{self.prefix}:*"):
+            self._redis.delete(name)
+        self._since = None
+
+    def _name(self, key):
+        user_id, group_id = key
+        return f"{self.prefix}:{group_id}:{user_id}"
+
+    @staticmethod
+    def _ttl(until, now):
+        return max(1, int((until - now) * 1000))
+
+
+class CheckinLimiter:
+    """
+    打卡頻率限制：同一使用者在同一群組 CHECKIN_INTERVAL 內只能打卡一次。
+    拒絕的請求只查記憶體（或 Redis）；限制表不是所有 worker 共用，或還無法代表
+    所有打卡紀錄時（剛啟動、項目被提早淘汰），才查詢最後一次打卡時間。
+    """
+
+    def __init__(self, app=None):
+        self.window = CHECKIN_INTERVAL
+        self.authoritative = False
+        self.backend = MemoryBackend(self.window.total_seconds(), 100_000)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        window = self.window.total_seconds()
+        url = app.config.get("CHECKIN_LIMITER_URL")
+        if url:
+            self.backend = RedisBackend(url, window)
+        else:
+            self.backend = MemoryBackend(
+                window, app.config.get("CHECKIN_LIMITER_MAX_ENTRIES", 100_000)
+            )
+        # 只有共用的限制表能代表所有 worker 的打卡；記憶體限制表預設仍查詢資料庫
+        authoritative = app.config.get("CHECKIN_LIMITER_AUTHORITATIVE")
+        workers = app.config.get("WEB_CONCURRENCY", 1)
+        if authoritative and not url and workers > 1:
+            raise RuntimeError(
+                f"WEB_CONCURRENCY={workers} requires CHECKIN_LIMITER_URL when "
+                "CHECKIN_LIMITER_AUTHORITATIVE is true: per-worker limiters "
+                "would let check-ins on other workers bypass the interval."
+            )
+        self.authoritative = bool(url) if authoritative is None else authoritative
+
+    def acquire(self, user_id, group_id, now):
+        """
+        嘗試保留一次打卡。可以打卡時回傳 None，否則回傳還需等待的秒數。
+        打卡最後沒有寫入時需呼叫 release。
+        """
+        return self.acquire_many([(user_id, group_id)], now).get((user_id, group_id))
+
+    def acquire_many(self, pairs, now):
+        """
+        批次保留打卡，回傳被拒絕的 {(user_id, group_id): 還需等待的秒數}。
+        需要查詢資料庫的 pair 以單一查詢一併確認。
+        """
+        timestamp = now.timestamp()
+        until = timestamp + self.window.total_seconds()
+        rejected = {}
+        unverified = []
+        for pair in pairs:
+            held = self.backend.reserve(pair, until, timestamp)
+            if held is not None:
+                decisions.inc(outcome="rejected", source="limiter")
+                rejected[pair] = held - timestamp
+            elif self.authoritative and self.backend.trusted(timestamp):
+                decisions.inc(outcome="accepted", source="limiter")
+            else:
+                unverified.append(pair)
+
+        if unverified:
+            fallback_queries.inc()
+            # 時間條件放在 WHERE：只讀取視窗內的貼文，也只需掃描最近的分區
+            recent = db.session.execute(
+                select(Post.user_id, Post.group_id, func.max(Post.created_time))
+                .where(
+                    tuple_(Post.user_id, Post.group_id).in_(unverified),
+                    Post.created_time > now - self.window,
+                )
+                .group_by(Post.user_id, Post.group_id)
+            ).all()
+            for user_id, group_id, last_post in recent:
+                held = (last_post + self.window).timestamp()
+                self.backend.hold((user_id, group_id), held)
+                decisions.inc(outcome="rejected", source="database")
+                rejected[(user_id, group_id)] = held - timestamp
+            accepted = len(unverified) - len(recent)
+            if accepted:
+                decisions.inc(accepted, outcome="accepted", source="database")
+
+        return rejected
+
+    def release(self, user_id, group_id):
+        self.backend.release((user_id, group_id))
+
+    def reset(self):
+        self.backend.clear()
+
+
+checkin_limiter = CheckinLimiter()
@@ -0,0 +1,166 @@
+import logging
+import time
+from threading import Lock
+from flask_socketio import join_room, leave_room
+from .metrics import registry
+
+LEADERBOARD_ROOM = "leaderboard"
+
+emitted_messages = registry.counter(
+    "socketio_emits_total", "Socket.IO messages emitted", ["event"]
+)
+coalesced_updates = registry.counter(
+    "score_updates_coalesced_total",
+    "Score updates merged into a pending message before it was emitted",
+)
+emit_delay = registry.histogram(
+    "score_update_emit_delay_seconds",
+    "Time between the first pending score update and its emit",
+)
+flush_duration = registry.histogram(
+    "score_update_flush_seconds", "Time spent emitting one batch of score updates"
+)
+flush_size = registry.histogram(
+    "score_update_flush_groups",
+    "Groups emitted per flush",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250),
+)
+
+
+def group_room(group_id):
+    return f"group:{group_id}"
+
+
+class ScoreBroadcaster:
+    """
+    將分數更新送到群組與排行榜的訂閱房間。同一群組在 interval 秒內的多次更新
+    只會送出最新的一則。
+    """
+
+    def __init__(self):
+        self.interval = 1.0
+        self._socketio = None
+        self._pending = {}  # group_id -> (第一次更新的時間, payload)
+        self._lock = Lock()
+        self._flusher = None
+        self.logger = logging.getLogger(__name__)
+
+    def init_app(self, app, socketio):
+        self.interval = app.config.get("SCORE_BROADCAST_INTERVAL", self.interval)
+        self._socketio = socketio
+        self.logger = app.logger
+        socketio.on_event("subscribe", self.subscribe)
+        socketio.on_event("unsubscribe", self.unsubscribe)
+
+    @staticmethod
+    def _rooms(data):
+        """
+        客戶端 payload 對應的房間；格式不符時拋出 ValueError。
+        """
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            raise ValueError("Payload must be an object.")
+        rooms = []
+        group_id = data.get("group_id")
+        if group_id is not None:
+            if isinstance(group_id, bool) or not isinstance(group_id, (int, str)):
+                raise ValueError("group_id must be an integer.")
+            try:
+                rooms.append(group_room(int(group_id)))
+            except ValueError:
+                raise ValueError("group_id must be an integer.") from None
+        if data.get("leaderboard"):
+            rooms.append(LEADERBOARD_ROOM)
+        return rooms
+
+    def subscribe(self, data):
+        """
+        客戶端事件：{"group_id": 1} 訂閱群組，{"leaderboard": true} 訂閱排行榜。
+        """
+        try:
+            rooms = self._rooms(data)
+        except ValueError as e:
+            return {"error": str(e)}
+        for room in rooms:
+            join_room(room)
+        return {"subscribed": rooms}
+
+    def unsubscribe(self, data):
+        try:
+            rooms = self._rooms(data)
+        except ValueError as e:
+            return {"error": str(e)}
+        for room in rooms:
+            leave_room(room)
+        return {"unsubscribed": rooms}
+
+    def publish(self, group_id, group_name, group_score):
+        payload = {
+            "group_id": group_id,
+            "group_name": group_name,
+            "group_score": group_score,
+        }
+        with self._lock:
+            pending = self._pending.get(group_id)
+            if pending is None:
+                self._pending[group_id] = (time.monotonic(), payload)
+            else:
+                coalesced_updates.inc()
+                if group_score >= pending[1]["group_score"]:
+                    self._pending[group_id] = (pending[0], payload)
+            if self._flusher is None and self._socketio is not None:
+                self._flusher = self._socketio.start_background_task(self._run)
+
+    def publish_posts(self, group_id, posts):
+        """
+        新貼文立即送到群組房間（new_post），訂閱者不必重新讀取整個群組。
+        在背景工作中送出，訊息佇列的錯誤不會讓已寫入的打卡失敗。
+        """
+        if self._socketio is None or not posts:
+            return
+        self._socketio.start_background_task(self._emit_posts, group_id, posts)
+
+    def _emit_posts(self, group_id, posts):
+        try:
+            self._socketio.emit(
+                "new_post",
+                {"group_id": group_id, "posts": posts},
+                namespace="/",
+                to=group_room(group_id),
+            )
+        except Exception:
+            self.logger.exception("new_post emit failed for group %s", group_id)
+            return
+        emitted_messages.inc(event="new_post")
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        started = time.monotonic()
+        for group_id, (first_seen, payload) in pending.items():
+            self._socketio.emit(
+                "score_update",
+                payload,
+                namespace="/",
+                to=[group_room(group_id), LEADERBOARD_ROOM],
+            )
+            emitted_messages.inc(event="score_update")
+            emit_delay.observe(time.monotonic() - first_seen)
+        flush_duration.observe(time.monotonic() - started)
+        flush_size.observe(len(pending))
+
+    def _run(self):
+        while True:
+            self._socketio.sleep(self.interval)
+            # 單次送出失敗（例如訊息佇列無法連線）不能結束背景工作，否則之後不再推播
+            try:
+                self.flush()
+            except Exception:
+                self.logger.exception("Score update flush failed")
+
+
+score_broadcaster = ScoreBroadcaster()
@@ -0,0 +1,141 @@
+from collections import Counter
+from sqlalchemy import select, update, values, column, func, Integer
+from .extensions import db
+from .group_detail import group_details
+from .history import record_score_changes
+from .models import Group, UserGroup, Post
+from .ranking import leaderboard
+from .scoring import compute_score, today_start, score_engine
+from .versions import versions, group_key, LEADERBOARD, DIRECTORY, SCORES
+
+
+def score_inputs(now=None):
+    """
+    以兩個集合查詢取得所有群組的計分輸入：
+    群組的目前分數、貼文時間範圍與今日加入人數，以及成員隊伍數的分佈。
+    回傳 {group_id: (目前分數, team_hist, first_post, last_post, joins_today)}。
+    """
+    day = today_start(now)
+    posts = (
+        select(
+            Post.group_id,
+            func.min(Post.created_time).label("first_post"),
+            func.max(Post.created_time).label("last_post"),
+        )
+        .group_by(Post.group_id)
+        .subquery()
+    )
+    joins = (
+        select(
+            UserGroup.group_id,
+            func.count().filter(UserGroup.joined_time >= day).label("joins_today"),
+        )
+        .group_by(UserGroup.group_id)
+        .subquery()
+    )
+    groups = db.session.execute(
+        select(
+            Group.group_id,
+            Group.group_score,
+            posts.c.first_post,
+            posts.c.last_post,
+            func.coalesce(joins.c.joins_today, 0),
+        )
+        .outerjoin(posts, posts.c.group_id == Group.group_id)
+        .outerjoin(joins, joins.c.group_id == Group.group_id)
+    ).all()
+
+    # 每位使用者參加的隊伍數，再依群組與隊伍數統計人數
+    teams = (
+        select(UserGroup.user_id, func.count().label("teams"))
+        .group_by(UserGroup.user_id)
+        .subquery()
+    )
+    hists = {}
+    for group_id, team_count, members in db.session.execute(
+        select(UserGroup.group_id, teams.c.teams, func.count())
+        .join(teams, teams.c.user_id == UserGroup.user_id)
+        .group_by(UserGroup.group_id, teams.c.teams)
+    ):
+        hists.setdefault(group_id, Counter())[team_count] = members
+
+    return {
+        group_id: (score, hists.get(group_id, Counter()), first, last, joins_today)
+        for group_id, score, first, last, joins_today in groups
+    }
+
+
+def recompute_all(now=None):
+    """
+    以與 ScoreEngine 相同的公式計算所有群組的分數。
+    回傳 [(group_id, 目前分數, 計算出的分數)]，依 group_id 排序。
+    """
+    results = []
+    for group_id, (stored, hist, first, last, joins_today) in sorted(
+        score_inputs(now).items()
+    ):
+        weighted_users = sum(count / teams for teams, count in hist.items() if teams)
+        span = (last - first).total_seconds() if first and last else 0
+        results.append(
+            (group_id, stored, compute_score(weighted_users, span, joins_today))
+        )
+    return results
+
+
+def find_drift(results, lower=False):
+    """
+    需要修正的 [(group_id, 目前分數, 計算出的分數)]。group_score 只會被打卡提高
+    （見 pipeline.apply_score），高於公式的分數是正常的；只有 lower 為 True
+    （例如修改計分公式後）才把高於計算值的分數也列為差異。
+    """
+    return [
+        (group_id, stored, score)
+        for group_id, stored, score in results
+        if score > stored or (lower and score != stored)
+    ]
+
+
+def apply_corrections(corrections, batch_size=1000, lower=False):
+    """
+    以 UPDATE ... FROM (VALUES ...) 分批寫入 [(group_id, 目前分數, 新分數)]，
+    每批一個交易並記錄分數歷史。分數在計算後已被其他寫入改變的群組不覆寫；
+    lower 為 False 時以 GREATEST 寫入，分數只會提高。
+    執行中的伺服器經由共用的版本號（VERSION_COUNTER_URL）得知分數已修正，
+    捨棄 ScoreEngine、排行榜與群組快取。回傳實際更新的群組 id。
+    """
+    updated = []
+    for start in range(0, len(corrections), batch_size):
+        batch = corrections[start : start + batch_size]
+        rows = values(
+            column("group_id", Integer),
+            column("stored", Integer),
+            column("score", Integer),
+            name="corrections",
+        ).data(batch)
+        statement = (
+            update(Group)
+            .where(Group.group_id == rows.c.group_id)
+            .where(Group.group_score == rows.c.stored)
+        )
+        if lower:
+            statement = statement.values(group_score=rows.c.score)
+        else:
+            statement = statement.where(rows.c.score > Group.group_score).values(
+                group_score=func.greatest(Group.group_score, rows.c.score)
+            )
+        applied = db.session.execute(
+            statement.returning(Group.group_id)
+        ).scalars()
+        applied = set(applied)
+        record_score_changes(
+            [correction for correction in batch if correction[0] in applied]
+        )
+        db.session.commit()
+        updated.extend(sorted(applied))
+
+    if updated:
+        score_engine.invalidate()
+        group_details.invalidate()
+        leaderboard.invalidate()
+        versions.bump(*map(group_key, updated), LEADERBOARD, DIRECTORY, SCORES)
+    return updated
@@ -0,0 +1,113 @@
+import gzip
+import zlib
+import orjson
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli 為選用套件，未安裝時只提供 gzip
+    brotli = None
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+
+
+def dumps(data):
+    """
+    以 orjson 序列化；datetime 直接輸出 ISO 8601，不必先在每一列呼叫 isoformat()。
+    """
+    return orjson.dumps(data, option=OPTIONS)
+
+
+def iter_json(data, chunk_items):
+    """
+    分段產生 JSON：list 每 chunk_items 筆輸出一次，dict 中的 list 同樣分段，
+    讓大型列表邊序列化邊送出。
+    """
+    if isinstance(data, list):
+        yield b"["
+        for start in range(0, len(data), chunk_items):
+            chunk = orjson.dumps(data[start : start + chunk_items], option=OPTIONS)
+            # 去掉外層的 [ ] 與換行，接成同一個陣列
+            yield (b"," if start else b"") + chunk[1:-2]
+        yield b"]"
+    elif isinstance(data, dict):
+        yield b"{"
+        for index, (key, value) in enumerate(data.items()):
+            yield (b"," if index else b"") + orjson.dumps(str(key)) + b":"
+            if isinstance(value, (list, dict)):
+                yield from iter_json(value, chunk_items)
+            else:
+                yield orjson.dumps(value)
+        yield b"}"
+    else:
+        yield orjson.dumps(data)
+
+
+def item_count(data):
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict):
+        return sum(len(value) for value in data.values() if isinstance(value, list))
+    return 0
+
+
+def choose_encoding():
+    offered = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return request.accept_encodings.best_match(offered)
+
+
+def compress(body, encoding, config):
+    if encoding == "br":
+        return brotli.compress(body, quality=config.get("BROTLI_QUALITY", 4))
+    return gzip.compress(body, compresslevel=config.get("GZIP_LEVEL", 6))
+
+
+def compress_stream(chunks, encoding, config):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=config.get("BROTLI_QUALITY", 4))
+        for chunk in chunks:
+            yield compressor.process(chunk)
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(
+        config.get("GZIP_LEVEL", 6), zlib.DEFLATED, 16 + zlib.MAX_WBITS
+    )
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def output_json(data, code, headers=None):
+    """
+    flask_restful 的 JSON representation：以 orjson 序列化，
+    列表筆數超過 JSON_STREAM_MIN_ITEMS 時分段送出，
+    大於 COMPRESS_MIN_SIZE 的回應依 Accept-Encoding 以 brotli 或 gzip 壓縮。
+    """
+    config = current_app.config
+    encoding = choose_encoding()
+
+    if item_count(data) >= config.get("JSON_STREAM_MIN_ITEMS", 500):
+        chunks = iter_json(data, config.get("JSON_STREAM_CHUNK_ITEMS", 200))
+        if encoding:
+            chunks = compress_stream(chunks, encoding, config)
+        response = current_app.response_class(
+            chunks, status=code, mimetype="application/json"
+        )
+    else:
+        body = dumps(data)
+        if len(body) < config.get("COMPRESS_MIN_SIZE", 1024):
+            encoding = None
+        elif encoding:
+            body = compress(body, encoding, config)
+        response = current_app.response_class(
+            body, status=code, mimetype="application/json"
+        )
+
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.headers.extend(headers or {})
+    return response
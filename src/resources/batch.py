@@ -0,0 +1,107 @@
+import orjson
+from flask import request, current_app
+from flask_restful import Resource
+from werkzeug.exceptions import HTTPException
+from src.extensions import db
+
+# 子請求回應中保留的標頭，其餘（Content-Type、Vary 等）由外層回應決定
+FORWARDED_HEADERS = ("ETag", "X-Next-Cursor", "Cache-Control")
+
+
+def _sub_request(item):
+    """
+    驗證一筆子請求，回傳 (path, If-None-Match)；格式不符時回傳 None。
+    """
+    if not isinstance(item, dict) or not isinstance(item.get("path"), str):
+        return None
+    path = item["path"]
+    etag = item.get("etag")
+    if not path.startswith("/api/") or (etag is not None and not isinstance(etag, str)):
+        return None
+    return path, etag
+
+
+def _dispatch(path, etag):
+    """
+    在外層請求的 app context 中執行一個 GET 子請求：與外層共用 db.session
+    （已載入的資料列直接取自 identity map）與已通過驗證的 g.user_id，
+    before_request 與 after_request 不再逐筆執行。回傳 (status, headers, body)。
+    """
+    app = current_app._get_current_object()
+    headers = {"If-None-Match": etag} if etag else {}
+    if "Authorization" in request.headers:
+        headers["Authorization"] = request.headers["Authorization"]
+
+    with app.test_request_context(
+        path, method="GET", headers=headers, base_url=request.host_url
+    ):
+        error = request.routing_exception
+        if error is not None:
+            return error.code, {}, {"message": error.description}
+        try:
+            response = app.make_response(app.dispatch_request())
+        except HTTPException as e:
+            # 交給 flask_restful 的錯誤處理，產生與單獨請求相同的 JSON 錯誤回應
+            response = app.make_response(app.handle_user_exception(e))
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("Batch sub-request %s failed", path)
+            return 500, {}, {"message": "Internal Server Error"}
+
+        body = response.get_data()
+        return (
+            response.status_code,
+            {
+                name: response.headers[name]
+                for name in FORWARDED_HEADERS
+                if name in response.headers
+            },
+            orjson.loads(body) if body else None,
+        )
+
+
+class BatchResource(Resource):
+    def post(self):
+        """
+        合併多個 GET：{"requests": [{"path": "/api/groups/u1"},
+        {"path": "/api/posts/1/u1?limit=20", "etag": "\\"...\\""}, ...]}。
+        依序回傳每一筆的 status、headers 與 body；相同的子請求只執行一次，
+        帶 etag 且內容未變時該筆回應 304、body 為 null。
+        """
+        body = request.get_json(silent=True)
+        items = body.get("requests") if isinstance(body, dict) else None
+        if not isinstance(items, list) or not items:
+            return {"message": "requests must be a non-empty array."}, 400
+
+        limit = current_app.config.get("BATCH_MAX_REQUESTS", 50)
+        if len(items) > limit:
+            return {"message": f"At most {limit} requests per batch."}, 400
+
+        results = {}  # (path, etag) -> (status, headers, body)
+        responses = []
+        for index, item in enumerate(items):
+            key = _sub_request(item)
+            if key is None:
+                responses.append(
+                    {
+                        "index": index,
+                        "status": 400,
+                        "headers": {},
+                        "body": {"message": "path must be an /api/ path."},
+                    }
+                )
+                continue
+            if key not in results:
+                results[key] = _dispatch(*key)
+            status, headers, data = results[key]
+            responses.append(
+                {
+                    "index": index,
+                    "path": key[0],
+                    "status": status,
+                    "headers": headers,
+                    "body": data,
+                }
+            )
+
+        return {"responses": responses}, 200
@@ -0,0 +1,292 @@
+from datetime import datetime
+from flask import request, current_app
+from flask_restful import Resource
+from sqlalchemy import select, update, values, column, tuple_, Integer
+from sqlalchemy.dialects.postgresql import insert
+from src.extensions import db
+from src.models import User, Group, UserGroup, Post
+from src.scoring import score_engine
+from src.group_detail import group_details
+from src.pipeline import score_pipeline
+from src.ratelimit import checkin_limiter
+from src.realtime import score_broadcaster
+from src.versions import versions, group_key, DIRECTORY
+
+
+def _items(key):
+    """
+    讀取 JSON body 中的陣列，格式不符或超過上限時回傳 (None, 錯誤回應)。
+    """
+    body = request.get_json(silent=True)
+    items = body.get(key) if isinstance(body, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, ({"message": f"{key} must be a non-empty array."}, 400)
+
+    limit = current_app.config.get("BULK_MAX_ITEMS", 500)
+    if len(items) > limit:
+        return None, ({"message": f"At most {limit} {key} per request."}, 400)
+    return items, None
+
+
+def _pair(item):
+    if (
+        not isinstance(item, dict)
+        or not isinstance(item.get("user_id"), str)
+        or not isinstance(item.get("group_id"), int)
+        or isinstance(item.get("group_id"), bool)
+    ):
+        return None
+    return item["user_id"], item["group_id"]
+
+
+def _result(index, status, message, **extra):
+    return {"index": index, "status": status, "message": message, **extra}
+
+
+def _existing(pairs):
+    """
+    以一次查詢取得使用者、群組是否存在與既有的成員關係。
+    """
+    user_ids = {user_id for user_id, _ in pairs}
+    group_ids = {group_id for _, group_id in pairs}
+    users = set(
+        db.session.scalars(select(User.user_id).where(User.user_id.in_(user_ids)))
+    )
+    groups = set(
+        db.session.scalars(select(Group.group_id).where(Group.group_id.in_(group_ids)))
+    )
+    memberships = set(
+        db.session.execute(
+            select(UserGroup.user_id, UserGroup.group_id).where(
+                tuple_(UserGroup.user_id, UserGroup.group_id).in_(pairs)
+            )
+        ).tuples()
+    )
+    return users, groups, memberships
+
+
+def _after_commit(group_ids, *keys):
+    # 每個受影響的群組只清除快取、遞增版本號與重算分數一次
+    versions.bump(*(group_key(group_id) for group_id in group_ids), *keys)
+    for group_id in group_ids:
+        group_details.invalidate(group_id)
+        score_pipeline.submit(group_id)
+
+
+class BulkMembershipResource(Resource):
+    def post(self):
+        """
+        批次加入群組：{"memberships": [{"user_id": ..., "group_id": ...}, ...]}。
+        以集合查詢驗證、單一交易多列寫入，並回傳每一筆的結果。
+        """
+        items, error = _items("memberships")
+        if error:
+            return error
+
+        results = [None] * len(items)
+        candidates = {}  # (user_id, group_id) -> index
+        for index, item in enumerate(items):
+            pair = _pair(item)
+            if pair is None:
+                results[index] = _result(
+                    index, 400, "user_id and group_id are required."
+                )
+            elif pair in candidates:
+                results[index] = _result(index, 400, "Duplicate membership in request.")
+            else:
+                candidates[pair] = index
+
+        if candidates:
+            users, groups, memberships = _existing(list(candidates))
+            for pair, index in list(candidates.items()):
+                user_id, group_id = pair
+                if user_id not in users:
+                    results[index] = _result(index, 404, "User not found.")
+                elif group_id not in groups:
+                    results[index] = _result(index, 404, "Group not found.")
+                elif pair in memberships:
+                    results[index] = _result(
+                        index, 400, "User already joined this group."
+                    )
+                else:
+                    continue
+                del candidates[pair]
+
+        inserted = []
+        if candidates:
+            joined_time = datetime.now()
+            inserted = db.session.execute(
+                insert(UserGroup)
+                .values(
+                    [
+                        {
+                            "user_id": user_id,
+                            "group_id": group_id,
+                            "joined_time": joined_time,
+                        }
+                        for user_id, group_id in candidates
+                    ]
+                )
+                .on_conflict_do_nothing()
+                .returning(UserGroup.user_id, UserGroup.group_id)
+            ).all()
+
+            added = {}
+            for user_id, group_id in inserted:
+                added[group_id] = added.get(group_id, 0) + 1
+            if added:
+                counts = values(
+                    column("group_id", Integer), column("added", Integer), name="added"
+                ).data(list(added.items()))
+                db.session.execute(
+                    update(Group)
+                    .where(Group.group_id == counts.c.group_id)
+                    .values(member_count=Group.member_count + counts.c.added)
+                )
+            db.session.commit()
+
+            # 已加入：之後的計分、快取與版本號失敗只記錄，不讓請求失敗
+            try:
+                # 每位成員的隊伍數在 commit 後以一次查詢取得，不逐筆遞增
+                score_engine.record_joins(list(map(tuple, inserted)), joined_time)
+                _after_commit(added, DIRECTORY)
+            except Exception:
+                current_app.logger.exception(
+                    "Post-commit updates failed for groups %s", sorted(added)
+                )
+
+        inserted = set(map(tuple, inserted))
+        for pair, index in candidates.items():
+            if pair in inserted:
+                results[index] = _result(
+                    index,
+                    201,
+                    "User joined the group successfully.",
+                    user_id=pair[0],
+                    group_id=pair[1],
+                )
+            else:
+                # 與其他請求同時加入而被 ON CONFLICT 略過
+                results[index] = _result(index, 400, "User already joined this group.")
+
+        return {"results": results}, 200
+
+
+class BulkPostResource(Resource):
+    def post(self):
+        """
+        批次打卡：{"posts": [{"user_id": ..., "group_id": ..., "content": ...}, ...]}。
+        5 分鐘限制由 checkin_limiter 判斷，成員資格以集合查詢檢查，
+        通過的貼文以單一 INSERT 寫入。
+        """
+        items, error = _items("posts")
+        if error:
+            return error
+
+        results = [None] * len(items)
+        candidates = {}  # (user_id, group_id) -> (index, content)
+        for index, item in enumerate(items):
+            pair = _pair(item)
+            content = item.get("content") if isinstance(item, dict) else None
+            if pair is None or not isinstance(content, str) or not content:
+                results[index] = _result(
+                    index, 400, "user_id, group_id and content are required."
+                )
+            elif pair in candidates:
+                results[index] = _result(
+                    index, 403, "You cannot post again within 5 minutes."
+                )
+            else:
+                candidates[pair] = (index, content)
+
+        now = datetime.now()
+        if candidates:
+            # 先在頻率限制中保留，被拒絕的項目不必再查詢資料庫
+            rejected = checkin_limiter.acquire_many(list(candidates), now)
+            for pair in rejected:
+                index, _ = candidates.pop(pair)
+                results[index] = _result(
+                    index, 403, "You cannot post again within 5 minutes."
+                )
+
+        if candidates:
+            # 成員資格與推播 new_post 需要的使用者名稱一併查詢
+            memberships = {
+                (user_id, group_id): name
+                for user_id, group_id, name in db.session.execute(
+                    select(UserGroup.user_id, UserGroup.group_id, User.name)
+                    .join(User, User.user_id == UserGroup.user_id)
+                    .where(
+                        tuple_(UserGroup.user_id, UserGroup.group_id).in_(
+                            list(candidates)
+                        )
+                    )
+                )
+            }
+            for pair, (index, _) in list(candidates.items()):
+                if pair not in memberships:
+                    checkin_limiter.release(*pair)
+                    results[index] = _result(
+                        index, 403, "User is not a member of this group."
+                    )
+                    del candidates[pair]
+
+        if candidates:
+            try:
+                rows = self._insert(candidates, now)
+            except Exception:
+                for pair in candidates:
+                    checkin_limiter.release(*pair)
+                raise
+
+            # 打卡已寫入：之後的計分、快取與版本號失敗只記錄，不讓請求失敗
+            group_ids = {row.group_id for row in rows}
+            try:
+                for group_id in group_ids:
+                    score_engine.record_post(group_id, now)
+                _after_commit(group_ids)
+            except Exception:
+                current_app.logger.exception(
+                    "Post-commit updates failed for groups %s", sorted(group_ids)
+                )
+
+            published = {}  # group_id -> 新貼文
+            for row in rows:
+                index, content = candidates[(row.user_id, row.group_id)]
+                post = {
+                    "post_id": row.post_id,
+                    "user_id": row.user_id,
+                    "group_id": row.group_id,
+                    "content": content,
+                    "created_time": now.isoformat(),
+                }
+                results[index] = _result(
+                    index, 201, "Post created successfully.", post=post
+                )
+                published.setdefault(row.group_id, []).append(
+                    {**post, "user_name": memberships[(row.user_id, row.group_id)]}
+                )
+            for group_id, posts in published.items():
+                score_broadcaster.publish_posts(group_id, posts)
+
+        return {"results": results}, 200
+
+    @staticmethod
+    def _insert(candidates, now):
+        rows = db.session.execute(
+            insert(Post)
+            .values(
+                [
+                    {
+                        "user_id": user_id,
+                        "group_id": group_id,
+                        "content": content,
+                        "created_time": now,
+                    }
+                    for (user_id, group_id), (_, content) in candidates.items()
+                ]
+            )
+            .returning(Post.post_id, Post.user_id, Post.group_id)
+        ).all()
+        db.session.commit()
+        return rows
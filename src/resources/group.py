@@ -1,201 +1,200 @@
-from sqlalchemy import func, exists
+from sqlalchemy import tuple_
 from flask_restful import Resource, reqparse
 from src.extensions import db
-from src.models import User, Group, UserGroup, Post
+from src.pagination import parse_page_args, encode_cursor
+from src.memberships import join_group, create_group
+from src.group_detail import group_details
+from src.models import User, Group, UserGroup
+from src.scoring import score_engine
+from src.ranking import leaderboard
+from src.search import group_search, MAX_QUERY_LENGTH, MAX_LIMIT
+from src.versions import (
+    versions,
+    versioned,
+    group_key,
+    LEADERBOARD,
+    DIRECTORY,
+    GROUP_NAMES,
+)
+from datetime import datetime
 
 parser = reqparse.RequestParser()
 parser.add_argument(
     "group_name", type=str, required=True, help="Group name is required."
 )
 
+DIRECTORY_SORTS = {
+    "created": (Group.created_time, datetime),
+    "score": (Group.group_score, int),
+    "size": (Group.member_count, int),
+}
+
+search_parser = reqparse.RequestParser()
+search_parser.add_argument(
+    "q", type=str, required=True, location="args", help="Search query is required."
+)
+search_parser.add_argument("limit", type=int, default=20, location="args")
+
+directory_parser = reqparse.RequestParser()
+directory_parser.add_argument(
+    "sort",
+    type=str,
+    default="created",
+    choices=tuple(DIRECTORY_SORTS),
+    location="args",
+    help="Sort must be one of: created, score, size.",
+)
+
 
 class GroupResource(Resource):
+    @versioned("group:{group_id}")
     def get(self, group_id, user_id):
         """
-        列出指定群組中的所有貼文和成員，並標記使用者是否已有貼文。
+        列出指定群組中的貼文（以 cursor 分頁）和成員，並標記使用者是否已有貼文。
         """
-        target_group = Group.query.filter_by(group_id=group_id).first()
-        if not target_group:
-            return {"message": "Group not found."}, 404
-
-        members = (
-            db.session.query(
-                User.user_id,
-                User.name,
-                func.coalesce(func.max(Post.created_time), None).label(
-                    "last_post_time"
-                ),
-            )
-            .join(UserGroup, User.user_id == UserGroup.user_id)
-            .outerjoin(
-                Post, (Post.user_id == User.user_id) & (Post.group_id == group_id)
-            )
-            .filter(UserGroup.group_id == group_id)
-            .group_by(User.user_id)
-            .all()
-        )
-
-        print("members: ", members)
-        posts = (
-            db.session.query(
-                Post.post_id,
-                Post.content,
-                Post.created_time,
-                User.name.label("user_name"),
-            )
-            .join(User, User.user_id == Post.user_id)
-            .filter(Post.group_id == group_id)
-            .order_by(Post.created_time.desc())
-            .all()
-        )
-
-        print("posts: ", posts)
-
-        user_has_posts = db.session.query(
-            exists().where(Post.group_id == group_id).where(Post.user_id == user_id)
-        ).scalar()
-
-        print("user_has_posts: ", user_has_posts)
-
-        members_list = [
-            {
-                "user_id": member.user_id,
-                "name": member.name,
-                "last_post_time": (
-                    member.last_post_time.isoformat() if member.last_post_time else ""
-                ),
-            }
-            for member in members
-        ]
-
-        print("members_list: ", members_list)
-
-        posts_list = [
-            {
-                "post_id": post.post_id,
-                "user_name": post.user_name,
-                "content": post.content,
-                "created_time": post.created_time.isoformat(),
-            }
-            for post in posts
-        ]
+        try:
+            limit, after = parse_page_args(datetime, int)
+        except ValueError as e:
+            return {"message": str(e)}, 400
 
-        print("posts_list: ", posts_list)
+        detail = group_details.get(group_id, user_id, limit, after)
+        if detail is None:
+            return {"message": "Group not found."}, 404
 
-        return {
-            "group_id": group_id,
-            "group_name": target_group.group_name,
-            "group_score": target_group.group_score,
-            "posts": posts_list,
-            "members": members_list,
-            "has_user_posts": user_has_posts,
-        }, 200
+        return detail, 200
 
     def post(self, group_id, user_id):
         if group_id == 0:
-            # 創建新的群組
+            # 創建新的群組，並在同一個語句中將創建者加入
             args = parser.parse_args()
             group_name = args["group_name"]
-
-            # 檢查群組名稱是否已存在
-            existing_group = Group.query.filter_by(group_name=group_name).first()
-            if existing_group:
+            created_time = datetime.now()
+            new_group_id = create_group(group_name, user_id, created_time)
+            if new_group_id is None:
+                db.session.rollback()
+                if db.session.get(User, user_id) is None:
+                    return {"message": "User not found."}, 404
                 return {"message": "Group name already exists."}, 400
-
-            # 創建新群組
-            new_group = Group(group_name=group_name)
-            db.session.add(new_group)
             db.session.commit()
 
-            # 將創建者加入新群組
-            user_group_entry = UserGroup(user_id=user_id, group_id=new_group.group_id)
-            db.session.add(user_group_entry)
-            db.session.commit()
+            score_engine.record_join(user_id, new_group_id, created_time)
+            leaderboard.update(new_group_id, group_name, 0, created_time)
+            bumped = versions.bump(
+                group_key(new_group_id), LEADERBOARD, DIRECTORY, GROUP_NAMES
+            )
+            leaderboard.advance(bumped[LEADERBOARD])
+            group_search.add(new_group_id, group_name, bumped[GROUP_NAMES])
 
             return {
                 "message": "Group created successfully.",
                 "group": {
-                    "group_id": new_group.group_id,
-                    "group_name": new_group.group_name,
+                    "group_id": new_group_id,
+                    "group_name": group_name,
                     "group_score": 0,
                     "member_count": 1,
                 },
             }, 200
 
-        # 加入指定群組
-        target_group = Group.query.filter_by(group_id=group_id).first()
-        if not target_group:
-            return {"message": "Group not found."}, 404
-
-        # 檢查使用者是否已在群組中
-        existing_user_group = UserGroup.query.filter_by(
-            user_id=user_id, group_id=group_id
-        ).first()
-        if existing_user_group:
+        # 加入指定群組：已是成員時 ON CONFLICT DO NOTHING，不必先查詢
+        joined_time = datetime.now()
+        joined = join_group(user_id, group_id, joined_time)
+        if joined is None:
+            db.session.rollback()
+            if db.session.get(Group, group_id) is None:
+                return {"message": "Group not found."}, 404
+            if db.session.get(User, user_id) is None:
+                return {"message": "User not found."}, 404
             return {"message": "User is already in the group."}, 400
-
-        # 將使用者加入群組
-        user_group_entry = UserGroup(user_id=user_id, group_id=group_id)
-        db.session.add(user_group_entry)
         db.session.commit()
-
-        # 計算群組目前的人數
-        member_count = (
-            db.session.query(func.count(UserGroup.user_id))
-            .filter_by(group_id=group_id)
-            .scalar()
-        )
+        score_engine.record_join(user_id, group_id, joined_time)
+        group_details.invalidate(group_id)
+        versions.bump(group_key(group_id), DIRECTORY)
 
         return {
             "message": f"User {user_id} successfully added to group {group_id}.",
             "group": {
                 "group_id": group_id,
-                "group_name": target_group.group_name,
-                "member_count": member_count,
+                "group_name": joined.group_name,
+                "member_count": joined.member_count,
             },
         }, 200
 
 
 class GroupListResource(Resource):
+    @versioned(DIRECTORY)
     def get(self, user_id):
         """
-        列出所有群組，依照創建時間倒序排序，並標記該使用者是否已加入。
+        分頁列出群組（sort 可為 created、score 或 size，皆由大到小），並標記該使用者是否已加入。
+        下一頁的 cursor 放在 X-Next-Cursor 標頭。
         """
-        # 查詢所有群組及其會員數
-        groups_with_count = (
-            db.session.query(
-                Group.group_id,
-                Group.group_name,
-                Group.group_score,
-                Group.created_time,
-                func.count(UserGroup.user_id).label("member_count"),
-            )
-            .outerjoin(UserGroup, Group.group_id == UserGroup.group_id)
-            .group_by(Group.group_id, Group.group_name, Group.created_time)
-            .order_by(Group.created_time.desc())
-            .all()
+        sort = directory_parser.parse_args()["sort"]
+        sort_column, sort_type = DIRECTORY_SORTS[sort]
+        try:
+            limit, after = parse_page_args(sort_type, int)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        query = db.session.query(
+            Group.group_id,
+            Group.group_name,
+            Group.group_score,
+            Group.created_time,
+            Group.member_count,
         )
-
-        # 查詢指定 user_id 加入了哪些群組
-        joined_group_ids = set(
-            db.session.query(UserGroup.group_id)
-            .filter(UserGroup.user_id == user_id)
+        if after:
+            query = query.filter(tuple_(sort_column, Group.group_id) < tuple_(*after))
+        groups = (
+            query.order_by(sort_column.desc(), Group.group_id.desc())
+            .limit(limit + 1)
             .all()
         )
-        # 轉換成一維 set
-        joined_group_ids = {group_id for (group_id,) in joined_group_ids}
 
-        # 將結果轉為字典形式，並標記 is_joined
+        headers = {}
+        if len(groups) > limit:
+            groups = groups[:limit]
+            last = groups[-1]
+            headers["X-Next-Cursor"] = encode_cursor(
+                getattr(last, sort_column.key), last.group_id
+            )
+
+        # 只查詢該使用者在這一頁群組中的成員關係
+        joined_group_ids = {
+            group_id
+            for (group_id,) in db.session.query(UserGroup.group_id).filter(
+                UserGroup.user_id == user_id,
+                UserGroup.group_id.in_([group.group_id for group in groups]),
+            )
+        }
+
         result = [
             {
                 "group_id": group.group_id,
                 "group_name": group.group_name,
                 "group_score": group.group_score,
-                "created_time": group.created_time.isoformat(),
+                "created_time": group.created_time,
                 "member_count": group.member_count,
                 "is_joined": group.group_id in joined_group_ids,
             }
-            for group in groups_with_count
+            for group in groups
         ]
 
-        return result, 200
+        return result, 200, headers
+
+
+class GroupSearchResource(Resource):
+    @versioned(DIRECTORY)
+    def get(self, user_id):
+        """
+        依名稱搜尋群組（前綴相符優先，其次為相似的名稱），並標記該使用者是否已加入。
+        """
+        args = search_parser.parse_args()
+        query = args["q"].strip()
+        limit = args["limit"]
+        if not 1 <= len(query) <= MAX_QUERY_LENGTH:
+            return {
+                "message": f"q must be between 1 and {MAX_QUERY_LENGTH} characters."
+            }, 400
+        if not 1 <= limit <= MAX_LIMIT:
+            return {"message": f"limit must be between 1 and {MAX_LIMIT}."}, 400
+
+        return group_search.search(query, user_id, limit), 200
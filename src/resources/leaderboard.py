@@ -1,20 +1,27 @@
-from flask_restful import Resource
-from src.extensions import db
-from src.models import Group
+from flask_restful import Resource, reqparse
+from src.ranking import leaderboard
+from src.versions import versioned, LEADERBOARD
+
+parser = reqparse.RequestParser()
+parser.add_argument("limit", type=int, default=20, location="args")
+parser.add_argument("offset", type=int, default=0, location="args")
+
+MAX_LIMIT = 100
 
 
 class LeaderboardResource(Resource):
+    @versioned(LEADERBOARD)
     def get(self):
         """
-        列出所有群組，並返回每個群組的名稱與分數。
+        依分數由高到低列出群組，可用 limit 與 offset 分頁（預設前 20 名）。
         """
-        groups = Group.query.all()
-
-        if not groups:
-            return [], 200
+        args = parser.parse_args()
+        limit = args["limit"]
+        offset = args["offset"]
 
-        groups_sorted = sorted(
-            groups, key=lambda group: group.group_score, reverse=True
-        )
+        if not 1 <= limit <= MAX_LIMIT or offset < 0:
+            return {
+                "message": f"limit must be between 1 and {MAX_LIMIT}, offset must not be negative."
+            }, 400
 
-        return [group.to_dict() for group in groups_sorted[:20]], 200
+        return leaderboard.top(limit, offset), 200
@@ -1,114 +1,85 @@
-from flask_socketio import emit
-from sqlalchemy import func, exists
-from flask import g
+from flask import current_app
 from flask_restful import Resource, reqparse
+from sqlalchemy import select, literal, DateTime, Text
+from sqlalchemy.dialects.postgresql import insert
 from src.extensions import db
+from src.pagination import parse_page_args, decode_cursor
+from src.group_detail import group_details
 from src.models import User, Group, Post, UserGroup
-from datetime import datetime, timedelta
+from src.scoring import score_engine
+from src.pipeline import score_pipeline
+from src.ratelimit import checkin_limiter
+from src.realtime import score_broadcaster
+from src.versions import versions, versioned, group_key
+from datetime import datetime
 
 parser = reqparse.RequestParser()
 parser.add_argument(
     "content", type=str, required=True, help="Post content is required."
 )
 
+sync_parser = reqparse.RequestParser()
+sync_parser.add_argument("since", type=str, location="args")
+
 
 # 計算積分的函數
 def calculate_dynamic_score(group_id):
     """
     根據公式計算指定群組的分數，考慮會員多隊伍參與的權重：
     Score = T / (alpha * (S + 1)) + beta * N
+    T、S、N 由 score_engine 隨貼文與成員異動增量維護。
     """
-    alpha = 0.001
-    beta = 3000
-
-    user_groups = UserGroup.query.filter_by(group_id=group_id).all()
-    total_weighted_users = 0
-    for user_group in user_groups:
-        user_teams = UserGroup.query.filter_by(user_id=user_group.user_id).count()
-        total_weighted_users += 0 if user_teams == 0 else 1 / user_teams
-
-    T = total_weighted_users
-
-    first_post = (
-        Post.query.filter_by(group_id=group_id)
-        .order_by(Post.created_time.asc())
-        .first()
-    )
-    last_post = (
-        Post.query.filter_by(group_id=group_id)
-        .order_by(Post.created_time.desc())
-        .first()
-    )
-    if first_post and last_post:
-        S = (last_post.created_time - first_post.created_time).total_seconds()
-    else:
-        S = 0
-
-    N = (
-        UserGroup.query.filter_by(group_id=group_id)
-        .filter(
-            UserGroup.joined_time >= datetime.now().replace(hour=0, minute=0, second=0)
-        )
-        .count()
-    )
-
-    score = T / (alpha * (S + 1)) + beta * N
-
-    return int(round(score))
+    return score_engine.score(group_id)
 
 
 class PostResource(Resource):
     def post(self, group_id, user_id):
         """
-        在指定組別新增一個 post，並回傳計算後的分數。
-        排除同一個人短時間內多次打卡的情況。
+        在指定組別新增一個 post，並回傳群組目前的分數；新分數在背景計算，
+        提高時透過 score_update 推播。排除同一個人短時間內多次打卡的情況。
         """
         args = parser.parse_args()
 
-        user = User.query.get_or_404(user_id)
-        group = Group.query.get_or_404(group_id)
-
-        user_in_group = UserGroup.query.filter_by(
-            user_id=user_id, group_id=group_id
-        ).first()
-        if not user_in_group:
-            return {"message": "User is not a member of this group."}, 403
-
-        # 排除同一個人短時間內多次打卡
-        time_limit = timedelta(minutes=5)  # 設定 5 分鐘內不能重複打卡
-        last_post = (
-            Post.query.filter_by(user_id=user_id, group_id=group_id)
-            .order_by(Post.created_time.desc())
-            .first()
-        )
-
-        if last_post and datetime.now() - last_post.created_time < time_limit:
+        # 排除同一個人短時間內多次打卡：在記憶體中判斷，被拒絕的請求不查詢資料庫
+        created_time = datetime.now()
+        if checkin_limiter.acquire(user_id, group_id, created_time) is not None:
             return {"message": "You cannot post again within 5 minutes."}, 403
 
-        new_post = Post(user_id=user_id, group_id=group_id, content=args["content"])
-        db.session.add(new_post)
-        db.session.commit()
+        try:
+            row = self._insert(group_id, user_id, args["content"], created_time)
+        except Exception:
+            checkin_limiter.release(user_id, group_id)
+            raise
+        if row is None:
+            checkin_limiter.release(user_id, group_id)
+            User.query.get_or_404(user_id)
+            Group.query.get_or_404(group_id)
+            return {"message": "User is not a member of this group."}, 403
 
-        group_score = group.group_score
-        score = calculate_dynamic_score(group_id)
-        if score > group_score:
-            emit(
-                "score_update",
-                {
-                    "group_id": group_id,
-                    "group_name": group.group_name,
-                    "group_score": score,
-                },
-                namespace="/",
-                broadcast=True,
+        post_dict = {
+            "post_id": row.post_id,
+            "user_id": user_id,
+            "group_id": group_id,
+            "content": args["content"],
+            "created_time": created_time.isoformat(),
+            "user_name": row.name,
+        }
+        score = row.group_score
+        # 打卡已寫入：之後的快取、版本號與推播失敗只記錄，不讓請求失敗
+        try:
+            score_engine.record_post(group_id, created_time)
+            group_details.invalidate(group_id)
+            versions.bump(group_key(group_id))
+            score_broadcaster.publish_posts(group_id, [post_dict])
+
+            # 分數在背景重算，提高時透過 score_update 推播
+            recomputed = score_pipeline.submit(group_id)
+            if recomputed is not None:
+                score = recomputed
+        except Exception:
+            current_app.logger.exception(
+                "Post-commit updates failed for group %s", group_id
             )
-            group.group_score = score
-            db.session.commit()
-        else:
-            score = group_score
-
-        post_dict = new_post.to_dict()
-        post_dict["user_name"] = user.name
 
         return {
             "message": "Post created successfully.",
@@ -116,78 +87,61 @@ class PostResource(Resource):
             "score": score,
         }, 200
 
-
-class PostListResource(Resource):
-    def get(self, group_id, user_id):
+    @staticmethod
+    def _insert(group_id, user_id, content, created_time):
         """
-        列出指定群組中的所有貼文和成員，並標記使用者是否已有貼文。
+        以單一語句確認成員資格並寫入，同時取得回應需要的使用者名稱與目前分數。
+        不是成員時回傳 None。
         """
-        target_group = Group.query.filter_by(group_id=group_id).first()
-        if not target_group:
-            return {"message": "Group not found."}, 404
-
-        members = (
-            db.session.query(
-                User.user_id,
-                User.name,
-                func.coalesce(func.max(Post.created_time), None).label(
-                    "last_post_time"
-                ),
-            )
-            .join(UserGroup, User.user_id == UserGroup.user_id)
-            .outerjoin(
-                Post, (Post.user_id == User.user_id) & (Post.group_id == group_id)
+        inserted = (
+            insert(Post)
+            .from_select(
+                ["user_id", "group_id", "content", "created_time"],
+                select(
+                    UserGroup.user_id,
+                    UserGroup.group_id,
+                    literal(content, Text),
+                    literal(created_time, DateTime),
+                ).where(UserGroup.user_id == user_id, UserGroup.group_id == group_id),
             )
-            .filter(UserGroup.group_id == group_id)
-            .group_by(User.user_id)
-            .all()
+            .returning(Post.post_id, Post.user_id, Post.group_id)
+            .cte("inserted")
         )
+        row = db.session.execute(
+            select(inserted.c.post_id, User.name, Group.group_score)
+            .join(User, User.user_id == inserted.c.user_id)
+            .join(Group, Group.group_id == inserted.c.group_id)
+        ).one_or_none()
+        if row is None:
+            db.session.rollback()
+            return None
+        db.session.commit()
+        return row
 
-        posts = (
-            db.session.query(
-                Post.post_id,
-                Post.content,
-                Post.created_time,
-                User.name.label("user_name"),
-            )
-            .join(User, User.user_id == Post.user_id)
-            .filter(Post.group_id == group_id)
-            .order_by(Post.created_time.desc())
-            .all()
-        )
 
-        user_has_posts = db.session.query(
-            exists().where(Post.group_id == group_id).where(Post.user_id == user_id)
-        ).scalar()
-
-        members_list = [
-            {
-                "user_id": member.user_id,
-                "name": member.name,
-                "last_post_time": (
-                    member.last_post_time.isoformat() if member.last_post_time else ""
-                ),
-            }
-            for member in members
-        ]
-
-        posts_list = [
-            {
-                "post_id": post.post_id,
-                "user_name": post.user_name,
-                "content": post.content,
-                "created_time": post.created_time.isoformat(),
-            }
-            for post in posts
-        ]
-
-        print("posts_list: ", posts_list)
+class PostListResource(Resource):
+    @versioned("group:{group_id}")
+    def get(self, group_id, user_id):
+        """
+        列出指定群組中的貼文（以 cursor 分頁）和成員，並標記使用者是否已有貼文。
+        帶 since（上次回應的 watermark）時只回傳之後新增的貼文（由舊到新）
+        與加入或打卡的成員，以及新的 watermark。
+        """
+        since = sync_parser.parse_args()["since"]
+        try:
+            limit, after = parse_page_args(datetime, int)
+            if since:
+                if after:
+                    raise ValueError("cursor and since cannot be combined.")
+                since = decode_cursor(since, datetime, int)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        if since:
+            detail = group_details.delta(group_id, user_id, since, limit)
+        else:
+            detail = group_details.get(group_id, user_id, limit, after)
+        if detail is None:
+            return {"message": "Group not found."}, 404
 
-        return {
-            "group_id": group_id,
-            "group_name": target_group.group_name,
-            "group_score": target_group.group_score,
-            "posts": posts_list,
-            "members": members_list,
-            "has_user_posts": user_has_posts,
-        }, 200
+        return detail, 200
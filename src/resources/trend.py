@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+from flask_restful import Resource, reqparse
+from src.history import RESOLUTIONS, MAX_BUCKETS, default_resolution, score_trend
+from src.models import Group
+
+
+def _local_datetime(value):
+    """
+    解析 ISO 8601 時間。分數紀錄的時間沒有時區，帶時區的值無法與之比較。
+    """
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        raise ValueError("must be a local time without a timezone.")
+    return parsed
+
+
+parser = reqparse.RequestParser()
+parser.add_argument(
+    "resolution",
+    type=str,
+    choices=tuple(RESOLUTIONS),
+    location="args",
+    help="Resolution must be one of: minute, hour, day.",
+)
+parser.add_argument("start", type=_local_datetime, location="args")
+parser.add_argument("end", type=_local_datetime, location="args")
+
+DEFAULT_RANGE = timedelta(days=1)
+
+
+class ScoreTrendResource(Resource):
+    def get(self, group_id):
+        """
+        列出群組在 [start, end) 之間的分數走勢（預設最近一天），
+        每個區間包含 open、close、min、max 與變動次數；沒有變動的區間不列出。
+        """
+        args = parser.parse_args()
+        end = args["end"] or datetime.now()
+        start = args["start"] or end - DEFAULT_RANGE
+        if start >= end:
+            return {"message": "start must be earlier than end."}, 400
+
+        resolution = args["resolution"] or default_resolution(start, end)
+        if (end - start) / RESOLUTIONS[resolution] > MAX_BUCKETS:
+            return {
+                "message": f"Range covers more than {MAX_BUCKETS} {resolution} buckets."
+            }, 400
+
+        group = Group.query.get_or_404(group_id)
+
+        return {
+            "group_id": group_id,
+            "group_score": group.group_score,
+            "resolution": resolution,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "buckets": score_trend(group_id, start, end, resolution),
+        }, 200
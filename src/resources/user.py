@@ -1,9 +1,9 @@
 import secrets
 from flask import g
 from flask_restful import Resource, reqparse
-from werkzeug.security import check_password_hash, generate_password_hash
 from src.extensions import db
 from src.models import User
+from src.passwords import passwords, HasherBusy
 
 login_parser = reqparse.RequestParser()
 login_parser.add_argument(
@@ -31,7 +31,8 @@ register_parser.add_argument(
 
 class UserResource(Resource):
     def get(self, user_id):
-        user_id = g.user_id
+        # 啟用驗證時以 token 的 uid 為準；未啟用時沒有 g.user_id，使用路徑參數
+        user_id = g.get("user_id", user_id)
         user = User.query.get_or_404(user_id)
 
         return user.to_dict()
@@ -43,10 +44,15 @@ class UserResource(Resource):
         password = args["password"]
 
         user_id = secrets.token_urlsafe(21)
-        # hashed_password = generate_password_hash(password)
-        # hashed_password = generate_password_hash(password, method='pbkdf2:sha256', salt_length=8)
+        # 雜湊在原生執行緒中計算，不會卡住其他請求
+        try:
+            hashed_password = passwords.hash(password)
+        except HasherBusy:
+            return {"message": "Server is busy, please try again later."}, 503
 
-        new_user = User(user_id=user_id, account=account, name=name, password=password)
+        new_user = User(
+            user_id=user_id, account=account, name=name, password=hashed_password
+        )
 
         db.session.add(new_user)
         db.session.commit()
@@ -69,10 +75,18 @@ class LoginResource(Resource):
             return {"message": "Invalid account or password."}, 401
 
         # 驗證密碼
-        # if not check_password_hash(user.password, password):
-        #     return {"message": "Invalid account or password."}, 401
-        if user.password != password:
+        try:
+            valid, new_hash = passwords.verify(user.password, password)
+        except HasherBusy:
+            return {"message": "Server is busy, please try again later."}, 503
+        if not valid:
             return {"message": "Invalid account or password."}, 401
 
+        user_dict = user.to_dict()
+        if new_hash:
+            # 舊的明文密碼或雜湊成本已變更，登入成功時改存新的雜湊
+            user.password = new_hash
+            db.session.commit()
+
         # 登入成功，回傳使用者資訊
-        return {"message": "Login successful.", "user": user.to_dict()}, 200
+        return {"message": "Login successful.", "user": user_dict}, 200
@@ -1,6 +1,10 @@
 from flask_restful import Resource, reqparse
 from src.extensions import db
-from src.models import User, Group, UserGroup
+from src.models import User, Group
+from src.scoring import score_engine
+from src.group_detail import group_details
+from src.memberships import join_group, leave_group
+from src.versions import versions, group_key, DIRECTORY
 from datetime import datetime
 
 # 解析器設定
@@ -21,27 +25,47 @@ class UserGroupResource(Resource):
         user_id = args["user_id"]
         group_id = args["group_id"]
 
-        # 檢查使用者和群組是否存在
-        user = User.query.filter_by(user_id=user_id).first()
-        group = Group.query.filter_by(group_id=group_id).first()
-
-        if not user:
-            return {"message": "User not found."}, 404
-        if not group:
-            return {"message": "Group not found."}, 404
-
-        # 檢查是否已經加入過該群組
-        existing_relation = UserGroup.query.filter_by(user_id=user_id, group_id=group_id).first()
-        if existing_relation:
+        # 創建新的關聯紀錄；只有失敗時才查詢原因
+        joined_time = datetime.now()
+        joined = join_group(user_id, group_id, joined_time)
+        if joined is None:
+            db.session.rollback()
+            if db.session.get(User, user_id) is None:
+                return {"message": "User not found."}, 404
+            if db.session.get(Group, group_id) is None:
+                return {"message": "Group not found."}, 404
             return {"message": "User already joined this group."}, 400
-
-        # 創建新的關聯紀錄
-        new_relation = UserGroup(user_id=user_id, group_id=group_id, joined_time=datetime.now())
-        db.session.add(new_relation)
         db.session.commit()
+        score_engine.record_join(user_id, group_id, joined_time)
+        group_details.invalidate(group_id)
+        versions.bump(group_key(group_id), DIRECTORY)
 
         return {
             "message": "User joined the group successfully.",
             "user_id": user_id,
             "group_id": group_id,
         }, 201
+
+    def delete(self):
+        """
+        讓使用者退出指定群組，並在同一個交易中更新群組成員數。
+        """
+        args = join_parser.parse_args()
+        user_id = args["user_id"]
+        group_id = args["group_id"]
+
+        member_count = leave_group(user_id, group_id)
+        if member_count is None:
+            db.session.rollback()
+            return {"message": "User is not a member of this group."}, 404
+        db.session.commit()
+        score_engine.record_leave(user_id, group_id)
+        group_details.invalidate(group_id)
+        versions.bump(group_key(group_id), DIRECTORY)
+
+        return {
+            "message": "User left the group successfully.",
+            "user_id": user_id,
+            "group_id": group_id,
+            "member_count": member_count,
+        }, 200
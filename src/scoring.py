@@ -0,0 +1,331 @@
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from threading import Lock
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
+from .extensions import db
+from .models import UserGroup, Post
+from .months import recent_months
+from .versions import versions, SCORES
+
+ALPHA = 0.001
+BETA = 3000
+
+
+def compute_score(T, S, N):
+    """
+    Score = T / (alpha * (S + 1)) + beta * N
+    """
+    return int(round(T / (ALPHA * (S + 1)) + BETA * N))
+
+
+def today_start(now=None):
+    now = now or datetime.now()
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class GroupScoreState:
+    """
+    單一群組的計分輸入：成員隊伍數分佈 (T)、貼文時間跨度 (S) 與今日加入人數 (N)。
+    """
+
+    __slots__ = (
+        "members",
+        "team_hist",
+        "first_post",
+        "last_post",
+        "day",
+        "joins_today",
+        "loaded_at",
+    )
+
+    def __init__(self, first_post, last_post, loaded_at):
+        self.members = {}  # user_id -> joined_time
+        self.team_hist = Counter()  # 成員參加的隊伍數 -> 人數
+        self.first_post = first_post
+        self.last_post = last_post
+        self.day = today_start()
+        self.joins_today = 0
+        self.loaded_at = loaded_at
+
+    @property
+    def weighted_users(self):
+        return sum(count / teams for teams, count in self.team_hist.items() if teams)
+
+    @property
+    def span(self):
+        if self.first_post and self.last_post:
+            return (self.last_post - self.first_post).total_seconds()
+        return 0
+
+    def roll_day(self):
+        day = today_start()
+        if day != self.day:
+            self.day = day
+            self.joins_today = sum(
+                1 for joined_time in self.members.values() if joined_time >= day
+            )
+
+
+class ScoreEngine:
+    """
+    增量計分引擎：以貼文與成員異動維護各群組的 T、S、N，
+    打卡時不必再逐一查詢每位成員的隊伍數。scores 的版本號改變時
+    （其他行程整批修正了分數）捨棄所有已載入的群組。
+
+    成員異動後以 commit 之後查詢的隊伍數覆寫，而不是遞增或遞減：同時進行的
+    加入與退出可能已被查詢計入。每次查詢前取得遞增的序號，查詢在 commit 之後，
+    序號較大的結果必然包含序號較小者已 commit 的異動，因此只套用序號較新的結果。
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 300
+        self.max_groups = 1024
+        self._groups = OrderedDict()  # group_id -> GroupScoreState
+        self._teams = {}  # user_id -> 參加的隊伍數（僅限已載入群組的成員）
+        self._user_groups = {}  # user_id -> 已載入且包含該成員的 group_id
+        self._tickets = {}  # user_id -> 目前隊伍數來自的查詢序號
+        self._ticket = 0  # 最近一次發出的查詢序號
+        self._floor = 0  # 此序號以前的查詢結果已因清除而失效
+        self._version = None
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get("SCORE_ENGINE_TTL", self.ttl)
+        self.max_groups = app.config.get("SCORE_ENGINE_MAX_GROUPS", self.max_groups)
+
+    def score(self, group_id):
+        """
+        回傳指定群組目前的分數，僅在群組尚未載入或過期時查詢資料庫。
+        """
+        state = self._state(group_id)
+        with self._lock:
+            state.roll_day()
+            return compute_score(state.weighted_users, state.span, state.joins_today)
+
+    def record_post(self, group_id, created_time):
+        with self._lock:
+            state = self._groups.get(group_id)
+            if state is None:
+                return
+            if state.first_post is None or created_time < state.first_post:
+                state.first_post = created_time
+            if state.last_post is None or created_time > state.last_post:
+                state.last_post = created_time
+
+    def record_join(self, user_id, group_id, joined_time):
+        """
+        成員加入群組後呼叫（需在 commit 之後），同步調整該成員其他群組的權重。
+        """
+        self.record_joins([(user_id, group_id)], joined_time)
+
+    def record_joins(self, pairs, joined_time):
+        """
+        一批 (user_id, group_id) 加入後呼叫（需在 commit 之後）。
+        每位相關成員的隊伍數以一次集合查詢取得。
+        """
+        with self._lock:
+            user_ids = {
+                user_id
+                for user_id, group_id in pairs
+                if user_id in self._teams or group_id in self._groups
+            }
+            if not user_ids:
+                return
+            ticket = self._next_ticket()
+
+        teams = self._count_teams(user_ids)
+
+        with self._lock:
+            joining = [
+                (user_id, group_id, self._groups[group_id])
+                for user_id, group_id in pairs
+                if group_id in self._groups
+                and user_id not in self._groups[group_id].members
+            ]
+            self._apply_teams(teams, ticket, add={user_id for user_id, _, _ in joining})
+            for user_id, group_id, state in joining:
+                if user_id in self._teams:
+                    self._add_member(state, group_id, user_id, joined_time)
+                else:
+                    # 查詢結果已失效（期間被清除），重新載入這個群組
+                    self._drop(group_id)
+
+    def record_leave(self, user_id, group_id):
+        """
+        成員退出群組後呼叫（需在 commit 之後），同步調整該成員其他群組的權重。
+        """
+        with self._lock:
+            state = self._groups.get(group_id)
+            if state is not None and user_id in state.members:
+                joined_time = state.members.pop(user_id)
+                state.team_hist[self._teams[user_id]] -= 1
+                if joined_time >= state.day:
+                    state.joins_today -= 1
+                groups = self._user_groups[user_id]
+                groups.discard(group_id)
+                if not groups:
+                    self._forget(user_id)
+                    return
+            if user_id not in self._teams:
+                return
+            ticket = self._next_ticket()
+
+        teams = self._count_teams({user_id})
+
+        with self._lock:
+            self._apply_teams(teams, ticket)
+
+    def invalidate(self, group_id=None):
+        with self._lock:
+            if group_id is None:
+                self._clear()
+            else:
+                self._drop(group_id)
+
+    def _state(self, group_id):
+        version = versions.current(SCORES)
+        with self._lock:
+            if version != self._version:
+                self._clear()
+                self._version = version
+            state = self._groups.get(group_id)
+            if state is not None:
+                if time.monotonic() - state.loaded_at < self.ttl:
+                    self._groups.move_to_end(group_id)
+                    return state
+                self._drop(group_id)
+            ticket = self._next_ticket()
+
+        members, first_post, last_post = self._load(group_id)
+
+        with self._lock:
+            state = GroupScoreState(first_post, last_post, time.monotonic())
+            if ticket <= self._floor:
+                # 載入期間引擎被清除：以這次載入的結果計算，但不保留
+                for user_id, joined_time, teams in members:
+                    state.members[user_id] = joined_time
+                    state.team_hist[teams] += 1
+                    if joined_time >= state.day:
+                        state.joins_today += 1
+                return state
+            self._drop(group_id)
+            teams = {user_id: count for user_id, _, count in members}
+            self._apply_teams(teams, ticket, add=teams)
+            for user_id, joined_time, _ in members:
+                self._add_member(state, group_id, user_id, joined_time)
+            self._groups[group_id] = state
+            while len(self._groups) > self.max_groups:
+                self._drop(next(iter(self._groups)))
+            return state
+
+    def _load(self, group_id):
+        other = aliased(UserGroup)
+        members = (
+            db.session.query(
+                UserGroup.user_id,
+                UserGroup.joined_time,
+                func.count(other.group_id),
+            )
+            .join(other, other.user_id == UserGroup.user_id)
+            .filter(UserGroup.group_id == group_id)
+            .group_by(UserGroup.user_id, UserGroup.joined_time)
+            .all()
+        )
+        # 最後一篇貼文先查最近幾個月的分區；第一篇貼文必須從最舊的分區找起
+        start, end = recent_months()
+        latest = db.session.query(func.max(Post.created_time)).filter(
+            Post.group_id == group_id
+        )
+        first_post, last_post = db.session.query(
+            db.session.query(func.min(Post.created_time))
+            .filter(Post.group_id == group_id)
+            .scalar_subquery(),
+            func.coalesce(
+                latest.filter(
+                    Post.created_time >= start, Post.created_time < end
+                ).scalar_subquery(),
+                latest.filter(Post.created_time < start).scalar_subquery(),
+            ),
+        ).one()
+        return members, first_post, last_post
+
+    def _add_member(self, state, group_id, user_id, joined_time):
+        state.members[user_id] = joined_time
+        state.team_hist[self._teams[user_id]] += 1
+        if joined_time >= state.day:
+            state.joins_today += 1
+        self._user_groups.setdefault(user_id, set()).add(group_id)
+
+    @staticmethod
+    def _count_teams(user_ids):
+        """
+        以一次查詢取得 {user_id: 參加的隊伍數}（需在 commit 之後呼叫）。
+        """
+        counts = dict(
+            db.session.query(UserGroup.user_id, func.count())
+            .filter(UserGroup.user_id.in_(user_ids))
+            .group_by(UserGroup.user_id)
+            .all()
+        )
+        return {user_id: counts.get(user_id, 0) for user_id in user_ids}
+
+    def _next_ticket(self):
+        self._ticket += 1
+        return self._ticket
+
+    def _apply_teams(self, teams, ticket, add=()):
+        """
+        套用序號為 ticket 的查詢結果；已有更新結果的成員不覆寫。
+        尚未記錄隊伍數的成員只有在 add 中（即將加入已載入的群組）時才記錄。
+        """
+        if ticket <= self._floor:
+            return
+        for user_id, count in teams.items():
+            if self._tickets.get(user_id, 0) > ticket:
+                continue
+            if user_id not in self._teams and user_id not in add:
+                continue
+            self._tickets[user_id] = ticket
+            self._set_teams(user_id, count)
+
+    def _set_teams(self, user_id, teams):
+        previous = self._teams.get(user_id)
+        self._teams[user_id] = teams
+        if previous is None or previous == teams:
+            return
+        for group_id in self._user_groups.get(user_id, ()):
+            hist = self._groups[group_id].team_hist
+            hist[previous] -= 1
+            hist[teams] += 1
+
+    def _drop(self, group_id):
+        state = self._groups.pop(group_id, None)
+        if state is None:
+            return
+        for user_id in state.members:
+            groups = self._user_groups.get(user_id)
+            if groups is None:
+                continue
+            groups.discard(group_id)
+            if not groups:
+                self._forget(user_id)
+
+    def _forget(self, user_id):
+        # 成員已不在任何已載入的群組中
+        self._user_groups.pop(user_id, None)
+        self._teams.pop(user_id, None)
+        self._tickets.pop(user_id, None)
+
+    def _clear(self):
+        self._groups.clear()
+        self._teams.clear()
+        self._user_groups.clear()
+        self._tickets.clear()
+        self._floor = self._ticket
+
+
+score_engine = ScoreEngine()
@@ -0,0 +1,157 @@
+import time
+from bisect import bisect_left
+from threading import Lock
+from sqlalchemy import select, func, exists, case, or_
+from .extensions import db
+from .models import Group, UserGroup
+from .versions import versions, GROUP_NAMES
+
+MAX_QUERY_LENGTH = 50
+MAX_LIMIT = 50
+# 前綴相符的群組超過此數時不以 id 清單查詢，改用 LIKE 由資料庫排序
+MAX_PREFIX_CANDIDATES = 1000
+
+
+def like_prefix(query):
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+class GroupSearch:
+    """
+    群組名稱搜尋：前綴比對使用記憶體中依名稱排序的 (小寫名稱, group_id)，
+    新建群組時就地加入，其他 worker 依 GROUP_NAMES 版本號重新載入；
+    模糊比對交給 pg_trgm 的 GIN 索引。
+    前綴與模糊的結果、成員數與使用者是否已加入以單一查詢排序取得。
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 300
+        self.fuzzy = None  # None 表示第一次搜尋時檢查 pg_trgm 是否已安裝
+        self._names = []  # 已排序的 (小寫名稱, group_id)
+        self._loaded_at = None
+        self._version = None
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get("GROUP_SEARCH_INDEX_TTL", self.ttl)
+
+    def add(self, group_id, group_name, version):
+        """
+        新建群組並遞增 GROUP_NAMES 後呼叫（需在 commit 之後）：期間沒有其他 worker
+        建立群組（版本號恰好加一）時就地加入，否則留待下次搜尋重新載入。
+        """
+        epoch, number = version
+        with self._lock:
+            if self._loaded_at is not None and self._version == (epoch, number - 1):
+                entry = (group_name.lower(), group_id)
+                index = bisect_left(self._names, entry)
+                # commit 之後、遞增版本號之前重新載入的索引已包含這個群組
+                if self._names[index : index + 1] != [entry]:
+                    self._names.insert(index, entry)
+                self._version = version
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def prefix(self, query, limit):
+        """
+        回傳名稱以 query 開頭的所有 group_id，由呼叫端排序後再取前幾筆；
+        TTL 為 0 或相符的群組超過 limit 個時回傳 None，改由資料庫比對。
+        """
+        if not self.ttl:
+            return None
+        self._ensure_loaded()
+        with self._lock:
+            start = bisect_left(self._names, (query,))
+            matches = []
+            for name, group_id in self._names[start : start + limit + 1]:
+                if not name.startswith(query):
+                    break
+                matches.append(group_id)
+        return matches if len(matches) <= limit else None
+
+    def search(self, query, user_id, limit=20):
+        """
+        回傳排序後的群組：名稱完全相同、前綴相符、名稱相似度，再依成員數。
+        """
+        query = query.strip().lower()
+        name = func.lower(Group.group_name)
+        prefix_ids = self.prefix(query, MAX_PREFIX_CANDIDATES)
+        if prefix_ids is None:
+            is_prefix = name.like(like_prefix(query), escape="\\")
+        else:
+            is_prefix = Group.group_id.in_(prefix_ids)
+
+        fuzzy = self._fuzzy_available()
+        if prefix_ids == [] and not fuzzy:
+            return []
+
+        matched = [is_prefix]
+        order_by = [(name == query).desc(), case((is_prefix, 1), else_=0).desc()]
+        if fuzzy:
+            matched.append(name.op("%")(query))
+            order_by.append(func.similarity(name, query).desc())
+        order_by += [Group.member_count.desc(), Group.group_id]
+
+        is_joined = exists().where(
+            UserGroup.group_id == Group.group_id, UserGroup.user_id == user_id
+        )
+        rows = db.session.execute(
+            select(
+                Group.group_id,
+                Group.group_name,
+                Group.group_score,
+                Group.member_count,
+                is_joined.label("is_joined"),
+            )
+            .where(or_(*matched))
+            .order_by(*order_by)
+            .limit(limit)
+        ).all()
+        return [
+            {
+                "group_id": row.group_id,
+                "group_name": row.group_name,
+                "group_score": row.group_score,
+                "member_count": row.member_count,
+                "is_joined": row.is_joined,
+            }
+            for row in rows
+        ]
+
+    def _fuzzy_available(self):
+        if self.fuzzy is None:
+            self.fuzzy = db.session.execute(
+                db.text(
+                    "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+                )
+            ).scalar()
+        return self.fuzzy
+
+    def _ensure_loaded(self):
+        version = versions.current(GROUP_NAMES)
+        loaded_at = self._loaded_at
+        if (
+            loaded_at is not None
+            and time.monotonic() - loaded_at < self.ttl
+            and self._version == version
+        ):
+            return
+
+        names = sorted(
+            (group_name.lower(), group_id)
+            for group_id, group_name in db.session.execute(
+                select(Group.group_id, Group.group_name)
+            )
+        )
+        with self._lock:
+            self._names = names
+            self._loaded_at = time.monotonic()
+            self._version = version
+
+
+group_search = GroupSearch()
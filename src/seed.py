@@ -0,0 +1,108 @@
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update, delete, select
+from .extensions import db
+from .models import User, Group, UserGroup, Post
+from .partitions import ensure_post_partitions
+
+USER_PREFIX = "seed-"
+GROUP_PREFIX = "seed-group-"
+CHUNK_SIZE = 5000
+
+
+def _insert_chunks(model, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(model), rows[start : start + CHUNK_SIZE])
+
+
+def seed_database(users=1000, groups=100, memberships=3, posts=5, days=30, seed=0):
+    """
+    產生測試資料：users 位使用者、groups 個群組，每位使用者加入 memberships 個群組，
+    每個成員關係產生 posts 篇貼文，時間分散在最近 days 天內。
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    # 建立分區會先 commit，需在寫入任何資料之前完成，貼文才不會落入 posts_default
+    ensure_post_partitions(now - timedelta(days=days), now)
+
+    def random_time():
+        return now - timedelta(seconds=rng.randrange(days * 86400))
+
+    user_rows = [
+        {
+            "user_id": f"{USER_PREFIX}{i}",
+            "name": f"User {i}",
+            "account": f"{USER_PREFIX}{i}@example.com",
+            "password": "password",
+        }
+        for i in range(users)
+    ]
+    _insert_chunks(User, user_rows)
+
+    # 群組建立的時間早於所有貼文，與實際打卡（需先加入群組）的資料一致
+    group_rows = [
+        {
+            "group_name": f"{GROUP_PREFIX}{i}",
+            "group_score": rng.randrange(100000),
+            "created_time": random_time() - timedelta(days=days),
+        }
+        for i in range(groups)
+    ]
+    _insert_chunks(Group, group_rows)
+    group_ids = db.session.scalars(
+        select(Group.group_id).where(Group.group_name.like(f"{GROUP_PREFIX}%"))
+    ).all()
+
+    membership_rows = []
+    post_rows = []
+    for user in user_rows:
+        for group_id in rng.sample(group_ids, min(memberships, len(group_ids))):
+            membership_rows.append(
+                {
+                    "user_id": user["user_id"],
+                    "group_id": group_id,
+                    "joined_time": random_time(),
+                }
+            )
+            post_rows.extend(
+                {
+                    "user_id": user["user_id"],
+                    "group_id": group_id,
+                    "content": "seeded check-in",
+                    "created_time": random_time(),
+                }
+                for _ in range(posts)
+            )
+    _insert_chunks(UserGroup, membership_rows)
+    _insert_chunks(Post, post_rows)
+    member_counts = Counter(row["group_id"] for row in membership_rows)
+    if member_counts:
+        db.session.execute(
+            update(Group),
+            [
+                {"group_id": group_id, "member_count": count}
+                for group_id, count in member_counts.items()
+            ],
+        )
+    db.session.commit()
+
+    # 讓查詢規劃器取得新資料的統計資訊
+    db.session.execute(db.text("ANALYZE"))
+    db.session.commit()
+
+    return {
+        "users": len(user_rows),
+        "groups": len(group_ids),
+        "memberships": len(membership_rows),
+        "posts": len(post_rows),
+    }
+
+
+def clear_seed_data():
+    """
+    刪除 seed_database 產生的資料（成員關係與貼文由外鍵 CASCADE 一併刪除）。
+    """
+    db.session.execute(delete(User).where(User.user_id.like(f"{USER_PREFIX}%")))
+    db.session.execute(delete(Group).where(Group.group_name.like(f"{GROUP_PREFIX}%")))
+    db.session.commit()
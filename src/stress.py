@@ -0,0 +1,181 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select, delete, insert, func
+from .extensions import db
+from .group_detail import group_details
+from .models import User, Group, UserGroup, Post
+from .ranking import leaderboard
+from .search import group_search
+from .scoring import score_engine
+
+
+class StressRun:
+    """
+    以多個執行緒同時呼叫寫入 API，檢查成員數、貼文數與分數沒有遺失更新。
+    使用的帳號與群組以 stress-<run_id> 開頭，結束後刪除。
+    """
+
+    def __init__(self, app, run_id, users=50, concurrency=16):
+        self.app = app
+        self.prefix = f"stress-{run_id}"
+        self.user_ids = [f"{self.prefix}-{i}" for i in range(users)]
+        self.concurrency = concurrency
+        self.checks = []  # (名稱, 是否通過, 說明)
+        self._clients = threading.local()
+
+    def run(self):
+        db.session.execute(
+            insert(User),
+            [
+                {
+                    "user_id": user_id,
+                    "name": user_id,
+                    "account": f"{user_id}@example.com",
+                    "password": "unused",
+                }
+                for user_id in self.user_ids
+            ],
+        )
+        db.session.commit()
+        try:
+            group_id = self._create_group()
+            if group_id is not None:
+                self._join(group_id)
+                self._leave(group_id)
+                self._check_in(group_id)
+        finally:
+            self.cleanup()
+        return self.checks
+
+    def cleanup(self):
+        group_ids = db.session.scalars(
+            select(Group.group_id).where(Group.group_name.like(f"{self.prefix}%"))
+        ).all()
+        db.session.execute(delete(Group).where(Group.group_id.in_(group_ids)))
+        db.session.execute(delete(User).where(User.user_id.in_(self.user_ids)))
+        db.session.commit()
+        for group_id in group_ids:
+            score_engine.invalidate(group_id)
+            group_details.invalidate(group_id)
+        leaderboard.invalidate()
+        group_search.invalidate()
+
+    def _create_group(self):
+        # 所有使用者同時建立同名群組：只有一個成功，且群組恰有一位成員
+        name = f"{self.prefix}-group"
+        responses = self._send(
+            [
+                ("POST", f"/api/group/0/{user_id}", {"group_name": name})
+                for user_id in self.user_ids
+            ]
+        )
+        created = [body for status, body in responses if status == 200]
+        self._check(
+            "create group once",
+            len(created) == 1
+            and all(status == 400 for status, _ in responses if status != 200),
+            f"{len(created)} of {len(responses)} creations succeeded",
+        )
+        if not created:
+            return None
+        group_id = created[0]["group"]["group_id"]
+        self._check_member_count(group_id, "creator is the only member")
+        return group_id
+
+    def _join(self, group_id):
+        # 每位使用者以兩個 API 各加入一次：每人只有一次成功
+        requests = []
+        for user_id in self.user_ids:
+            requests.append(("POST", f"/api/group/{group_id}/{user_id}", None))
+            requests.append(
+                ("POST", "/api/usergroup", {"user_id": user_id, "group_id": group_id})
+            )
+        responses = self._send(requests)
+        joined = sum(status in (200, 201) for status, _ in responses)
+        self._check(
+            "join once per user",
+            joined == len(self.user_ids) - 1,
+            f"{joined} joins for {len(self.user_ids) - 1} new members",
+        )
+        self._check_member_count(group_id, "member_count after joins")
+
+    def _leave(self, group_id):
+        # 一半的使用者各送出兩次退出：每人只有一次成功
+        leaving = self.user_ids[1::2]
+        responses = self._send(
+            [
+                ("DELETE", "/api/usergroup", {"user_id": user_id, "group_id": group_id})
+                for user_id in leaving
+                for _ in range(2)
+            ]
+        )
+        left = sum(status == 200 for status, _ in responses)
+        self._check(
+            "leave once per user",
+            left == len(leaving),
+            f"{left} leaves for {len(leaving)} members",
+        )
+        self._check_member_count(group_id, "member_count after leaves")
+
+    def _check_in(self, group_id):
+        # 剩下的成員各同時打卡兩次：每人只有一次成功，分數為所有計算結果的最大值
+        members = db.session.scalars(
+            select(UserGroup.user_id).where(UserGroup.group_id == group_id)
+        ).all()
+        db.session.rollback()
+        responses = self._send(
+            [
+                ("POST", f"/api/post/{group_id}/{user_id}", {"content": "stress"})
+                for user_id in members
+                for _ in range(2)
+            ]
+        )
+        accepted = [body for status, body in responses if status == 200]
+        posts = db.session.scalar(select(func.count()).where(Post.group_id == group_id))
+        self._check(
+            "one check-in per member",
+            len(accepted) == len(members) == posts,
+            f"{len(accepted)} accepted, {posts} posts, {len(members)} members",
+        )
+
+        expected = max((body["score"] for body in accepted), default=0)
+        stored = db.session.scalar(
+            select(Group.group_score).where(Group.group_id == group_id)
+        )
+        db.session.rollback()
+        self._check(
+            "no lost score update",
+            stored == expected,
+            f"group_score {stored}, highest computed {expected}",
+        )
+
+    def _check_member_count(self, group_id, name):
+        member_count, members = db.session.execute(
+            select(
+                Group.member_count,
+                select(func.count())
+                .where(UserGroup.group_id == group_id)
+                .scalar_subquery(),
+            ).where(Group.group_id == group_id)
+        ).one()
+        db.session.rollback()
+        self._check(
+            name,
+            member_count == members,
+            f"member_count {member_count}, user_groups rows {members}",
+        )
+
+    def _check(self, name, ok, detail):
+        self.checks.append((name, bool(ok), detail))
+
+    def _send(self, requests):
+        def send(request):
+            client = getattr(self._clients, "client", None)
+            if client is None:
+                client = self._clients.client = self.app.test_client()
+            method, url, body = request
+            response = client.open(url, method=method, json=body)
+            return response.status_code, response.get_json(silent=True)
+
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            return list(pool.map(send, requests))
@@ -0,0 +1,203 @@
+import hashlib
+import secrets
+from functools import wraps
+from threading import Lock
+from flask import current_app, request, g, has_request_context
+from .metrics import registry
+from .representation import choose_encoding
+
+LEADERBOARD = "leaderboard"
+DIRECTORY = "directory"
+# 分數被整批修正（flask recompute-scores）時遞增，各 worker 的 ScoreEngine 據此重新載入
+SCORES = "scores"
+# 群組建立時遞增，各 worker 的搜尋前綴索引據此重新載入
+GROUP_NAMES = "group_names"
+
+conditional_requests = registry.counter(
+    "conditional_requests_total",
+    "Versioned GET requests answered with 304 or a full body",
+    ["endpoint", "outcome"],
+)
+
+
+def group_key(group_id):
+    return f"group:{group_id}"
+
+
+class MemoryBackend:
+    """
+    單一 worker 內的版本號；epoch 在每次啟動時重新產生，
+    避免重新啟動後的版本號與先前發出的 ETag 重複。
+    """
+
+    def __init__(self):
+        self.epoch = secrets.token_hex(8)
+        self._versions = {}
+        self._lock = Lock()
+
+    def get(self, keys):
+        with self._lock:
+            return [self._versions.get(key, 0) for key in keys]
+
+    def bump(self, keys):
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+            return [self._versions[key] for key in keys]
+
+    def reset(self):
+        with self._lock:
+            self._versions.clear()
+            self.epoch = secrets.token_hex(8)
+
+
+class RedisBackend:
+    """
+    多個 worker 共用的版本號：存在同一個 hash 中，以 HINCRBY 遞增。
+    """
+
+    def __init__(self, url, prefix="versions"):
+        import redis
+
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+        self._epoch = None
+
+    @property
+    def epoch(self):
+        if self._epoch is None:
+            name = f"{self.prefix}:epoch"
+            self._redis.set(name, secrets.token_hex(8), nx=True)
+            self._epoch = self._redis.get(name).decode()
+        return self._epoch
+
+    def get(self, keys):
+        return [int(value or 0) for value in self._redis.hmget(self.prefix, keys)]
+
+    def bump(self, keys):
+        pipeline = self._redis.pipeline(transaction=False)
+        for key in keys:
+            pipeline.hincrby(self.prefix, key, 1)
+        return pipeline.execute()
+
+    def reset(self):
+        self._redis.delete(self.prefix, f"{self.prefix}:epoch")
+        self._epoch = None
+
+
+class VersionCounters:
+    """
+    資料版本號：寫入路徑在 commit 後遞增受影響的 key（group:<id>、leaderboard、
+    directory），GET 以版本號產生 ETag，內容未變的輪詢不必查詢資料庫即可回應 304。
+    各 worker 的快取以讀取時的版本號標記，版本號改變即視為過期，
+    ETag 與回應內容因此來自同一個版本。
+    """
+
+    def __init__(self, app=None):
+        self.backend = MemoryBackend()
+        self.shared = False
+        self.conditional = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        url = app.config.get("VERSION_COUNTER_URL")
+        workers = app.config.get("WEB_CONCURRENCY", 1)
+        if not url and workers > 1:
+            raise RuntimeError(
+                f"WEB_CONCURRENCY={workers} requires VERSION_COUNTER_URL: "
+                "per-worker version counters would let other workers serve "
+                "stale data under a current ETag."
+            )
+        self.backend = RedisBackend(url) if url else MemoryBackend()
+        self.shared = bool(url)
+        # 其他實例的寫入不會遞增本行程的版本號，ETag 只在共用或確認單一實例時發出
+        self.conditional = self.shared or app.config.get(
+            "VERSION_COUNTER_SINGLE_INSTANCE", False
+        )
+
+    def bump(self, *keys):
+        """
+        遞增 keys 的版本號，回傳 {key: (epoch, 新版本號)}。
+        """
+        if not keys:
+            return {}
+        epoch = self.backend.epoch
+        return {
+            key: (epoch, version) for key, version in zip(keys, self.backend.bump(keys))
+        }
+
+    def current(self, key):
+        """
+        key 目前的 (epoch, 版本號)，供快取標記與比對。在 versioned 的 GET 中
+        回傳產生 ETag 時讀到的值，回應內容與 ETag 因此來自同一個版本。
+        """
+        known = g.get("versions", {}) if has_request_context() else {}
+        if key in known:
+            version = known[key]
+        else:
+            version = self.backend.get([key])[0]
+        return self.backend.epoch, version
+
+    def reset(self):
+        """
+        資料被整批改寫（例如重建 seed）後呼叫，使先前發出的 ETag 全部失效。
+        """
+        self.backend.reset()
+
+    def etag(self, keys):
+        """
+        以 epoch、各 key 的版本號、請求路徑與參數及回應編碼產生強 ETag。
+        版本號須在讀取資料前取得，讀到的資料才不會比 ETag 舊；
+        讀到的版本號記在 g.versions，同一個請求中的快取以此比對。
+        """
+        versions = self.backend.get(keys)
+        g.versions = dict(zip(keys, versions))
+        source = "|".join(
+            [
+                self.backend.epoch,
+                *(f"{key}={version}" for key, version in zip(keys, versions)),
+                request.full_path,
+                choose_encoding() or "identity",
+            ]
+        )
+        return hashlib.sha1(source.encode()).hexdigest()
+
+
+def versioned(*templates):
+    """
+    GET 的條件式請求：templates 以 view 參數填入，例如 "group:{group_id}"。
+    If-None-Match 相符時直接回應 304，否則在 200 回應加上 ETag。
+    版本號無法代表所有實例的寫入時（versions.conditional 為 False）不發出 ETag。
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            if not versions.conditional:
+                return method(*args, **kwargs)
+            keys = [template.format(**kwargs) for template in templates]
+            etag = versions.etag(keys)
+            endpoint = request.url_rule.rule
+
+            if request.if_none_match.contains_weak(etag):
+                conditional_requests.inc(endpoint=endpoint, outcome="not_modified")
+                response = current_app.response_class(status=304)
+                response.set_etag(etag)
+                response.headers["Cache-Control"] = "no-cache"
+                return response
+
+            conditional_requests.inc(endpoint=endpoint, outcome="modified")
+            data, code, *rest = method(*args, **kwargs)
+            headers = dict(rest[0]) if rest else {}
+            if code == 200:
+                headers["ETag"] = f'"{etag}"'
+                headers["Cache-Control"] = "no-cache"
+            return data, code, headers
+
+        return wrapper
+
+    return decorator
+
+
+versions = VersionCounters()
@@ -0,0 +1,41 @@
+import os
+import pytest
+from config import Config
+
+TEST_DB_NAME = os.getenv("TEST_DB_NAME")
+
+
+class TestConfig(Config):
+    TESTING = True
+    DB_NAME = TEST_DB_NAME
+    AUTH_ENABLED = False
+    # 測試只有一個行程，記憶體中的版本號即可代表所有寫入
+    VERSION_COUNTER_SINGLE_INSTANCE = True
+    # 打卡後同步重算分數，回應與資料庫在請求結束時即為最新
+    SCORE_PIPELINE_ASYNC = False
+
+
+@pytest.fixture
+def app():
+    """
+    連到 TEST_DB_NAME 指定的資料庫並重建資料表；未設定時略過需要資料庫的測試。
+    """
+    if not TEST_DB_NAME:
+        pytest.skip("TEST_DB_NAME is not set")
+
+    from src import create_app
+    from src.extensions import db
+
+    app, _ = create_app(TestConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,93 @@
+import socket
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+import jwt
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from src.auth import AuthError, SigningKeys, TokenVerifier
+
+PROJECT_ID = "test-project"
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    """
+    關閉網路並讓 firebase_admin 無法匯入：驗證只能使用本機的金鑰。
+    """
+
+    def refuse(*args, **kwargs):
+        raise AssertionError("network access during token verification")
+
+    monkeypatch.setattr(socket.socket, "connect", refuse)
+    monkeypatch.setattr("src.auth.requests.get", refuse)
+    monkeypatch.setitem(sys.modules, "firebase_admin", None)
+
+
+@pytest.fixture(scope="module")
+def signing_key():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "test")])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return key, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def _token(key, kid="k1", **claims):
+    now = int(time.time())
+    payload = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": "user-1",
+        "iat": now,
+        "exp": now + 3600,
+        **claims,
+    }
+    return jwt.encode(payload, key, algorithm="RS256", headers={"kid": kid})
+
+
+def _verifier(fetch):
+    verifier = TokenVerifier(keys=SigningKeys(fetch))
+    verifier.project_id = PROJECT_ID
+    return verifier
+
+
+def test_verifies_token_offline(offline, signing_key):
+    key, pem = signing_key
+    verifier = _verifier(lambda: ({"k1": pem}, 3600))
+
+    claims = verifier.verify(_token(key, name="User 1"))
+    assert claims["uid"] == "user-1"
+    assert claims["name"] == "User 1"
+
+    with pytest.raises(AuthError):
+        verifier.verify(_token(key, aud="other-project"))
+
+
+def test_unknown_kids_do_not_refetch_every_request(offline, signing_key):
+    key, pem = signing_key
+    fetches = []
+
+    def fetch():
+        fetches.append(time.monotonic())
+        # max-age 為 0 時仍以最短間隔快取
+        return {"k1": pem}, 0
+
+    verifier = _verifier(fetch)
+    for i in range(5):
+        with pytest.raises(AuthError, match="Unknown signing key"):
+            verifier.verify(_token(key, kid=f"bad-{i}"))
+    assert verifier.verify(_token(key))["uid"] == "user-1"
+    assert len(fetches) == 1
@@ -0,0 +1,80 @@
+import pytest
+from src.extensions import db
+from src.models import Group
+
+
+def _seed(app):
+    with app.app_context():
+        db.session.add(Group(group_id=1, group_name="g1", group_score=5))
+        db.session.commit()
+
+
+def _batch(client, *items):
+    response = client.post("/api/batch", json={"requests": list(items)})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()["responses"]
+
+
+def test_runs_each_distinct_request_once(app, client, monkeypatch):
+    import src.resources.batch as batch
+
+    _seed(app)
+    dispatched = []
+    dispatch = batch._dispatch
+
+    def counting_dispatch(path, etag):
+        dispatched.append(path)
+        return dispatch(path, etag)
+
+    monkeypatch.setattr(batch, "_dispatch", counting_dispatch)
+    responses = _batch(
+        client,
+        {"path": "/api/leaderboard"},
+        {"path": "/api/leaderboard"},
+        {"path": "/api/groups/u1"},
+    )
+    assert dispatched == ["/api/leaderboard", "/api/groups/u1"]
+    assert [response["index"] for response in responses] == [0, 1, 2]
+    assert [response["status"] for response in responses] == [200, 200, 200]
+    assert responses[0]["body"] == responses[1]["body"]
+    assert responses[0]["body"][0]["group_score"] == 5
+
+
+def test_forwards_etags_and_answers_304(app, client):
+    _seed(app)
+    [first] = _batch(client, {"path": "/api/leaderboard"})
+    etag = first["headers"]["ETag"]
+    assert etag == client.get("/api/leaderboard").headers["ETag"]
+
+    [cached] = _batch(client, {"path": "/api/leaderboard", "etag": etag})
+    assert cached["status"] == 304
+    assert cached["body"] is None
+
+
+def test_reports_sub_request_errors_per_item(app, client):
+    _seed(app)
+    responses = _batch(
+        client,
+        {"path": "/api/nope"},
+        {"path": "/metrics"},
+        {"path": 1},
+        "not an object",
+        {"path": "/api/group/1/trend?start=bad"},
+    )
+    assert [response["status"] for response in responses] == [404, 400, 400, 400, 400]
+
+
+@pytest.mark.parametrize(
+    "body", [[{"path": "/api/leaderboard"}], "x", {}, {"requests": []}]
+)
+def test_rejects_malformed_bodies(app, client, body):
+    assert client.post("/api/batch", json=body).status_code == 400
+
+
+def test_rejects_oversized_batches(app, client):
+    app.config["BATCH_MAX_REQUESTS"] = 1
+    response = client.post(
+        "/api/batch",
+        json={"requests": [{"path": "/api/leaderboard"}, {"path": "/api/groups/u1"}]},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,107 @@
+import pytest
+from src.extensions import db
+from src.models import User, Group, UserGroup, Post
+from src.ratelimit import checkin_limiter
+
+
+@pytest.fixture
+def seeded(app):
+    with app.app_context():
+        db.session.add_all(
+            User(user_id=user_id, name=user_id, account=f"{user_id}@x", password="p")
+            for user_id in ("u1", "u2")
+        )
+        db.session.add_all(
+            Group(group_id=group_id, group_name=f"g{group_id}", member_count=0)
+            for group_id in (1, 2)
+        )
+        db.session.commit()
+    checkin_limiter.reset()
+    return app
+
+
+def _statuses(response):
+    assert response.status_code == 200, response.get_json()
+    return [result["status"] for result in response.get_json()["results"]]
+
+
+def test_bulk_join_reports_each_item(seeded, client):
+    response = client.post(
+        "/api/usergroups/bulk",
+        json={
+            "memberships": [
+                {"user_id": "u1", "group_id": 1},
+                {"user_id": "u2", "group_id": 1},
+                {"user_id": "u1", "group_id": 1},
+                {"user_id": "nobody", "group_id": 1},
+                {"user_id": "u1", "group_id": 99},
+                {"user_id": "u1"},
+            ]
+        },
+    )
+    assert _statuses(response) == [201, 201, 400, 404, 404, 400]
+
+    response = client.post(
+        "/api/usergroups/bulk", json={"memberships": [{"user_id": "u1", "group_id": 1}]}
+    )
+    assert _statuses(response) == [400]
+
+    with seeded.app_context():
+        assert db.session.get(Group, 1).member_count == 2
+        assert UserGroup.query.count() == 2
+
+
+def test_bulk_checkin_writes_members_once_per_window(seeded, client):
+    with seeded.app_context():
+        db.session.add_all(
+            UserGroup(user_id=user_id, group_id=1) for user_id in ("u1", "u2")
+        )
+        db.session.commit()
+
+    response = client.post(
+        "/api/posts/bulk",
+        json={
+            "posts": [
+                {"user_id": "u1", "group_id": 1, "content": "a"},
+                {"user_id": "u1", "group_id": 1, "content": "b"},
+                {"user_id": "u1", "group_id": 2, "content": "c"},
+                {"user_id": "u2", "group_id": 1, "content": ""},
+            ]
+        },
+    )
+    assert _statuses(response) == [201, 403, 403, 400]
+
+    # 5 分鐘內再次打卡被拒絕，其他成員仍可打卡
+    response = client.post(
+        "/api/posts/bulk",
+        json={
+            "posts": [
+                {"user_id": "u1", "group_id": 1, "content": "d"},
+                {"user_id": "u2", "group_id": 1, "content": "e"},
+            ]
+        },
+    )
+    assert _statuses(response) == [403, 201]
+
+    with seeded.app_context():
+        assert sorted(post.content for post in Post.query) == ["a", "e"]
+
+
+@pytest.mark.parametrize("path", ["/api/usergroups/bulk", "/api/posts/bulk"])
+@pytest.mark.parametrize("body", [[{"user_id": "u1", "group_id": 1}], "x", {}])
+def test_bulk_rejects_malformed_bodies(seeded, client, path, body):
+    assert client.post(path, json=body).status_code == 400
+
+
+def test_bulk_rejects_oversized_batches(seeded, client):
+    seeded.config["BULK_MAX_ITEMS"] = 1
+    response = client.post(
+        "/api/usergroups/bulk",
+        json={
+            "memberships": [
+                {"user_id": "u1", "group_id": 1},
+                {"user_id": "u2", "group_id": 1},
+            ]
+        },
+    )
+    assert response.status_code == 400
@@ -0,0 +1,56 @@
+import subprocess
+import sys
+import pytest
+from sqlalchemy import exc
+from src.database import checkout_timeouts, pool_checked_out
+from src.extensions import db
+from tests.conftest import TestConfig
+
+
+class SmallPoolConfig(TestConfig):
+    SQLALCHEMY_ENGINE_OPTIONS = {"pool_size": 1, "max_overflow": 0, "pool_timeout": 0.1}
+
+
+@pytest.fixture
+def small_pool_app(app):
+    from src import create_app
+
+    small_app, _ = create_app(SmallPoolConfig)
+    yield small_app
+    with small_app.app_context():
+        db.engine.dispose()
+
+
+def test_pool_metrics_use_public_events(small_pool_app):
+    with small_pool_app.app_context():
+        engine = db.engine
+        timeouts = sum(checkout_timeouts.samples().values())
+
+        connection = engine.connect()
+        assert pool_checked_out.samples()[()] == 1
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        assert sum(checkout_timeouts.samples().values()) == timeouts + 1
+        connection.close()
+        assert pool_checked_out.samples()[()] == 0
+
+        # dispose() 重建連線池後，事件仍記錄新的連線池
+        engine.dispose()
+        with engine.connect():
+            assert pool_checked_out.samples()[()] == 1
+        assert pool_checked_out.samples()[()] == 0
+
+
+def test_psycopg_waits_cooperatively_under_eventlet():
+    pytest.importorskip("psycopg")
+    script = (
+        "import eventlet; eventlet.monkey_patch()\n"
+        "from src.database import use_green_wait\n"
+        "use_green_wait({'DB_DRIVER': 'psycopg'})\n"
+        "from psycopg import waiting\n"
+        "assert waiting.wait is waiting.wait_select, waiting.wait\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
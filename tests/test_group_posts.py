@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta
+from src.extensions import db
+from src.models import User, Group, UserGroup, Post
+from src.pagination import encode_cursor
+
+
+def _seed_posts(app, times):
+    with app.app_context():
+        db.session.add(User(user_id="u1", name="U1", account="u1@x", password="p"))
+        # 群組建立的時間早於所有貼文
+        db.session.add(
+            Group(
+                group_id=1,
+                group_name="g1",
+                member_count=1,
+                created_time=min(times) - timedelta(days=1),
+            )
+        )
+        db.session.flush()
+        db.session.add(UserGroup(user_id="u1", group_id=1))
+        db.session.add_all(
+            Post(user_id="u1", group_id=1, content=str(i), created_time=time)
+            for i, time in enumerate(times)
+        )
+        db.session.commit()
+        return {
+            post.post_id: post.to_dict()["created_time"]
+            for post in db.session.scalars(db.select(Post))
+        }
+
+
+def test_pages_across_trailing_zero_microseconds(app, client):
+    base = datetime(2026, 1, 2, 3, 4, 5)
+    # 小數秒結尾為 0（.12、.5）與沒有小數秒的時間
+    times = [
+        base + timedelta(microseconds=120000),
+        base + timedelta(seconds=1, microseconds=500000),
+        base + timedelta(seconds=2),
+        base + timedelta(seconds=3, microseconds=123456),
+    ]
+    expected = _seed_posts(app, times)
+
+    seen = {}
+    url = "/api/posts/1/u1?limit=1"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        for post in body["posts"]:
+            # 與 to_dict() 相同的格式，Python 3.9 的 fromisoformat 也能解析
+            assert post["created_time"] == expected[post["post_id"]]
+            datetime.fromisoformat(post["created_time"])
+            seen[post["post_id"]] = post["created_time"]
+        cursor = body["next_cursor"]
+        url = f"/api/posts/1/u1?limit=1&cursor={cursor}" if cursor else None
+
+    assert seen == expected
+
+
+def test_delta_pages_across_trailing_zero_microseconds(app, client):
+    base = datetime(2026, 1, 2, 3, 4, 5)
+    times = [
+        base + timedelta(microseconds=120000),
+        base + timedelta(seconds=1, microseconds=500000),
+        base + timedelta(seconds=2),
+    ]
+    expected = _seed_posts(app, times)
+
+    seen = {}
+    since = encode_cursor(base, 0)
+    while True:
+        response = client.get(f"/api/posts/1/u1?limit=1&since={since}")
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        seen.update((post["post_id"], post["created_time"]) for post in body["posts"])
+        since = body["watermark"]
+        if not body["has_more"]:
+            break
+
+    assert seen == expected
+
+
+def test_delta_rejects_invalid_since(app, client):
+    _seed_posts(app, [datetime(2026, 1, 2)])
+    for since in ("not-a-cursor", encode_cursor("2026-01-02T00:00:00+00:00", 0)):
+        response = client.get(f"/api/posts/1/u1?since={since}")
+        assert response.status_code == 400
+        assert response.get_json() == {"message": "Invalid cursor."}
+
+
+def test_pages_continue_past_recent_months(app, client):
+    # 最近幾個月的貼文不足一頁時，由更早的貼文補上
+    now = datetime.now()
+    old = now - timedelta(days=400)
+    times = [now - timedelta(seconds=i) for i in range(3)]
+    times += [old - timedelta(seconds=i) for i in range(3)]
+    _seed_posts(app, times)
+
+    first = client.get("/api/posts/1/u1?limit=4").get_json()
+    assert [post["content"] for post in first["posts"]] == ["0", "1", "2", "3"]
+    cursor = first["next_cursor"]
+    second = client.get(f"/api/posts/1/u1?limit=4&cursor={cursor}").get_json()
+    assert [post["content"] for post in second["posts"]] == ["4", "5"]
+    assert second["next_cursor"] is None
+
+
+def test_last_post_time_before_recent_months(app, client):
+    old = datetime.now() - timedelta(days=400)
+    expected = _seed_posts(app, [old])
+
+    detail = client.get("/api/group/1/u1").get_json()
+    assert [member["last_post_time"] for member in detail["members"]] == list(
+        expected.values()
+    )
+
+
+def test_new_group_skips_older_partitions(app, client, monkeypatch):
+    # 群組在最近幾個月內建立時，不會有更早的貼文，不必再查詢舊分區
+    now = datetime.now()
+    with app.app_context():
+        db.session.add(User(user_id="u1", name="U1", account="u1@x", password="p"))
+        db.session.add(
+            Group(group_id=1, group_name="g1", member_count=1, created_time=now)
+        )
+        db.session.flush()
+        db.session.add(UserGroup(user_id="u1", group_id=1))
+        db.session.add(Post(user_id="u1", group_id=1, content="0", created_time=now))
+        db.session.commit()
+
+    def older_posts_statement(*args):
+        raise AssertionError("older partitions were queried")
+
+    monkeypatch.setattr(
+        "src.group_detail.older_posts_statement", older_posts_statement
+    )
+    body = client.get("/api/posts/1/u1?limit=4").get_json()
+    assert [post["content"] for post in body["posts"]] == ["0"]
+    assert body["next_cursor"] is None
@@ -0,0 +1,52 @@
+from src.extensions import db
+from src.models import Group
+from src.ranking import leaderboard
+
+
+def _add_groups(app, scores):
+    with app.app_context():
+        db.session.add_all(
+            Group(group_id=group_id, group_name=f"g{group_id}", group_score=score)
+            for group_id, score in scores.items()
+        )
+        db.session.commit()
+
+
+def _ids(response):
+    assert response.status_code == 200, response.get_json()
+    return [group["group_id"] for group in response.get_json()]
+
+
+def test_ranks_by_score_then_newest_group(app, client):
+    _add_groups(app, {1: 10, 2: 30, 3: 20, 4: 30})
+    assert _ids(client.get("/api/leaderboard")) == [4, 2, 3, 1]
+    assert _ids(client.get("/api/leaderboard?limit=2&offset=1")) == [2, 3]
+
+
+def test_pages_past_capacity_read_the_database(app, client, monkeypatch):
+    _add_groups(app, {1: 10, 2: 30, 3: 20, 4: 30})
+    monkeypatch.setattr(leaderboard, "capacity", 2)
+    leaderboard.invalidate()
+    assert _ids(client.get("/api/leaderboard?limit=2")) == [4, 2]
+    assert _ids(client.get("/api/leaderboard?limit=2&offset=2")) == [3, 1]
+
+
+def test_score_changes_reorder_in_place(app, client):
+    from src.pipeline import apply_score
+
+    _add_groups(app, {1: 10, 2: 30})
+    first = client.get("/api/leaderboard")
+    assert _ids(first) == [2, 1]
+
+    with app.app_context():
+        assert apply_score(1, 40)
+    response = client.get(
+        "/api/leaderboard", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert _ids(response) == [1, 2]
+    assert response.get_json()[0]["group_score"] == 40
+
+
+def test_rejects_out_of_range_pages(app, client):
+    for query in ("limit=0", "limit=101", "offset=-1"):
+        assert client.get(f"/api/leaderboard?{query}").status_code == 400
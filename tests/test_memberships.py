@@ -0,0 +1,80 @@
+from src.extensions import db
+from src.models import User, Group, UserGroup, Post
+from src.ratelimit import checkin_limiter
+
+
+def _seed(app):
+    with app.app_context():
+        db.session.add_all(
+            User(user_id=user_id, name=user_id, account=f"{user_id}@x", password="p")
+            for user_id in ("u1", "u2")
+        )
+        db.session.commit()
+    checkin_limiter.reset()
+
+
+def _create_group(client, user_id, group_name):
+    return client.post(f"/api/group/0/{user_id}", json={"group_name": group_name})
+
+
+def _member_count(app, group_id):
+    with app.app_context():
+        return db.session.get(Group, group_id).member_count
+
+
+def test_create_group_adds_creator_in_one_write(app, client):
+    _seed(app)
+    response = _create_group(client, "u1", "runners")
+    assert response.status_code == 200
+    group = response.get_json()["group"]
+    assert group["member_count"] == 1
+
+    # 名稱重複或使用者不存在時不建立群組
+    assert _create_group(client, "u2", "runners").status_code == 400
+    assert _create_group(client, "nobody", "walkers").status_code == 404
+
+    with app.app_context():
+        assert Group.query.count() == 1
+        memberships = [(row.user_id, row.group_id) for row in UserGroup.query]
+    assert memberships == [("u1", group["group_id"])]
+
+
+def test_join_and_leave_keep_member_count(app, client):
+    _seed(app)
+    group_id = _create_group(client, "u1", "runners").get_json()["group"]["group_id"]
+    membership = {"user_id": "u2", "group_id": group_id}
+
+    response = client.post(f"/api/group/{group_id}/u2")
+    assert response.status_code == 200
+    assert response.get_json()["group"]["member_count"] == 2
+    # 重複加入與不存在的群組不改變成員數
+    assert client.post(f"/api/group/{group_id}/u2").status_code == 400
+    assert client.post("/api/usergroup", json=membership).status_code == 400
+    assert client.post("/api/group/99/u2").status_code == 404
+    assert _member_count(app, group_id) == 2
+
+    response = client.delete("/api/usergroup", json=membership)
+    assert response.status_code == 200
+    assert response.get_json()["member_count"] == 1
+    assert client.delete("/api/usergroup", json=membership).status_code == 404
+    assert _member_count(app, group_id) == 1
+
+
+def test_checkin_requires_membership(app, client):
+    _seed(app)
+    group_id = _create_group(client, "u1", "runners").get_json()["group"]["group_id"]
+
+    def check_in(group_id, user_id):
+        return client.post(f"/api/post/{group_id}/{user_id}", json={"content": "x"})
+
+    assert check_in(group_id, "u2").status_code == 403
+    assert check_in(group_id, "nobody").status_code == 404
+    assert check_in(99, "u1").status_code == 404
+
+    response = check_in(group_id, "u1")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["post"]["user_name"] == "u1"
+    assert body["score"] > 0
+    with app.app_context():
+        assert Post.query.count() == 1
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event, select
+from src.extensions import db
+from src.group_detail import page_statement
+from src.models import User, Group, UserGroup, Post
+from src.months import month_start, add_months, recent_months
+from src.partitions import (
+    archive_path,
+    archive_posts,
+    count_stranded_posts,
+    ensure_post_partitions,
+    partition_name,
+    post_partitions,
+    restore_posts,
+)
+from src.queryplan import check_partition_pruning
+
+NOW = datetime.now()
+THIS_MONTH = month_start(NOW)
+# 三個連續的舊月份：第一篇、可封存的中間一篇、成員最後一篇
+OLD_MONTHS = [add_months(THIS_MONTH, months) for months in (-14, -13, -12)]
+
+
+def _seed(app, times):
+    with app.app_context():
+        ensure_post_partitions(OLD_MONTHS[0], NOW)
+        db.session.add(User(user_id="u1", name="U1", account="u1@x", password="p"))
+        db.session.add(
+            Group(
+                group_id=1,
+                group_name="g1",
+                member_count=1,
+                created_time=OLD_MONTHS[0] - timedelta(days=1),
+            )
+        )
+        db.session.flush()
+        db.session.add(UserGroup(user_id="u1", group_id=1))
+        db.session.add_all(
+            Post(user_id="u1", group_id=1, content=str(i), created_time=time)
+            for i, time in enumerate(times)
+        )
+        db.session.commit()
+
+
+def _archive(directory, dry_run=False):
+    return archive_posts(
+        str(directory),
+        add_months(THIS_MONTH, -6),
+        NOW - timedelta(days=90),
+        dry_run=dry_run,
+    )
+
+
+def _contents():
+    return sorted(post.content for post in Post.query)
+
+
+def test_partitions_absorb_stranded_posts(app):
+    with app.app_context():
+        db.session.add(User(user_id="u1", name="U1", account="u1@x", password="p"))
+        db.session.add(Group(group_id=1, group_name="g1", member_count=1))
+        db.session.flush()
+        db.session.add(Post(user_id="u1", group_id=1, content="a", created_time=NOW))
+        db.session.commit()
+        assert count_stranded_posts() == 1
+
+        created = ensure_post_partitions(NOW, NOW)
+        assert created == [partition_name(THIS_MONTH)]
+        assert count_stranded_posts() == 0
+        assert _contents() == ["a"]
+
+
+def test_archive_and_restore_round_trip(app, tmp_path):
+    _seed(app, [month + timedelta(days=1) for month in OLD_MONTHS])
+    archived_month = OLD_MONTHS[1]
+    with app.app_context():
+        # dry run 只計算筆數
+        results = _archive(tmp_path / "dry", dry_run=True)
+        assert (partition_name(archived_month), 1, False) in results
+        assert not (tmp_path / "dry").exists()
+        assert _contents() == ["0", "1", "2"]
+
+        # 第一篇與成員最後一篇保留，中間那篇封存後分區被刪除
+        results = _archive(tmp_path)
+        assert (partition_name(archived_month), 1, True) in results
+        assert _contents() == ["0", "2"]
+        assert archived_month not in post_partitions()
+        assert (tmp_path / archive_path("", archived_month)).exists()
+
+        assert restore_posts(str(tmp_path), archived_month) == 1
+        assert archived_month in post_partitions()
+        assert _contents() == ["0", "1", "2"]
+        # 封存檔保留，重複還原不會產生重複的貼文
+        assert restore_posts(str(tmp_path), archived_month) == 0
+        assert _contents() == ["0", "1", "2"]
+
+
+def test_recent_page_reads_only_recent_partitions(app):
+    recent = [NOW - timedelta(minutes=i) for i in range(3)]
+    _seed(app, [month + timedelta(days=1) for month in OLD_MONTHS] + recent)
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    with app.app_context():
+        page = page_statement(1, *recent_months(), 2)
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            rows = db.session.execute(select(page.c.content)).scalars().all()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+        assert rows == ["3", "4"]
+        assert check_partition_pruning(statements) == []
@@ -0,0 +1,86 @@
+import pytest
+from datetime import datetime, timedelta
+from src.extensions import db
+from src.models import User, Group, UserGroup, Post
+from src.ratelimit import CheckinLimiter
+
+
+def test_fallback_checks_only_posts_inside_window(app):
+    now = datetime.now()
+    with app.app_context():
+        db.session.add(User(user_id="u1", name="U1", account="u1@x", password="p"))
+        db.session.add_all(
+            Group(group_id=group_id, group_name=f"g{group_id}", member_count=1)
+            for group_id in (1, 2)
+        )
+        db.session.flush()
+        db.session.add_all(
+            UserGroup(user_id="u1", group_id=group_id) for group_id in (1, 2)
+        )
+        db.session.add(
+            Post(
+                user_id="u1",
+                group_id=1,
+                content="a",
+                created_time=now - timedelta(minutes=1),
+            )
+        )
+        db.session.add(
+            Post(
+                user_id="u1",
+                group_id=2,
+                content="b",
+                created_time=now - timedelta(hours=1),
+            )
+        )
+        db.session.commit()
+
+        # 非權威模式：每次都以資料庫的最後打卡時間確認
+        limiter = CheckinLimiter()
+        limiter.authoritative = False
+        rejected = limiter.acquire_many([("u1", 1), ("u1", 2)], now)
+    assert list(rejected) == [("u1", 1)]
+    assert 230 < rejected[("u1", 1)] <= 240
+
+
+def test_failed_push_keeps_the_committed_checkin_limited(app, client, monkeypatch):
+    from src.ratelimit import checkin_limiter
+    from src.realtime import score_broadcaster
+
+    with app.app_context():
+        db.session.add(User(user_id="u1", name="U1", account="u1@x", password="p"))
+        db.session.add(Group(group_id=1, group_name="g1", member_count=1))
+        db.session.flush()
+        db.session.add(UserGroup(user_id="u1", group_id=1))
+        db.session.commit()
+    checkin_limiter.reset()
+
+    def unreachable(*args, **kwargs):
+        raise ConnectionError("message queue is unreachable")
+
+    monkeypatch.setattr(score_broadcaster, "publish_posts", unreachable)
+    response = client.post("/api/post/1/u1", json={"content": "a"})
+    assert response.status_code == 200, response.get_json()
+
+    # 已寫入的打卡仍在限制中，重試不會寫入第二筆
+    response = client.post("/api/post/1/u1", json={"content": "b"})
+    assert response.status_code == 403
+    with app.app_context():
+        assert Post.query.count() == 1
+
+
+def test_memory_limiter_is_not_authoritative_by_default():
+    from flask import Flask
+
+    app = Flask(__name__)
+    app.config["WEB_CONCURRENCY"] = 4
+    limiter = CheckinLimiter(app)
+    assert limiter.authoritative is False
+
+    # 多個 worker 各自的限制表不能代表所有打卡紀錄
+    app.config["CHECKIN_LIMITER_AUTHORITATIVE"] = True
+    with pytest.raises(RuntimeError):
+        CheckinLimiter(app)
+
+    app.config["WEB_CONCURRENCY"] = 1
+    assert CheckinLimiter(app).authoritative is True
@@ -0,0 +1,52 @@
+import pytest
+from src.realtime import ScoreBroadcaster, LEADERBOARD_ROOM
+
+
+@pytest.mark.parametrize("data", ["1", [1], {"group_id": "abc"}, {"group_id": [1]}])
+def test_subscribe_rejects_malformed_payloads(data):
+    assert "error" in ScoreBroadcaster().subscribe(data)
+
+
+def test_rooms_accepts_numeric_strings():
+    rooms = ScoreBroadcaster._rooms({"group_id": "7", "leaderboard": True})
+    assert rooms == ["group:7", LEADERBOARD_ROOM]
+
+
+def test_flush_failure_keeps_the_flusher_running():
+    class FailingSocketIO:
+        def __init__(self):
+            self.sleeps = 0
+
+        def sleep(self, seconds):
+            self.sleeps += 1
+            if self.sleeps > 2:
+                raise KeyboardInterrupt
+
+        def emit(self, *args, **kwargs):
+            raise ConnectionError("message queue is unreachable")
+
+    broadcaster = ScoreBroadcaster()
+    broadcaster._socketio = FailingSocketIO()
+    broadcaster._pending = {1: (0.0, {"group_id": 1})}
+    with pytest.raises(KeyboardInterrupt):
+        broadcaster._run()
+    assert broadcaster._socketio.sleeps == 3
+
+
+def test_new_post_emit_failure_does_not_raise():
+    class QueuedSocketIO:
+        def __init__(self):
+            self.tasks = []
+
+        def start_background_task(self, target, *args):
+            self.tasks.append((target, args))
+
+        def emit(self, *args, **kwargs):
+            raise ConnectionError("message queue is unreachable")
+
+    broadcaster = ScoreBroadcaster()
+    broadcaster._socketio = QueuedSocketIO()
+    broadcaster.publish_posts(1, [{"post_id": 1}])
+    # 送出在背景工作中進行，失敗只記錄
+    for target, args in broadcaster._socketio.tasks:
+        target(*args)
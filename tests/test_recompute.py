@@ -0,0 +1,73 @@
+from datetime import datetime
+from src.extensions import db
+from src.models import User, Group, UserGroup
+from src.scoring import score_engine
+from src.versions import versions, SCORES
+from tests.conftest import TestConfig
+
+
+def test_score_engine_reloads_after_scores_bump(app):
+    with app.app_context():
+        db.session.add_all(
+            User(user_id=user_id, name=user_id, account=f"{user_id}@x", password="p")
+            for user_id in ("u1", "u2")
+        )
+        db.session.add(Group(group_id=1, group_name="g1", member_count=1))
+        db.session.flush()
+        db.session.add(UserGroup(user_id="u1", group_id=1, joined_time=datetime.now()))
+        db.session.commit()
+        before = score_engine.score(1)
+
+        # 其他行程修正資料後只遞增共用的版本號，不會呼叫本行程的 invalidate
+        db.session.add(UserGroup(user_id="u2", group_id=1, joined_time=datetime.now()))
+        db.session.commit()
+        assert score_engine.score(1) == before
+
+        versions.bump(SCORES)
+        assert score_engine.score(1) > before
+
+
+def test_recompute_refuses_without_shared_versions():
+    from src import create_app
+
+    class NoDatabaseConfig(TestConfig):
+        DB_NAME = "unused"
+
+    app, _ = create_app(NoDatabaseConfig)
+    result = app.test_cli_runner().invoke(args=["recompute-scores"])
+    assert result.exit_code != 0
+    assert "VERSION_COUNTER_URL" in result.output
+
+
+def test_normal_checkins_are_not_drift(app, client):
+    from datetime import timedelta
+    from src.models import Post
+    from src.recompute import recompute_all, find_drift
+
+    with app.app_context():
+        db.session.add_all(
+            User(user_id=user_id, name=user_id, account=f"{user_id}@x", password="p")
+            for user_id in ("u1", "u2")
+        )
+        db.session.add(Group(group_id=1, group_name="g1"))
+        db.session.commit()
+    for user_id in ("u1", "u2"):
+        membership = {"user_id": user_id, "group_id": 1}
+        assert client.post("/api/usergroup", json=membership).status_code == 201
+
+    assert client.post("/api/post/1/u1", json={"content": "a"}).status_code == 200
+    with app.app_context():
+        # 第一次打卡移到六分鐘前，第二次打卡使貼文時間跨度變長、公式的值下降
+        post = Post.query.one()
+        post.created_time -= timedelta(minutes=6)
+        db.session.commit()
+        score_engine.invalidate()
+    assert client.post("/api/post/1/u2", json={"content": "b"}).status_code == 200
+
+    with app.app_context():
+        results = recompute_all()
+        [(_, stored, computed)] = results
+        assert stored > computed
+        # 分數只會被打卡提高，高於公式的分數不是差異
+        assert find_drift(results) == []
+        assert find_drift(results, lower=True) == [(1, stored, computed)]
@@ -0,0 +1,104 @@
+from datetime import datetime
+from src.extensions import db
+from src.models import User, Group, UserGroup, Post
+from src.scoring import compute_score, today_start, score_engine
+
+
+def per_member_score(group_id):
+    """
+    原本 calculate_dynamic_score 逐一查詢每位成員隊伍數的算法。
+    """
+    total_weighted_users = 0
+    for user_group in UserGroup.query.filter_by(group_id=group_id).all():
+        teams = UserGroup.query.filter_by(user_id=user_group.user_id).count()
+        total_weighted_users += 0 if teams == 0 else 1 / teams
+    times = [post.created_time for post in Post.query.filter_by(group_id=group_id)]
+    span = (max(times) - min(times)).total_seconds() if times else 0
+    joins_today = (
+        UserGroup.query.filter_by(group_id=group_id)
+        .filter(UserGroup.joined_time >= today_start())
+        .count()
+    )
+    return compute_score(total_weighted_users, span, joins_today)
+
+
+def _seed(app, users, groups):
+    with app.app_context():
+        db.session.add_all(
+            User(user_id=user_id, name=user_id, account=f"{user_id}@x", password="p")
+            for user_id in users
+        )
+        db.session.add_all(
+            Group(group_id=group_id, group_name=f"g{group_id}") for group_id in groups
+        )
+        db.session.commit()
+        score_engine.invalidate()
+
+
+def _assert_matches(app, groups):
+    with app.app_context():
+        for group_id in groups:
+            assert score_engine.score(group_id) == per_member_score(group_id), group_id
+
+
+def test_engine_matches_per_member_formula(app, client):
+    groups = (1, 2, 3)
+    _seed(app, ("u1", "u2", "u3", "u4"), groups)
+    # 先載入所有群組，之後的異動都經由增量更新
+    _assert_matches(app, groups)
+
+    for user_id, group_id in (("u1", 1), ("u1", 2), ("u2", 1), ("u3", 2), ("u3", 3)):
+        response = client.post(
+            "/api/usergroup", json={"user_id": user_id, "group_id": group_id}
+        )
+        assert response.status_code == 201
+        _assert_matches(app, groups)
+
+    for user_id, group_id in (("u1", 1), ("u2", 1), ("u3", 3)):
+        response = client.post(f"/api/post/{group_id}/{user_id}", json={"content": "x"})
+        assert response.status_code == 200
+        _assert_matches(app, groups)
+
+    response = client.delete("/api/usergroup", json={"user_id": "u1", "group_id": 2})
+    assert response.status_code == 200
+    _assert_matches(app, groups)
+
+    # u4 尚未被引擎記錄，一次加入兩個已載入的群組
+    response = client.post(
+        "/api/usergroups/bulk",
+        json={
+            "memberships": [
+                {"user_id": "u4", "group_id": 1},
+                {"user_id": "u4", "group_id": 2},
+                {"user_id": "u2", "group_id": 3},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    assert [result["status"] for result in response.get_json()["results"]] == [
+        201,
+        201,
+        201,
+    ]
+    _assert_matches(app, groups)
+
+
+def test_join_committed_before_another_is_recorded(app):
+    # 兩個加入都已 commit，才依序通知引擎：第一次查詢已包含第二個加入
+    _seed(app, ("u1", "u2"), (1, 2))
+    with app.app_context():
+        db.session.add(UserGroup(user_id="u2", group_id=1))
+        db.session.add(UserGroup(user_id="u2", group_id=2))
+        db.session.commit()
+        score_engine.score(1)
+        score_engine.score(2)
+
+        now = datetime.now()
+        db.session.add(UserGroup(user_id="u1", group_id=1, joined_time=now))
+        db.session.add(UserGroup(user_id="u1", group_id=2, joined_time=now))
+        db.session.commit()
+        score_engine.record_join("u1", 1, now)
+        score_engine.record_join("u1", 2, now)
+
+        for group_id in (1, 2):
+            assert score_engine.score(group_id) == per_member_score(group_id)
@@ -0,0 +1,93 @@
+import pytest
+from src.extensions import db
+from src.models import User, Group, UserGroup
+from src.search import group_search
+from src.versions import versions, GROUP_NAMES
+
+
+def _add_groups(app, *groups):
+    with app.app_context():
+        for group_id, group_name, member_count in groups:
+            db.session.add(
+                Group(
+                    group_id=group_id, group_name=group_name, member_count=member_count
+                )
+            )
+        db.session.commit()
+
+
+def test_prefix_matches_are_ranked_before_limit(app):
+    # 名稱排序在後的群組成員數最多，仍應排在第一位
+    _add_groups(app, (1, "alpha-a", 1), (2, "alpha-b", 2), (3, "alpha-c", 30))
+    with app.app_context():
+        results = group_search.search("alpha", "u1", limit=1)
+    assert [group["group_id"] for group in results] == [3]
+
+
+def test_index_reloads_after_other_worker_creates_group(app):
+    _add_groups(app, (1, "alpha-a", 1))
+    group_search.invalidate()
+    with app.app_context():
+        assert [g["group_id"] for g in group_search.search("al", "u1")] == [1]
+
+    # 其他 worker 建立群組：寫入資料庫並遞增共用的版本號，不更新本行程的索引
+    _add_groups(app, (2, "alpha-b", 5))
+    versions.bump(GROUP_NAMES)
+    with app.app_context():
+        assert [g["group_id"] for g in group_search.search("al", "u1")] == [2, 1]
+
+
+def _search(client, query, limit=20):
+    response = client.get(f"/api/groups/u1/search?q={query}&limit={limit}")
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_exact_name_ranks_first_and_marks_joined(app, client):
+    _add_groups(app, (1, "Run", 1), (2, "running", 40), (3, "walk", 50))
+    with app.app_context():
+        db.session.add(User(user_id="u1", name="U1", account="u1@x", password="p"))
+        db.session.add(UserGroup(user_id="u1", group_id=2))
+        db.session.commit()
+    group_search.invalidate()
+
+    results = _search(client, "RUN")
+    assert [group["group_id"] for group in results][:2] == [1, 2]
+    assert [group["is_joined"] for group in results][:2] == [False, True]
+
+
+def test_database_prefix_treats_wildcards_literally(app, client, monkeypatch):
+    _add_groups(app, (1, "100% fit", 1), (2, "1000 steps", 2))
+    # TTL 為 0 時不使用記憶體索引，以 LIKE 由資料庫比對
+    monkeypatch.setattr(group_search, "ttl", 0)
+    monkeypatch.setattr(group_search, "fuzzy", False)
+    assert [group["group_id"] for group in _search(client, "100%25")] == [1]
+    assert [group["group_id"] for group in _search(client, "10")] == [2, 1]
+
+
+def test_new_group_is_searchable_immediately(app, client):
+    with app.app_context():
+        db.session.add(User(user_id="u1", name="U1", account="u1@x", password="p"))
+        db.session.commit()
+    group_search.invalidate()
+    # 先載入索引，之後建立的群組由 add() 就地加入
+    assert _search(client, "hik") == []
+
+    response = client.post("/api/group/0/u1", json={"group_name": "hikers"})
+    assert response.status_code == 200
+    group_id = response.get_json()["group"]["group_id"]
+    assert [group["group_id"] for group in _search(client, "hik")][:1] == [group_id]
+
+
+def test_fuzzy_matches_similar_names(app, client):
+    with app.app_context():
+        if not group_search._fuzzy_available():
+            pytest.skip("pg_trgm is not installed")
+    _add_groups(app, (1, "marathon club", 1))
+    group_search.invalidate()
+    assert [group["group_id"] for group in _search(client, "marathn club")] == [1]
+
+
+@pytest.mark.parametrize("query", ["q=&limit=20", "q=run&limit=0", "q=run&limit=51"])
+def test_rejects_invalid_queries(app, client, query):
+    assert client.get(f"/api/groups/u1/search?{query}").status_code == 400
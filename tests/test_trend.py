@@ -0,0 +1,26 @@
+import pytest
+from src.extensions import db
+from src.models import Group
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "start=2020-01-01T00:00:00%2B00:00",
+        "start=2020-01-01T00:00:00&end=2020-01-02T00:00:00%2B08:00",
+    ],
+)
+def test_rejects_timezone_aware_bounds(app, client, query):
+    with app.app_context():
+        db.session.add(Group(group_id=1, group_name="g1", member_count=0))
+        db.session.commit()
+
+    response = client.get(f"/api/group/1/trend?{query}")
+    assert response.status_code == 400, response.get_json()
+
+    # 經由 /api/batch 時同樣回應 400，而不是 500
+    response = client.post(
+        "/api/batch", json={"requests": [{"path": f"/api/group/1/trend?{query}"}]}
+    )
+    assert response.status_code == 200
+    assert response.get_json()["responses"][0]["status"] == 400
@@ -0,0 +1,89 @@
+from datetime import datetime
+import pytest
+from src.extensions import db
+from src.models import User, Group, UserGroup, Post
+from src.versions import versions, group_key, LEADERBOARD
+from tests.conftest import TestConfig
+
+
+def _seed(app):
+    with app.app_context():
+        db.session.add(User(user_id="u1", name="U1", account="u1@x", password="p"))
+        db.session.add(Group(group_id=1, group_name="g1", member_count=1))
+        db.session.flush()
+        db.session.add(UserGroup(user_id="u1", group_id=1))
+        db.session.commit()
+
+
+def _write_elsewhere(app, statement, *keys):
+    # 模擬其他 worker 或 CLI：直接寫入資料庫並遞增共用的版本號，不清除本行程的快取
+    with app.app_context():
+        db.session.execute(statement)
+        db.session.commit()
+    versions.bump(*keys)
+
+
+def test_group_cache_follows_version(app, client):
+    _seed(app)
+    first = client.get("/api/posts/1/u1")
+    assert first.get_json()["posts"] == []
+
+    _write_elsewhere(
+        app,
+        db.insert(Post).values(
+            user_id="u1", group_id=1, content="hi", created_time=datetime.now()
+        ),
+        group_key(1),
+    )
+
+    response = client.get(
+        "/api/posts/1/u1", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert response.status_code == 200
+    assert [post["content"] for post in response.get_json()["posts"]] == ["hi"]
+
+
+def test_leaderboard_cache_follows_version(app, client):
+    _seed(app)
+    first = client.get("/api/leaderboard")
+    assert first.get_json()[0]["group_score"] == 0
+
+    _write_elsewhere(
+        app, db.update(Group).values(group_score=42), group_key(1), LEADERBOARD
+    )
+
+    response = client.get(
+        "/api/leaderboard", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert response.status_code == 200
+    assert response.get_json()[0]["group_score"] == 42
+
+
+def test_multiple_workers_require_shared_counters():
+    from src import create_app
+
+    class MultiWorkerConfig(TestConfig):
+        DB_NAME = "unused"
+        WEB_CONCURRENCY = 2
+        VERSION_COUNTER_URL = None
+
+    with pytest.raises(RuntimeError, match="VERSION_COUNTER_URL"):
+        create_app(MultiWorkerConfig)
+
+
+def test_local_counters_skip_etags_unless_single_instance(app):
+    from src import create_app
+
+    class UnsharedConfig(TestConfig):
+        VERSION_COUNTER_URL = None
+        VERSION_COUNTER_SINGLE_INSTANCE = False
+
+    _seed(app)
+    unshared, _ = create_app(UnsharedConfig)
+    client = unshared.test_client()
+    first = client.get("/api/leaderboard")
+    assert first.status_code == 200
+    assert "ETag" not in first.headers
+
+    response = client.get("/api/leaderboard", headers={"If-None-Match": "*"})
+    assert response.status_code == 200